@@ -0,0 +1,7 @@
+-- Store the nas client set fingerprint of the last reload next to the reload flag
+-- (on FreeRADIUS servers). The reload script skips the HUP when the nas table still
+-- has this fingerprint, e.g. after a reverted edit or a sync that rewrote identical rows
+-- Run after radius_add_reload_generation.sql
+
+ALTER TABLE radius_reload_flag
+    ADD COLUMN applied_fingerprint VARCHAR(64) NULL AFTER applied_generation;
@@ -0,0 +1,8 @@
+-- Add change generation counters to the reload flag table (on FreeRADIUS servers)
+-- Every NAS change bumps change_generation; the reload script records the generation
+-- a reload covered in applied_generation, so changes made during a reload are not lost
+-- Run after radius_add_reload_flag.sql
+
+ALTER TABLE radius_reload_flag
+    ADD COLUMN change_generation BIGINT UNSIGNED NOT NULL DEFAULT 0 AFTER needs_reload,
+    ADD COLUMN applied_generation BIGINT UNSIGNED NOT NULL DEFAULT 0 AFTER change_generation;
@@ -0,0 +1,14 @@
+-- Add reload history table to the radius database (on FreeRADIUS servers)
+-- The reload script logs one row per reload: the change generation it applied, the
+-- outcome and the time from HUP until FreeRADIUS answered Status-Server again
+-- Summarise with: freeradius-reload-check.py --reload-history [DAYS]
+
+CREATE TABLE IF NOT EXISTS radius_reload_history (
+    id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    reloaded_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    generation BIGINT UNSIGNED NULL,
+    outcome VARCHAR(16) NOT NULL,  -- ready, unready, sent (not probed), skipped, failed
+    ready_ms INT UNSIGNED NULL,    -- HUP to first Status-Server answer
+    fingerprint VARCHAR(64) NULL,
+    KEY idx_reloaded_at (reloaded_at)
+);
@@ -4,27 +4,180 @@ DHCPv6 RPD Client Simulator
 Simulates a Remote PHY Device (RPD) requesting DHCPv6 configuration from Kea server
 """
 
-from scapy.all import *
-from scapy.layers.dhcp6 import *
-from scapy.layers.inet6 import IPv6, UDP
-from scapy.layers.l2 import Ether
+import asyncio
+import collections
+import csv
+import ipaddress
+import json
+import errno
+import math
+import multiprocessing
+import os
+import random
+import socket
+import threading
 import time
 import sys
 import struct
+import zlib
 
 # DHCPv6 Constants
 DHCPV6_SERVER_PORT = 547
 DHCPV6_CLIENT_PORT = 546
 DHCPV6_MULTICAST = "ff02::1:2"
 
+# DHCPv6 message types (RFC 8415)
+MSG_SOLICIT = 1
+MSG_ADVERTISE = 2
+MSG_REQUEST = 3
+MSG_RENEW = 5
+MSG_REBIND = 6
+MSG_REPLY = 7
+MSG_RELEASE = 8
+MSG_DECLINE = 9
+MSG_RELAY_FORW = 12
+MSG_RELAY_REPL = 13
+
+MESSAGE_TYPES = {
+    1: "SOLICIT", 2: "ADVERTISE", 3: "REQUEST", 4: "CONFIRM", 5: "RENEW", 6: "REBIND",
+    7: "REPLY", 8: "RELEASE", 9: "DECLINE", 10: "RECONFIGURE", 11: "INFORMATION-REQUEST",
+    12: "RELAY-FORW", 13: "RELAY-REPL"
+}
+
+# Server-to-client messages that answer an outstanding request
+REPLY_TYPES = (MSG_ADVERTISE, MSG_REPLY)
+
+# DHCPv6 option codes (RFC 8415)
+OPTION_CLIENTID = 1
+OPTION_SERVERID = 2
+OPTION_IA_NA = 3
+OPTION_IAADDR = 5
+OPTION_ORO = 6
+OPTION_ELAPSED_TIME = 8
+OPTION_RELAY_MSG = 9
+OPTION_STATUS_CODE = 13
+OPTION_RAPID_COMMIT = 14
+OPTION_USER_CLASS = 15
+OPTION_VENDOR_CLASS = 16
+OPTION_VENDOR_OPTS = 17
+OPTION_INTERFACE_ID = 18
+OPTION_RELAY_PORT = 135  # RFC 8357 Relay Source Port
+
+# RFC 8415 section 7.6 transmission parameters: (IRT, MRT, MRC, MRD), seconds, 0 = unlimited
+RETRANSMISSION_PARAMETERS = {
+    MSG_SOLICIT: (1, 3600, 0, 0),
+    MSG_REQUEST: (1, 30, 10, 0),
+    MSG_RENEW: (10, 600, 0, 0),
+    MSG_REBIND: (10, 600, 0, 0),
+    MSG_RELEASE: (1, 0, 4, 0),
+    MSG_DECLINE: (1, 0, 5, 0)
+}
+SOL_MAX_DELAY = 1
+
+# DUID-LLT time is counted from January 1, 2000
+DUID_EPOCH = 946684800
+
 # Vendor-specific constants for CableLabs (vendor-id 4491)
 CABLELABS_VENDOR_ID = 4491
 
+# CableLabs CL-SP-CANN-DHCP-Reg sub-options carried for RPDs
+CABLELABS_SUBOPTION_NAMES = {
+    34: "CCAP-Cores",
+    37: "CCAP-Core-Subnet",
+    38: "CCAP-Core-Mask",
+    61: "CCAP-Core-Address"
+}
+
+# CableLabs sub-options a probe reply must carry for an RPD to find its CCAP Core
+CCAP_CORE_SUBOPTIONS = (34, 61)
+
+# Upper bounds (seconds) of the probe daemon's exported latency histogram buckets
+PROBE_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Local address lookups per interface: (global address, link-local address)
+_LOCAL_ADDRESSES = {}
+
+# IFA_F_* flags of addresses that cannot be used as a source yet (or any more)
+_IFA_F_UNUSABLE = 0x20 | 0x40  # deprecated, tentative
+
+
+def _read_interface_addresses(interface):
+    """Return (global, link-local) IPv6 addresses of an interface from /proc/net/if_inet6"""
+    global_address = link_local = None
+    with open('/proc/net/if_inet6') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) < 6 or fields[5] != interface or int(fields[4], 16) & _IFA_F_UNUSABLE:
+                continue
+            address = socket.inet_ntop(socket.AF_INET6, bytes.fromhex(fields[0]))
+            scope = int(fields[3], 16)
+            if scope == 0x00 and global_address is None:
+                global_address = address
+            elif scope == 0x20 and link_local is None:
+                link_local = address
+    return global_address, link_local
+
+
+def get_local_ipv6(interface, quiet=False):
+    """
+    Find a global IPv6 address on the interface to use as relay peer address. The
+    kernel's address table is read once per interface and cached, so building packets
+    never forks a process; falls back to the interface's link-local address.
+    """
+    addresses = _LOCAL_ADDRESSES.get(interface)
+    first_lookup = addresses is None
+    if first_lookup:
+        try:
+            addresses = _read_interface_addresses(interface)
+        except OSError:
+            addresses = (None, None)
+        _LOCAL_ADDRESSES[interface] = addresses
+    global_address, link_local = addresses
+    
+    local_ipv6 = global_address
+    if not local_ipv6:
+        local_ipv6 = link_local or "fe80::250:56ff:fe89:56da"
+        if not quiet and first_lookup:
+            print(f"[WARNING] Could not find global IPv6 address on {interface}, using link-local")
+    elif not quiet and first_lookup:
+        print(f"[INFO] Using local IPv6 address: {local_ipv6}")
+    return local_ipv6
+
+
+def get_interface_mac(interface):
+    """
+    Return the interface's MAC address from sysfs, so default MACs do not cost a scapy
+    import; falls back to scapy's interface table where sysfs is not available.
+    """
+    try:
+        with open(f'/sys/class/net/{interface}/address') as f:
+            return f.read().strip()
+    except OSError:
+        from scapy.all import get_if_hwaddr
+        return get_if_hwaddr(interface)
+
+
+def print_hexdump(data):
+    """Print bytes in scapy's hexdump() layout: offset, 16 hex bytes, printable ASCII"""
+    data = bytes(data)
+    for offset in range(0, len(data), 16):
+        chunk = data[offset:offset + 16]
+        hex_bytes = "".join(f"{byte:02X} " for byte in chunk).ljust(48)
+        text = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in chunk)
+        print(f"{offset:04x}  {hex_bytes} {text}")
+
+
 class DHCPv6RPDClient:
-    def __init__(self, interface="eth0", client_mac=None):
+    def __init__(self, interface="eth0", client_mac=None, transaction_id=None, rapid_commit=False,
+                 relay_link=None, profile=None):
         self.interface = interface
-        self.client_mac = client_mac or get_if_hwaddr(interface)
-        self.transaction_id = random.randint(0, 0xFFFFFF)
+        self.rapid_commit = rapid_commit
+        self.relay_link = relay_link  # RelayLink this RPD sits behind in relay emulation
+        self.profile = profile  # ClientProfile of a population mix (None: the RPD identity)
+        self.client_mac = client_mac or get_interface_mac(interface)
+        if transaction_id is None:
+            transaction_id = random.randint(0, 0xFFFFFF)
+        self.transaction_id = transaction_id
         self.duid = self.generate_duid()
         
     def generate_duid(self):
@@ -32,13 +185,24 @@ class DHCPv6RPDClient:
         # Type 1 = DUID-LLT
         # Hardware type 1 = Ethernet
         # Time: seconds since January 1, 2000
-        epoch_2000 = int(time.time() - 946684800)
+        epoch_2000 = int(time.time() - DUID_EPOCH)
+        self.duid_time = epoch_2000
         mac_bytes = bytes.fromhex(self.client_mac.replace(':', ''))
         duid = struct.pack('!HHI', 1, 1, epoch_2000) + mac_bytes
         return duid
     
-    def create_solicit(self, relay_address=None):
+    def get_local_ipv6(self, quiet=False):
+        """Find a global IPv6 address on the interface to use as relay peer address"""
+        return get_local_ipv6(self.interface, quiet)
+    
+    def create_solicit(self, relay_address=None, peer_address=None):
         """Create DHCPv6 Solicit message with RPD client class"""
+        from scapy.layers.dhcp6 import (
+            DHCP6_Solicit, DHCP6_RelayForward, DUID_LLT, DHCP6OptClientId, DHCP6OptElapsedTime,
+            DHCP6OptIA_NA, DHCP6OptUserClass, DHCP6OptVendorSpecificInfo, DHCP6OptOptReq,
+            DHCP6OptRapidCommit, DHCP6OptIfaceId, DHCP6OptRelayMsg
+        )
+        from scapy.layers.inet6 import IPv6, UDP
         
         # Build DHCPv6 Solicit packet with options using layer chaining
         dhcp6 = DHCP6_Solicit(trid=self.transaction_id)
@@ -46,7 +210,7 @@ class DHCPv6RPDClient:
         # Option 1: Client Identifier (DUID) - create DUID_LLT
         duid_llt = DUID_LLT(
             hwtype=1,  # Ethernet
-            timeval=int(time.time() - 946684800),  # Seconds since Jan 1, 2000
+            timeval=self.duid_time,  # Seconds since Jan 1, 2000 (same DUID for every message)
             lladdr=self.client_mac
         )
         dhcp6 /= DHCP6OptClientId(duid=duid_llt)
@@ -84,6 +248,10 @@ class DHCPv6RPDClient:
         # 17 = Vendor-specific Information
         dhcp6 /= DHCP6OptOptReq(reqopts=[23, 24, 17])
         
+        # Option 14: Rapid Commit - ask for a committed Reply instead of an Advertise
+        if self.rapid_commit:
+            dhcp6 /= DHCP6OptRapidCommit()
+        
         # If relay address specified, wrap in RelayForward
         if relay_address:
             # Build the complete SOLICIT packet first
@@ -92,28 +260,8 @@ class DHCPv6RPDClient:
             # Serialize it to bytes to ensure all options are properly encoded
             solicit_bytes = bytes(solicit_packet[DHCP6_Solicit])
             
-            # Get the local IPv6 address for the interface using ip command
-            import subprocess
-            local_ipv6 = None
-            try:
-                result = subprocess.run(['ip', '-6', 'addr', 'show', self.interface], 
-                                      capture_output=True, text=True, timeout=2)
-                for line in result.stdout.split('\n'):
-                    if 'inet6' in line and 'scope global' in line:
-                        # Extract the IPv6 address
-                        parts = line.strip().split()
-                        if len(parts) >= 2:
-                            local_ipv6 = parts[1].split('/')[0]
-                            break
-            except:
-                pass
-            
-            # Fallback to link-local if no global address found
-            if not local_ipv6:
-                local_ipv6 = "fe80::250:56ff:fe89:56da"
-                print(f"[WARNING] Could not find global IPv6 address on {self.interface}, using link-local")
-            else:
-                print(f"[INFO] Using local IPv6 address: {local_ipv6}")
+            # Get the local IPv6 address for the interface unless the caller already did
+            local_ipv6 = peer_address or self.get_local_ipv6()
             
             # Create RelayForward message
             relay = DHCP6_RelayForward(
@@ -137,312 +285,4234 @@ class DHCPv6RPDClient:
         
         return packet
     
+    def create_frame(self, relay_address=None, peer_address=None):
+        """Create the Solicit wrapped in the Ethernet header used for sending at L2"""
+        from scapy.layers.l2 import Ether
+        packet = self.create_solicit(relay_address, peer_address)
+        if relay_address:
+            eth = Ether(dst="ff:ff:ff:ff:ff:ff", src=self.client_mac)
+        else:
+            # Multicast MAC for ff02::1:2 is 33:33:00:01:00:02
+            eth = Ether(dst="33:33:00:01:00:02", src=self.client_mac)
+        return eth / packet
+    
     def decode_vendor_options(self, vendor_data):
         """Decode CableLabs vendor-specific options"""
         vendor_opts = {}
-        offset = 0
-        
-        while offset < len(vendor_data):
-            if offset + 4 > len(vendor_data):
-                break
-                
-            opt_code = struct.unpack('!H', vendor_data[offset:offset+2])[0]
-            opt_len = struct.unpack('!H', vendor_data[offset+2:offset+4])[0]
-            opt_data = vendor_data[offset+4:offset+4+opt_len]
-            
-            # CableLabs option codes
-            opt_names = {
-                34: "CCAP-Cores (SUB-OPT 34)",
-                37: "CCAP-Core-Subnet (SUB-OPT 37)", 
-                38: "CCAP-Core-Mask (SUB-OPT 38)",
-                61: "CCAP-Core-Address (SUB-OPT 61)"
-            }
-            
-            opt_name = opt_names.get(opt_code, f"Unknown option {opt_code}")
-            
-            # Try to decode as IPv6 address
-            if opt_len == 16:
-                try:
-                    ipv6_addr = socket.inet_ntop(socket.AF_INET6, opt_data)
-                    vendor_opts[opt_name] = ipv6_addr
-                except:
-                    vendor_opts[opt_name] = opt_data.hex()
+        for opt_code, opt_data in iter_dhcp6_options(memoryview(vendor_data)):
+            opt_name = CABLELABS_SUBOPTION_NAMES.get(opt_code)
+            if opt_name:
+                opt_name = f"{opt_name} (SUB-OPT {opt_code})"
             else:
-                vendor_opts[opt_name] = opt_data.hex()
-            
-            offset += 4 + opt_len
-        
+                opt_name = f"Unknown option {opt_code}"
+            vendor_opts[opt_name] = format_vendor_suboption(opt_data)
         return vendor_opts
     
-    def parse_response(self, packet):
-        """Parse and display DHCPv6 response in detail"""
-        print("\n" + "="*80)
-        print("DHCPv6 RESPONSE RECEIVED")
-        print("="*80)
+    def parse_response(self, packet, show=True):
+        """Decode a DHCPv6 response (scapy packet or raw UDP payload) and optionally print it"""
+        if isinstance(packet, (bytes, bytearray, memoryview)):
+            payload = packet
+            packet = None
+        else:
+            # Scapy packets only come from the capture fallback, so scapy is loaded already
+            from scapy.layers.inet6 import UDP
+            payload = bytes(packet[UDP].payload) if UDP in packet else bytes(packet)
+        result = decode_dhcpv6(payload)
+        if show:
+            print_response(result, packet, payload)
+        return result
+    
+    def send_solicit(self, relay_address=None, timeout=5, transport="udp", local_address=None,
+                     verbosity=1, exchange_log=None):
+        """
+        Send DHCPv6 Solicit and wait for response. verbosity 0 prints nothing (the
+        exchange only goes to exchange_log if one is given), 1 the full report.
+        """
+        verbose = verbosity >= 1
+        if verbose:
+            print("="*80)
+            print("SENDING DHCPv6 SOLICIT")
+            print("="*80)
+            print(f"Interface: {self.interface}")
+            print(f"Client MAC: {self.client_mac}")
+            print(f"Transaction ID: 0x{self.transaction_id:06x}")
+            print(f"Destination: {relay_address or DHCPV6_MULTICAST}")
+            print(f"Mode: {'Relay Forward' if relay_address else 'Direct Multicast'}")
+            print(f"Client Class: RPD")
+            if self.rapid_commit:
+                print(f"Rapid Commit: requested")
         
-        # Show full packet first
-        print("\n[RAW PACKET STRUCTURE]:")
-        packet.show()
+        # The reply is matched by transaction ID and DUID so unrelated DHCPv6
+        # traffic is ignored, and we return as soon as it arrives
+        correlator = ReplyCorrelator()
+        request = correlator.expect(self.transaction_id, self.duid)
+        peer_address = None
+        if relay_address:
+            peer_address = local_address or self.get_local_ipv6(quiet=not verbose)
+        
+        receiver = None
+        if transport == "udp":
+            receiver = UDPTransport(self.interface, correlator, relay_address, peer_address)
+            try:
+                receiver.start()
+                if verbose:
+                    print(f"Transport: UDP socket on port {receiver.port}")
+            except OSError as e:
+                if verbose:
+                    print(f"[WARNING] Cannot bind UDP port {receiver.port} ({e}), falling back to scapy capture")
+                receiver = None
         
-        # Try to find DHCPv6 layer - check for relay-reply wrapper first
-        dhcp6 = None
-        msg_type = "UNKNOWN"
-        
-        if DHCP6_RelayReply in packet:
-            msg_type = "RELAY-REPLY"
-            relay_reply = packet[DHCP6_RelayReply]
-            print(f"\n[MESSAGE TYPE]: {msg_type}")
-            print(f"[HOP COUNT]: {relay_reply.hopcount}")
-            print(f"[LINK ADDRESS]: {relay_reply.linkaddr}")
-            print(f"[PEER ADDRESS]: {relay_reply.peeraddr}")
+        if verbose:
+            print("\nSending packet and waiting for response...")
+        
+        if receiver is not None:
+            template = SolicitTemplate.for_client(self, relay_address, peer_address, with_headers=False,
+                                                  relay_link=self.relay_link, profile=self.profile)
+            message = template.build_message_for(self)
+            try:
+                request.sent_at = time.time()
+                receiver.send([message])
+                if verbose:
+                    print(f"Waiting up to {timeout:g} seconds for response...")
+                correlator.wait(request, timeout)
+            finally:
+                receiver.stop()
+        else:
+            frame = self.create_frame(relay_address, peer_address)
             
-            # Extract the encapsulated message from option 9
-            if DHCP6OptRelayMsg in relay_reply:
-                # Navigate through the layers to find the ADVERTISE
-                # The structure is: RelayReply -> OptRelayMsg -> ADVERTISE
-                current = relay_reply[DHCP6OptRelayMsg]
+            # Start the sniffer first and only send once its socket is open
+            capture = ScapyCapture(self.interface, correlator)
+            if verbose:
+                print(f"Starting sniffer on {self.interface}...")
+            capture.start()
+            try:
+                if verbose:
+                    print("Sniffer ready, sending packet...")
+                request.sent_at = time.time()
+                from scapy.all import sendp
+                sendp(frame, iface=self.interface, verbose=0)
                 
-                # Look for DHCP6_Advertise in the layers
-                while current:
-                    if DHCP6_Advertise in current:
-                        dhcp6 = current[DHCP6_Advertise]
-                        msg_type = "ADVERTISE (in RELAY-REPLY)"
-                        break
-                    # Try to get the next payload
-                    if hasattr(current, 'payload') and current.payload:
-                        current = current.payload
+                if verbose:
+                    print(f"Waiting up to {timeout:g} seconds for response...")
+                correlator.wait(request, timeout)
+            finally:
+                capture.stop()
+        
+        request.transmissions = 1
+        if exchange_log is not None:
+            exchange_log.write(request, MSG_SOLICIT, self.client_mac, relay_address, self.relay_link)
+        
+        if request.result is not None:
+            if verbose:
+                print(f"Got matching response after {format_ms(request.latency)}")
+                self.parse_response(request.packet)
+                if self.rapid_commit:
+                    if request.result.msg_type == MSG_REPLY and request.result.rapid_commit:
+                        print("\n✓ Lease committed with Rapid Commit (2-message exchange)")
                     else:
-                        break
-        elif DHCP6_Advertise in packet:
-            msg_type = "ADVERTISE"
-            dhcp6 = packet[DHCP6_Advertise]
-        elif DHCP6_Reply in packet:
-            msg_type = "REPLY"
-            dhcp6 = packet[DHCP6_Reply]
-        
-        if not dhcp6:
-            print(f"\n[WARNING] Could not extract DHCPv6 message")
-            print("\n[FULL PACKET HEX DUMP]:")
-            hexdump(packet)
-            print("="*80)
-            return
+                        print("\n[INFO] Server declined Rapid Commit and sent "
+                              f"{request.result.msg_name}, a Request is needed to commit")
+            return request.packet
+        else:
+            if verbose:
+                print("\n[TIMEOUT] No response received from server")
+            return None
+
+def dhcp6_option(code, data):
+    """Encode a single DHCPv6 option (code, length, data)"""
+    return struct.pack('!HH', code, len(data)) + data
+
+
+# Classification options of create_solicit(): User Class "RPD", CableLabs sub-option 2
+# "RPD" (what Kea's RPD class matches on) and ORO 23/24/17
+RPD_CLASS_OPTIONS = (
+    dhcp6_option(OPTION_USER_CLASS, struct.pack('!H', 3) + b'RPD') +
+    dhcp6_option(OPTION_VENDOR_OPTS, struct.pack('!IHH', CABLELABS_VENDOR_ID, 2, 3) + b'RPD') +
+    dhcp6_option(OPTION_ORO, struct.pack('!HHH', 23, 24, 17))
+)
+
+
+def iter_dhcp6_options(data, offset=0):
+    """Yield (code, data) for each option in an encoded DHCPv6 options field"""
+    while offset + 4 <= len(data):
+        code, length = struct.unpack_from('!HH', data, offset)
+        yield code, data[offset + 4:offset + 4 + length]
+        offset += 4 + length
+
+
+def udp6_checksum(src, dst, udp):
+    """Compute the UDP checksum over the IPv6 pseudo-header (src/dst are 16-byte addresses)"""
+    data = src + dst + struct.pack('!II', len(udp), 17) + udp
+    if len(data) % 2:
+        data += b'\x00'
+    # The one's complement sum of 16-bit words equals the big integer modulo 0xFFFF,
+    # which lets int.from_bytes do the word loop in C
+    value = int.from_bytes(data, 'big')
+    total = value % 0xFFFF
+    if total == 0 and value:
+        total = 0xFFFF
+    checksum = ~total & 0xFFFF
+    return checksum or 0xFFFF
+
+
+class SolicitTemplate:
+    """
+    Pre-encoded RPD Solicit (optionally inside a Relay-Forward) with Ethernet/IPv6/UDP
+    headers. The packet is encoded once into a preallocated buffer; per packet only the
+    transaction ID, DUID/MAC, IAID and addresses are patched in place. Output is
+    byte-identical to DHCPv6RPDClient.create_frame(); a ClientProfile replaces the RPD
+    classification options.
+    """
+    
+    def __init__(self, relay_address=None, peer_address=None, interface_id=b'',
+                 source_address=None, iaid=0x12345678, rapid_commit=False, relay_port=False,
+                 link_address=None, profile=None):
+        self.relay = relay_address is not None
         
-        print(f"\n[MESSAGE TYPE]: {msg_type}")
-        print(f"[TRANSACTION ID]: 0x{dhcp6.trid:06x}")
+        # Client message (same option order and values as create_solicit)
+        solicit = bytearray(struct.pack('!I', MSG_SOLICIT << 24))
+        duid_offset = len(solicit) + 4
+        solicit += dhcp6_option(OPTION_CLIENTID, struct.pack('!HHI', 1, 1, 0) + bytes(6))
+        solicit += dhcp6_option(OPTION_ELAPSED_TIME, struct.pack('!H', 0))
+        iaid_offset = len(solicit) + 4
+        solicit += dhcp6_option(OPTION_IA_NA, struct.pack('!III', iaid, 1000, 2000))
+        solicit += profile.class_options if profile is not None else RPD_CLASS_OPTIONS
+        if rapid_commit:
+            solicit += dhcp6_option(OPTION_RAPID_COMMIT, b'')
         
-        # Parse options - iterate through layers instead of .options
-        print("\n[OPTIONS]:")
-        current_layer = dhcp6.payload if hasattr(dhcp6, 'payload') else None
-        while current_layer:
-            print(f"\n  Layer: {current_layer.__class__.__name__}")
-            
-            if isinstance(current_layer, DHCP6OptServerId):
-                print(f"    Server DUID: {current_layer.duid}")
-                
-            elif isinstance(current_layer, DHCP6OptClientId):
-                print(f"    Client DUID: {current_layer.duid}")
-                
-            elif isinstance(current_layer, DHCP6OptIA_NA):
-                print(f"    IAID: 0x{current_layer.iaid:08x}")
-                print(f"    T1: {current_layer.T1}s")
-                print(f"    T2: {current_layer.T2}s")
-                
-                # Look for IA Address
-                ia_sub = current_layer.payload if hasattr(current_layer, 'payload') else None
-                while ia_sub:
-                    if isinstance(ia_sub, DHCP6OptIAAddress):
-                        print(f"\n    ✓ ASSIGNED IPv6 ADDRESS: {ia_sub.addr}")
-                        print(f"      Preferred lifetime: {ia_sub.preflft}s")
-                        print(f"      Valid lifetime: {ia_sub.validlft}s")
-                    ia_sub = ia_sub.payload if hasattr(ia_sub, 'payload') else None
-            
-            elif isinstance(current_layer, DHCP6OptVendorSpecificInfo):
-                print(f"    Enterprise Number: {current_layer.enterprisenum}")
-                if current_layer.enterprisenum == CABLELABS_VENDOR_ID:
-                    print(f"    Vendor: CableLabs (4491)")
-                
-                vso_data = current_layer.vso
-                if isinstance(vso_data, list):
-                    # Parse list of vendor-specific option objects
-                    print(f"    Vendor-Specific Options ({len(vso_data)} options):")
-                    
-                    opt_names = {
-                        34: "CCAP-Cores",
-                        37: "CCAP-Core-Subnet", 
-                        38: "CCAP-Core-Mask",
-                        61: "CCAP-Core-Address"
-                    }
-                    
-                    for opt in vso_data:
-                        opt_code = opt.optcode
-                        opt_data = opt.optdata
-                        opt_name = opt_names.get(opt_code, f"OPTION_{opt_code}")
-                        
-                        print(f"\n      {opt_name} ({len(opt_data)} bytes):")
-                        
-                        # Parse based on length
-                        if len(opt_data) == 16:
-                            # Single IPv6 address
-                            try:
-                                ipv6_addr = socket.inet_ntop(socket.AF_INET6, opt_data)
-                                print(f"        {ipv6_addr}")
-                            except:
-                                print(f"        {opt_data.hex()}")
-                        elif len(opt_data) == 32:
-                            # Two IPv6 addresses
-                            try:
-                                ipv6_addr1 = socket.inet_ntop(socket.AF_INET6, opt_data[0:16])
-                                ipv6_addr2 = socket.inet_ntop(socket.AF_INET6, opt_data[16:32])
-                                print(f"        {ipv6_addr1}")
-                                print(f"        {ipv6_addr2}")
-                            except:
-                                print(f"        {opt_data.hex()}")
-                        elif len(opt_data) == 4:
-                            # Likely a 32-bit number
-                            value = struct.unpack('!I', opt_data)[0]
-                            print(f"        {value} (0x{opt_data.hex()})")
-                        else:
-                            print(f"        {opt_data.hex()}")
-                
-                elif vso_data:
-                    print(f"    Vendor-Specific Data ({len(vso_data)} bytes): {vso_data.hex()}")
-                    
-                    # Try to decode structured options
-                    vendor_opts = self.decode_vendor_options(vso_data)
-                    if vendor_opts:
-                        for opt_name, opt_value in vendor_opts.items():
-                            print(f"      {opt_name}: {opt_value}")
-                else:
-                    print(f"    Vendor-Specific Data: None")
-            
-            # Move to next layer
-            current_layer = current_layer.payload if hasattr(current_layer, 'payload') else None
+        if self.relay:
+            message = bytearray(struct.pack('!BB', MSG_RELAY_FORW, 0))
+            message += socket.inet_pton(socket.AF_INET6, link_address or relay_address)
+            message += socket.inet_pton(socket.AF_INET6, peer_address)
+            message += dhcp6_option(OPTION_INTERFACE_ID, interface_id)
+            if relay_port:
+                message += dhcp6_option(OPTION_RELAY_PORT, struct.pack('!H', 0))
+            message += struct.pack('!HH', OPTION_RELAY_MSG, len(solicit))
+            solicit_offset = len(message)
+            message += solicit
+            src = peer_address
+            dst = relay_address
+            eth_dst = b'\xff' * 6
+        else:
+            message = solicit
+            solicit_offset = 0
+            src = source_address or "::"
+            dst = DHCPV6_MULTICAST
+            eth_dst = bytes.fromhex('333300010002')
         
-        print("\n" + "="*80)
+        udp_length = 8 + len(message)
+        headers = eth_dst + bytes(6) + struct.pack('!H', 0x86DD)
+        headers += struct.pack('!IHBB', 6 << 28, udp_length, 17, 64)
+        headers += socket.inet_pton(socket.AF_INET6, src)
+        headers += socket.inet_pton(socket.AF_INET6, dst)
+        headers += struct.pack('!HHHH', DHCPV6_CLIENT_PORT, DHCPV6_SERVER_PORT, udp_length, 0)
         
-        # Show full packet hex dump
-        print("\n[FULL PACKET HEX DUMP]:")
-        hexdump(packet)
-        print("="*80)
+        self.buffer = bytearray(headers) + message
+        self.view = memoryview(self.buffer)
+        
+        # Offsets of the patchable fields within the frame
+        self.udp_offset = 14 + 40
+        self.payload_offset = self.udp_offset + 8
+        base = self.payload_offset + solicit_offset
+        self.trid_offset = base
+        self.duid_time_offset = base + duid_offset + 4
+        self.duid_mac_offset = base + duid_offset + 8
+        self.iaid_offset = base + iaid_offset
+        self.src_offset = 14 + 8
+        self.dst_offset = 14 + 24
+        self.link_offset = self.payload_offset + 2
+        self.peer_offset = self.payload_offset + 18
     
-    def send_solicit(self, relay_address=None, timeout=5):
-        """Send DHCPv6 Solicit and wait for response"""
+    def patch(self, trid, mac_bytes, duid_time, iaid=None, relay_address=None, peer_address=None):
+        """Patch per-RPD fields into the buffer and return a view of the full frame"""
+        buffer = self.buffer
+        
+        # Transaction ID is 24 bits following the message type
+        struct.pack_into('!I', buffer, self.trid_offset, (MSG_SOLICIT << 24) | trid)
+        buffer[6:12] = mac_bytes
+        struct.pack_into('!I', buffer, self.duid_time_offset, duid_time)
+        buffer[self.duid_mac_offset:self.duid_mac_offset + 6] = mac_bytes
+        if iaid is not None:
+            struct.pack_into('!I', buffer, self.iaid_offset, iaid)
         
-        packet = self.create_solicit(relay_address)
+        if self.relay:
+            if relay_address is not None:
+                buffer[self.link_offset:self.link_offset + 16] = relay_address
+                buffer[self.dst_offset:self.dst_offset + 16] = relay_address
+            if peer_address is not None:
+                buffer[self.peer_offset:self.peer_offset + 16] = peer_address
+                buffer[self.src_offset:self.src_offset + 16] = peer_address
         
+        udp = self.view[self.udp_offset:]
+        struct.pack_into('!H', buffer, self.udp_offset + 6, 0)
+        checksum = udp6_checksum(
+            bytes(self.view[self.src_offset:self.src_offset + 16]),
+            bytes(self.view[self.dst_offset:self.dst_offset + 16]),
+            bytes(udp)
+        )
+        struct.pack_into('!H', buffer, self.udp_offset + 6, checksum)
+        return self.view
+    
+    def build_frame(self, *args, **kwargs):
+        """Return a copy of the patched Ethernet frame"""
+        return bytes(self.patch(*args, **kwargs))
+    
+    def build_message(self, *args, **kwargs):
+        """Return a copy of the patched DHCPv6 message (UDP payload only)"""
+        return bytes(self.patch(*args, **kwargs)[self.payload_offset:])
+    
+    @classmethod
+    def for_client(cls, client, relay_address=None, peer_address=None, with_headers=True,
+                   relay_port=False, relay_link=None, profile=None):
+        """Create a template matching what create_frame() builds for this client"""
+        source_address = None
+        if not relay_address and with_headers:
+            # Direct mode uses whatever source address scapy routes the multicast from
+            from scapy.layers.inet6 import IPv6
+            source_address = client.create_solicit()[IPv6].src
+        return cls(
+            relay_address=relay_address,
+            peer_address=peer_address,
+            interface_id=relay_link.interface_id if relay_link else client.interface.encode(),
+            source_address=source_address,
+            rapid_commit=client.rapid_commit,
+            relay_port=relay_port,
+            link_address=relay_link.link_address if relay_link else None,
+            profile=profile
+        )
+    
+    def build_for(self, client):
+        """Build the frame for one simulated RPD client"""
+        mac_bytes = bytes.fromhex(client.client_mac.replace(':', ''))
+        return self.build_frame(client.transaction_id, mac_bytes, client.duid_time)
+    
+    def build_message_for(self, client):
+        """Build the DHCPv6 message (UDP payload) for one simulated RPD client"""
+        mac_bytes = bytes.fromhex(client.client_mac.replace(':', ''))
+        return self.build_message(client.transaction_id, mac_bytes, client.duid_time)
+
+
+class DHCPv6Response:
+    """Compact decoded DHCPv6 message: the innermost client message plus its relay path"""
+    
+    __slots__ = ('msg_type', 'trid', 'relays', 'client_duid', 'server_duid', 'iaid', 't1', 't2',
+                 'address', 'preferred_lifetime', 'valid_lifetime', 'status_code',
+                 'status_message', 'rapid_commit', 'vendor_options')
+    
+    def __init__(self):
+        self.msg_type = None
+        self.trid = None
+        self.relays = []  # (hop count, link address, peer address, interface-id), outermost first
+        self.client_duid = None
+        self.server_duid = None
+        self.iaid = None
+        self.t1 = None
+        self.t2 = None
+        self.address = None
+        self.preferred_lifetime = None
+        self.valid_lifetime = None
+        self.status_code = None
+        self.status_message = None
+        self.rapid_commit = False
+        self.vendor_options = {}  # CableLabs (4491) sub-option code -> raw bytes
+    
+    @property
+    def msg_name(self):
+        return MESSAGE_TYPES.get(self.msg_type, f"TYPE-{self.msg_type}")
+    
+    @property
+    def link_address(self):
+        """Link address of the innermost relay (the one Kea selects the subnet from)"""
+        if not self.relays:
+            return None
+        return socket.inet_ntop(socket.AF_INET6, self.relays[-1][1])
+    
+    def ccap_options(self):
+        """Return the CCAP-Core sub-options (34/37/38/61) present, formatted by name"""
+        return {
+            CABLELABS_SUBOPTION_NAMES[code]: format_vendor_suboption(data)
+            for code, data in self.vendor_options.items()
+            if code in CABLELABS_SUBOPTION_NAMES
+        }
+
+
+def format_vendor_suboption(data):
+    """Format a vendor sub-option value: IPv6 address(es), 32-bit number or hex"""
+    if len(data) and len(data) % 16 == 0:
+        addresses = [socket.inet_ntop(socket.AF_INET6, bytes(data[i:i + 16]))
+                     for i in range(0, len(data), 16)]
+        return addresses[0] if len(addresses) == 1 else addresses
+    if len(data) == 4:
+        return struct.unpack('!I', data)[0]
+    return bytes(data).hex()
+
+
+def _decode_ia_na(result, value):
+    """Fill IA_NA fields (IAID, T1/T2, first IA Address) from an IA_NA option value"""
+    if len(value) < 12:
+        return
+    result.iaid, result.t1, result.t2 = struct.unpack_from('!III', value)
+    for code, sub in iter_dhcp6_options(value, 12):
+        if code == OPTION_IAADDR and len(sub) >= 24 and result.address is None:
+            result.address = socket.inet_ntop(socket.AF_INET6, bytes(sub[:16]))
+            result.preferred_lifetime, result.valid_lifetime = struct.unpack_from('!II', sub, 16)
+        elif code == OPTION_STATUS_CODE and len(sub) >= 2:
+            result.status_code = struct.unpack_from('!H', sub)[0]
+            result.status_message = bytes(sub[2:]).decode('utf-8', 'replace')
+
+
+def decode_dhcpv6(data):
+    """
+    Decode a raw DHCPv6 UDP payload without scapy. Any number of Relay-Forward/Reply
+    levels are unwrapped; fields are read from a memoryview and only the values kept
+    in the result are copied. Returns a DHCPv6Response, or None if the data is truncated.
+    """
+    view = memoryview(data)
+    result = DHCPv6Response()
+    
+    while True:
+        if len(view) < 4:
+            return None
+        msg_type = view[0]
+        if msg_type != MSG_RELAY_FORW and msg_type != MSG_RELAY_REPL:
+            break
+        if len(view) < 34:
+            return None
+        inner = None
+        interface_id = None
+        for code, value in iter_dhcp6_options(view, 34):
+            if code == OPTION_RELAY_MSG:
+                inner = value
+            elif code == OPTION_INTERFACE_ID:
+                interface_id = bytes(value)
+        result.relays.append((view[1], bytes(view[2:18]), bytes(view[18:34]), interface_id))
+        if inner is None:
+            result.msg_type = msg_type
+            return result
+        view = inner
+    
+    result.msg_type = msg_type
+    result.trid = (view[1] << 16) | (view[2] << 8) | view[3]
+    
+    for code, value in iter_dhcp6_options(view, 4):
+        if code == OPTION_IA_NA:
+            _decode_ia_na(result, value)
+        elif code == OPTION_VENDOR_OPTS:
+            if len(value) >= 4 and struct.unpack_from('!I', value)[0] == CABLELABS_VENDOR_ID:
+                for sub_code, sub_value in iter_dhcp6_options(value, 4):
+                    result.vendor_options[sub_code] = bytes(sub_value)
+        elif code == OPTION_CLIENTID:
+            result.client_duid = bytes(value)
+        elif code == OPTION_SERVERID:
+            result.server_duid = bytes(value)
+        elif code == OPTION_STATUS_CODE and len(value) >= 2:
+            result.status_code = struct.unpack_from('!H', value)[0]
+            result.status_message = bytes(value[2:]).decode('utf-8', 'replace')
+        elif code == OPTION_RAPID_COMMIT:
+            result.rapid_commit = True
+    
+    return result
+
+
+def print_response(result, packet=None, raw=None):
+    """Print a decoded DHCPv6 response in detail (scapy structure and hex dump if given)"""
+    print("\n" + "="*80)
+    print("DHCPv6 RESPONSE RECEIVED")
+    print("="*80)
+    
+    if packet is not None:
+        print("\n[RAW PACKET STRUCTURE]:")
+        packet.show()
+    
+    if result is None:
+        print(f"\n[WARNING] Could not extract DHCPv6 message")
+        if packet is not None or raw is not None:
+            print("\n[FULL PACKET HEX DUMP]:")
+            _print_packet_hexdump(packet, raw)
         print("="*80)
-        print("SENDING DHCPv6 SOLICIT")
+        return
+    
+    for depth, (hopcount, linkaddr, peeraddr, interface_id) in enumerate(result.relays):
+        print(f"\n[MESSAGE TYPE]: RELAY-REPLY (level {depth + 1})")
+        print(f"[HOP COUNT]: {hopcount}")
+        print(f"[LINK ADDRESS]: {socket.inet_ntop(socket.AF_INET6, linkaddr)}")
+        print(f"[PEER ADDRESS]: {socket.inet_ntop(socket.AF_INET6, peeraddr)}")
+        if interface_id is not None:
+            print(f"[INTERFACE-ID]: {interface_id.decode('utf-8', 'replace')}")
+    
+    msg_type = result.msg_name
+    if result.relays:
+        msg_type += " (in RELAY-REPLY)"
+    print(f"\n[MESSAGE TYPE]: {msg_type}")
+    if result.trid is not None:
+        print(f"[TRANSACTION ID]: 0x{result.trid:06x}")
+    
+    print("\n[OPTIONS]:")
+    if result.server_duid:
+        print(f"    Server DUID: {result.server_duid.hex()}")
+    if result.client_duid:
+        print(f"    Client DUID: {result.client_duid.hex()}")
+    if result.status_code:
+        print(f"    Status: {result.status_code} {result.status_message}")
+    if result.rapid_commit:
+        print(f"    Rapid Commit: yes (lease committed)")
+    
+    if result.iaid is not None:
+        print(f"\n  IA_NA")
+        print(f"    IAID: 0x{result.iaid:08x}")
+        print(f"    T1: {result.t1}s")
+        print(f"    T2: {result.t2}s")
+        if result.address:
+            print(f"\n    ✓ ASSIGNED IPv6 ADDRESS: {result.address}")
+            print(f"      Preferred lifetime: {result.preferred_lifetime}s")
+            print(f"      Valid lifetime: {result.valid_lifetime}s")
+    
+    if result.vendor_options:
+        print(f"\n  Vendor-Specific Information")
+        print(f"    Vendor: CableLabs ({CABLELABS_VENDOR_ID})")
+        print(f"    Vendor-Specific Options ({len(result.vendor_options)} options):")
+        for opt_code, opt_data in result.vendor_options.items():
+            opt_name = CABLELABS_SUBOPTION_NAMES.get(opt_code, f"OPTION_{opt_code}")
+            print(f"\n      {opt_name} ({len(opt_data)} bytes):")
+            value = format_vendor_suboption(opt_data)
+            for line in value if isinstance(value, list) else [value]:
+                print(f"        {line}")
+    
+    print("\n" + "="*80)
+    
+    if packet is not None or raw is not None:
+        print("\n[FULL PACKET HEX DUMP]:")
+        _print_packet_hexdump(packet, raw)
         print("="*80)
-        print(f"Interface: {self.interface}")
-        print(f"Client MAC: {self.client_mac}")
-        print(f"Transaction ID: 0x{self.transaction_id:06x}")
-        print(f"Destination: {relay_address or DHCPV6_MULTICAST}")
-        print(f"Mode: {'Relay Forward' if relay_address else 'Direct Multicast'}")
-        print(f"Client Class: RPD")
+
+
+def _print_packet_hexdump(packet, raw):
+    """Hex dump a scapy packet with scapy's hexdump(), raw bytes without loading scapy"""
+    if packet is not None:
+        from scapy.utils import hexdump
+        hexdump(packet)
+    else:
+        print_hexdump(raw)
+
+
+def exchange_record(request, msg_type, mac, relay_address=None, link=None):
+    """Flatten a finished exchange (PendingRequest) into a flat dict for ExchangeLog"""
+    record = {
+        'ts': round(request.sent_at, 6) if request.sent_at else None,
+        'msg': MESSAGE_TYPES.get(msg_type, msg_type),
+        'mac': mac,
+        'trid': request.trid,
+        'relay': relay_address,
+        'link': link.link_address if link is not None else None,
+        'tx': request.transmissions,
+        'reply': None
+    }
+    result = request.result
+    if result is not None:
+        record.update({
+            'reply': result.msg_name,
+            'rx': round(request.received_at, 6),
+            'latency_ms': round(request.latency * 1000, 3),
+            'address': result.address,
+            'preferred_lifetime': result.preferred_lifetime,
+            'valid_lifetime': result.valid_lifetime,
+            'status': result.status_code,
+            'rapid_commit': result.rapid_commit,
+            'vendor_4491': {str(code): format_vendor_suboption(data)
+                            for code, data in result.vendor_options.items()}
+        })
+    return record
+
+
+def format_exchange_line(record):
+    """One human-readable line for an exchange record (-v output)"""
+    line = f"{record['msg']:<8} {record['mac']} trid=0x{record['trid']:06x}"
+    if record['link']:
+        line += f" link={record['link']}"
+    if record['reply'] is None:
+        return line + f" -> timeout after {record['tx']} transmission(s)"
+    line += f" -> {record['reply']} {format_ms(record['latency_ms'] / 1000)}"
+    if record['address']:
+        line += f" {record['address']}"
+    if record['status']:
+        line += f" status={record['status']}"
+    return line
+
+
+class ExchangeLog:
+    """
+    Sink for one record per finished exchange: compact JSON lines for log pipelines
+    (fmt 'jsonl') or one human-readable line each (fmt 'text'). JSON lines are written
+    with os.write() in whole-line chunks of at most PIPE_BUF bytes, so --workers
+    processes sharing stdout or an append-mode file never interleave inside a record.
+    The file is opened on the first flush, so an unused sink can be handed to workers.
+    """
+    
+    CHUNK_SIZE = 4096  # PIPE_BUF on Linux
+    
+    def __init__(self, path='-', fmt='jsonl'):
+        self.path = path
+        self.fmt = fmt
+        self.records = 0
+        self.fd = None
+        self._pending = []
+        self._pending_size = 0
+    
+    def write(self, request, msg_type, mac, relay_address=None, link=None):
+        record = exchange_record(request, msg_type, mac, relay_address, link)
+        self.records += 1
+        if self.fmt == 'text':
+            print(format_exchange_line(record))
+            return
+        line = json.dumps(record, separators=(',', ':')).encode() + b'\n'
+        if self._pending_size + len(line) > self.CHUNK_SIZE:
+            self.flush()
+        self._pending.append(line)
+        self._pending_size += len(line)
+    
+    def flush(self):
+        if not self._pending:
+            return
+        if self.fd is None:
+            if self.path == '-':
+                # The real stdout even while human-readable output is sent to stderr
+                self.fd = sys.__stdout__.fileno()
+            else:
+                self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        data = b''.join(self._pending)
+        self._pending.clear()
+        self._pending_size = 0
+        while data:
+            data = data[os.write(self.fd, data):]
+    
+    def close(self):
+        self.flush()
+        if self.fd is not None and self.path != '-':
+            os.close(self.fd)
+        self.fd = None
+
+
+def benchmark_decoder(count=20000):
+    """Compare replies/s of the struct decoder and scapy dissection on a relayed Advertise"""
+    from scapy.layers.dhcp6 import DHCP6_RelayReply
+    responder = DHCPv6Responder()
+    client = DHCPv6RPDClient("lo", "02:00:00:00:00:01", transaction_id=0x123456)
+    template = SolicitTemplate(relay_address="2001:db8::1", peer_address="fe80::1",
+                               interface_id=b"eth0")
+    request = template.build_message(client.transaction_id, bytes.fromhex("020000000001"),
+                                     client.duid_time)
+    reply = responder.handle(request)
+    
+    start = time.perf_counter()
+    for _ in range(count):
+        decode_dhcpv6(reply)
+    decoder_time = time.perf_counter() - start
+    
+    scapy_count = max(1, count // 20)
+    start = time.perf_counter()
+    for _ in range(scapy_count):
+        DHCP6_RelayReply(reply)
+    scapy_time = time.perf_counter() - start
+    
+    decoder_rate = count / decoder_time
+    scapy_rate = scapy_count / scapy_time
+    print("="*80)
+    print("RESPONSE DECODER BENCHMARK")
+    print("="*80)
+    print(f"Message:            Relay-Reply/Advertise, {len(reply)} bytes")
+    print(f"scapy dissection:   {scapy_rate:>10.0f} replies/s")
+    print(f"struct decoder:     {decoder_rate:>10.0f} replies/s ({decoder_rate / scapy_rate:.1f}x)")
+    print("="*80)
+
+
+def build_client_message(msg_type, trid, duid, iaid=0x12345678, server_duid=None, address=None,
+                         preferred_lifetime=0, valid_lifetime=0, elapsed=0, rapid_commit=False,
+                         profile=None):
+    """
+    Encode a client message with the RPD option set of create_solicit(), or with the
+    classification options of a ClientProfile. Request, Renew and Release carry the
+    Server Identifier; Request/Renew/Rebind/Release/Decline carry the bound address in
+    the IA_NA. Release and Decline omit the class and ORO options, as RFC 8415 allows
+    only identifiers and IAs there. A Solicit with rapid_commit carries the Rapid
+    Commit option.
+    """
+    body = dhcp6_option(OPTION_CLIENTID, duid)
+    if server_duid is not None:
+        body += dhcp6_option(OPTION_SERVERID, server_duid)
+    body += dhcp6_option(OPTION_ELAPSED_TIME, struct.pack('!H', elapsed))
+    
+    ia_na = struct.pack('!III', iaid, 1000, 2000) if msg_type == MSG_SOLICIT or msg_type == MSG_REQUEST \
+        else struct.pack('!III', iaid, 0, 0)
+    if address is not None:
+        ia_na += dhcp6_option(OPTION_IAADDR, socket.inet_pton(socket.AF_INET6, address) +
+                              struct.pack('!II', preferred_lifetime, valid_lifetime))
+    body += dhcp6_option(OPTION_IA_NA, ia_na)
+    
+    if msg_type != MSG_RELEASE and msg_type != MSG_DECLINE:
+        body += profile.class_options if profile is not None else RPD_CLASS_OPTIONS
+    if rapid_commit and msg_type == MSG_SOLICIT:
+        body += dhcp6_option(OPTION_RAPID_COMMIT, b'')
+    
+    return struct.pack('!I', (msg_type << 24) | trid) + body
+
+
+def relay_forward(message, link_address, peer_address, interface_id=b'', hop_count=0,
+                  relay_port=False):
+    """
+    Wrap a client message in a Relay-Forward (addresses as 16-byte packed values). A relay
+    that does not send from port 547 adds the Relay Source Port option (RFC 8357) so the
+    server answers the port it sent from.
+    """
+    forward = struct.pack('!BB', MSG_RELAY_FORW, hop_count) + link_address + peer_address + \
+        dhcp6_option(OPTION_INTERFACE_ID, interface_id)
+    if relay_port:
+        forward += dhcp6_option(OPTION_RELAY_PORT, struct.pack('!H', 0))
+    return forward + dhcp6_option(OPTION_RELAY_MSG, message)
+
+
+def mac_for_index(base_mac, index):
+    """Derive the MAC address of the index-th simulated RPD from a base MAC"""
+    value = (int(base_mac.replace(':', ''), 16) + index) & 0xFFFFFFFFFFFF
+    return ':'.join(f'{b:02x}' for b in value.to_bytes(6, 'big'))
+
+
+class RelayLink:
+    """
+    One emulated relay interface (a CIN switch/BVI) that simulated RPDs sit behind:
+    the link address and Interface-ID Kea selects the subnet from, optionally the
+    subnet it is expected to pick, and counters of the Solicits sent through it
+    """
+    
+    __slots__ = ('index', 'link_address', 'interface_id', 'subnet', 'sent', 'answered',
+                 'wrong_subnet', 'histogram')
+    
+    def __init__(self, index, link_address, interface_id=b'', subnet=None):
+        self.index = index
+        self.link_address = link_address
+        self.interface_id = interface_id
+        self.subnet = ipaddress.IPv6Network(subnet, strict=False) if subnet else None
+        self.sent = 0
+        self.answered = 0
+        self.wrong_subnet = 0
+        self.histogram = LatencyHistogram()
+    
+    @property
+    def packed_link(self):
+        return socket.inet_pton(socket.AF_INET6, self.link_address)
+    
+    def record(self, request):
+        """Count the reply to a Solicit sent through this link"""
+        self.answered += 1
+        self.histogram.record(request.latency)
+        address = request.result.address
+        if self.subnet is not None and address is not None and \
+                ipaddress.IPv6Address(address) not in self.subnet:
+            self.wrong_subnet += 1
+    
+    def merge(self, other):
+        self.sent += other.sent
+        self.answered += other.answered
+        self.wrong_subnet += other.wrong_subnet
+        self.histogram.merge(other.histogram)
+    
+    def summary(self):
+        stats = self.histogram.summary()
+        stats.update({
+            'link_address': self.link_address,
+            'interface_id': self.interface_id.decode('utf-8', 'replace'),
+            'subnet': str(self.subnet) if self.subnet else None,
+            'sent': self.sent,
+            'answered': self.answered,
+            'unanswered': self.sent - self.answered,
+            'wrong_subnet': self.wrong_subnet
+        })
+        return stats
+
+
+def load_relay_table(path):
+    """
+    Read the relay links to emulate from a CSV file (header row with link_address and
+    optionally interface_id and subnet) or a JSON list of objects with the same keys,
+    e.g. an export of the BVI/IPv6 subnet tables. Returns a list of RelayLink.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.json'):
+            rows = json.load(f)
+        else:
+            rows = list(csv.DictReader(line for line in f if line.strip() and not line.startswith('#')))
+    
+    links = []
+    for row in rows:
+        link_address = (row.get('link_address') or '').strip()
+        if not link_address:
+            continue
+        # Validate early so a typo fails before any packet is sent
+        ipaddress.IPv6Address(link_address)
+        links.append(RelayLink(
+            index=len(links),
+            link_address=link_address,
+            interface_id=(row.get('interface_id') or '').strip().encode(),
+            subnet=(row.get('subnet') or '').strip() or None
+        ))
+    if not links:
+        raise ValueError(f"No relay links (link_address column) found in {path}")
+    return links
+
+
+def _profile_value(value):
+    """Encode a profile option value: '0x...' is hex, anything else UTF-8 text"""
+    value = str(value)
+    if value.startswith('0x'):
+        return bytes.fromhex(value[2:])
+    return value.encode()
+
+
+class ClientProfile:
+    """
+    One client population in a weighted load mix (RPDs, cable modems, unknown vendors):
+    the options its Solicits carry for Kea's client classification (User Class, Vendor
+    Class, vendor-specific sub-options, ORO and any extra options) and counters of
+    the Solicits sent with it
+    """
+    
+    __slots__ = ('name', 'weight', 'class_options', 'sent', 'answered', 'no_address', 'histogram')
+    
+    def __init__(self, name, weight=1, user_class=None, vendor_class=None, vendor_options=None,
+                 enterprise=CABLELABS_VENDOR_ID, oro=(), options=None):
+        if weight <= 0:
+            raise ValueError(f"Profile {name!r} needs a positive weight")
+        self.name = name
+        self.weight = weight
         
-        print("\nSending packet and waiting for response...")
+        def opaque_list(items):
+            items = [items] if isinstance(items, str) else items
+            return b''.join(struct.pack('!H', len(data)) + data for data in map(_profile_value, items))
         
-        # For relay mode, send at L2 and sniff
-        if relay_address:
-            # Build L2 packet with Ethernet header
-            eth = Ether(dst="ff:ff:ff:ff:ff:ff", src=self.client_mac)
-            l2_packet = eth / packet
-            
-            # START SNIFFER FIRST!
-            print(f"Starting sniffer on {self.interface}...")
-            from scapy.sendrecv import AsyncSniffer
-            sniffer = AsyncSniffer(
-                iface=self.interface,
-                filter="udp and src port 547",
-                count=1,
-                prn=lambda x: print(f"Captured packet: {x.summary()}")
-            )
-            sniffer.start()
-            
-            # Wait a moment for sniffer to be ready
-            time.sleep(0.5)
-            
-            # NOW send the packet
-            print("Sniffer ready, sending packet...")
-            sendp(l2_packet, iface=self.interface, verbose=0)
-            
-            # Wait for response with timeout
-            print(f"Waiting up to {timeout} seconds for response...")
-            time.sleep(timeout)
-            
-            # Get results - don't call stop() if already stopped
-            if sniffer.running:
-                packets = sniffer.stop()
-            else:
-                packets = sniffer.results
-            
-            if packets:
-                print(f"Got {len(packets)} packet(s)")
-                response = packets[0]
-            else:
-                response = None
+        encoded = b''
+        if user_class:
+            encoded += dhcp6_option(OPTION_USER_CLASS, opaque_list(user_class))
+        if vendor_class:
+            encoded += dhcp6_option(OPTION_VENDOR_CLASS,
+                                    struct.pack('!I', enterprise) + opaque_list(vendor_class))
+        if vendor_options:
+            encoded += dhcp6_option(OPTION_VENDOR_OPTS, struct.pack('!I', enterprise) + b''.join(
+                dhcp6_option(int(code), _profile_value(value)) for code, value in vendor_options.items()
+            ))
+        if oro:
+            encoded += dhcp6_option(OPTION_ORO, struct.pack(f'!{len(oro)}H', *oro))
+        for code, value in (options or {}).items():
+            encoded += dhcp6_option(int(code), _profile_value(value))
+        self.class_options = encoded
+        
+        self.sent = 0
+        self.answered = 0
+        self.no_address = 0
+        self.histogram = LatencyHistogram()
+    
+    def record(self, request):
+        """Count the reply to a Solicit sent with this profile"""
+        self.answered += 1
+        self.histogram.record(request.latency)
+        if request.result.address is None:
+            self.no_address += 1
+    
+    def merge(self, other):
+        self.sent += other.sent
+        self.answered += other.answered
+        self.no_address += other.no_address
+        self.histogram.merge(other.histogram)
+    
+    def summary(self, duration):
+        stats = self.histogram.summary()
+        stats.update({
+            'name': self.name,
+            'weight': self.weight,
+            'sent': self.sent,
+            'answered': self.answered,
+            'unanswered': self.sent - self.answered,
+            'no_address': self.no_address,
+            'per_second': self.answered / duration if duration else 0.0
+        })
+        return stats
+
+
+def load_profiles(path):
+    """
+    Read the client population mix from a JSON file: a list of profiles (or an object
+    with a "profiles" list), each with a name, a weight and its classification options
+    (user_class, vendor_class, enterprise, vendor_options, oro, options). Returns a
+    list of ClientProfile.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    if isinstance(config, dict):
+        config = config.get('profiles', [])
+    profiles = [
+        ClientProfile(
+            name=entry['name'],
+            weight=entry.get('weight', 1),
+            user_class=entry.get('user_class'),
+            vendor_class=entry.get('vendor_class'),
+            vendor_options=entry.get('vendor_options'),
+            enterprise=entry.get('enterprise', CABLELABS_VENDOR_ID),
+            oro=entry.get('oro', ()),
+            options=entry.get('options')
+        )
+        for entry in config
+    ]
+    if not profiles:
+        raise ValueError(f"No client profiles found in {path}")
+    return profiles
+
+
+def profile_for_mac(profiles, mac):
+    """
+    Pick a client's profile by weight from a hash of its MAC, so a MAC always gets
+    the same profile (also across the shards of a --workers run)
+    """
+    point = zlib.crc32(mac.encode()) % sum(profile.weight for profile in profiles)
+    for profile in profiles:
+        point -= profile.weight
+        if point < 0:
+            return profile
+    return profiles[-1]
+
+
+class Reservation:
+    """
+    One expected host reservation: the RPD MAC, the relay link it sits behind (None
+    for the --relay address itself), and the address and CableLabs (4491) sub-option
+    values Kea should hand it (None where the export does not say)
+    """
+    
+    __slots__ = ('mac', 'link', 'address', 'options')
+    
+    def __init__(self, mac, link=None, address=None, options=None):
+        self.mac = mac
+        self.link = link
+        self.address = address
+        self.options = options or {}
+
+
+def normalize_suboption(value):
+    """Canonical tuple of a sub-option value (expected text/list or decoded) for comparison"""
+    if isinstance(value, str):
+        items = [item.strip() for item in value.split(',') if item.strip()]
+    elif isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = [value]
+    normalized = []
+    for item in items:
+        try:
+            normalized.append(str(ipaddress.IPv6Address(str(item).strip())))
+        except ValueError:
+            normalized.append(str(item).strip().lower())
+    return tuple(normalized)
+
+
+def load_reservations(path, interface="eth0"):
+    """
+    Read expected reservations from a CSV file (columns mac, and optionally relay,
+    interface_id, address and opt_<code> per 4491 sub-option, e.g. opt_61) or a JSON
+    list of objects with the same keys. A Kea reservation-get-all response (hosts with
+    hw-address, ip-addresses and vendor-4491 option-data) is accepted as well. Rows of
+    the same relay share one RelayLink. Returns a list of Reservation.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.json'):
+            rows = json.load(f)
         else:
-            # For multicast, we need to use L2 (Ethernet) layer
-            # Build L2 packet with Ethernet header for multicast
-            # Multicast MAC for ff02::1:2 is 33:33:00:01:00:02
-            eth = Ether(dst="33:33:00:01:00:02", src=self.client_mac)
-            l2_packet = eth / packet
-            
-            # Send at L2 and sniff for response
-            sendp(l2_packet, iface=self.interface, verbose=0)
-            
-            # Sniff for DHCPv6 response
-            response = sniff(
-                iface=self.interface,
-                filter="udp port 546",
-                timeout=timeout,
-                count=1
-            )
-            
-            if response:
-                response = response[0]
-            else:
-                response = None
+            rows = list(csv.DictReader(line for line in f if line.strip() and not line.startswith('#')))
+    
+    # Unwrap a Kea control channel response: [{"result": 0, "arguments": {"hosts": [...]}}]
+    if isinstance(rows, list) and rows and 'arguments' in rows[0]:
+        rows = rows[0]
+    if isinstance(rows, dict):
+        rows = rows.get('arguments', rows).get('hosts', [])
+    
+    links = {}
+    reservations = []
+    for row in rows:
+        mac = (row.get('mac') or row.get('hw-address') or '').strip().lower()
+        if not mac:
+            continue
+        digits = mac.replace(':', '').replace('-', '').replace('.', '')
+        if len(digits) != 12 or any(c not in '0123456789abcdef' for c in digits):
+            raise ValueError(f"Invalid MAC address {mac!r} in {path}")
+        mac = ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
         
-        if response:
-            self.parse_response(response)
-            return response
+        address = row.get('address')
+        if not address and row.get('ip-addresses'):
+            address = row['ip-addresses'][0]
+        if address:
+            address = str(ipaddress.IPv6Address(address.strip()))
+        
+        options = {}
+        for key, value in row.items():
+            if key.startswith('opt_') and value not in (None, ''):
+                options[int(key[4:])] = normalize_suboption(value)
+        for option in row.get('option-data') or []:
+            if option.get('space') == f'vendor-{CABLELABS_VENDOR_ID}':
+                options[int(option['code'])] = normalize_suboption(option.get('data', ''))
+        
+        link = None
+        relay = (row.get('relay') or '').strip()
+        if relay:
+            interface_id = (row.get('interface_id') or interface).strip().encode()
+            key = (str(ipaddress.IPv6Address(relay)), interface_id)
+            link = links.get(key)
+            if link is None:
+                link = links[key] = RelayLink(len(links), key[0], interface_id)
+        reservations.append(Reservation(mac, link, address, options))
+    if not reservations:
+        raise ValueError(f"No reservations (mac/hw-address column) found in {path}")
+    return reservations
+
+
+class LatencyHistogram:
+    """Latency histogram with log-scaled buckets (~1% resolution) that can be merged"""
+    
+    GROWTH = 1.01
+    RESOLUTION = 1e-6  # Smallest bucket boundary in seconds
+    
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._log_growth = math.log(self.GROWTH)
+    
+    def record(self, seconds):
+        """Add one latency sample (in seconds)"""
+        if seconds > self.RESOLUTION:
+            index = int(math.log(seconds / self.RESOLUTION) / self._log_growth)
         else:
-            print("\n[TIMEOUT] No response received from server")
+            index = 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def merge(self, other):
+        """Fold another histogram's samples into this one"""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def percentile(self, pct):
+        """Return the latency (seconds) below which pct percent of samples fall"""
+        if not self.count:
             return None
+        rank = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.RESOLUTION * self.GROWTH ** (index + 1), self.max)
+        return self.max
+    
+    def cumulative(self, bounds):
+        """Return the number of samples at or below each bound (ascending, seconds)"""
+        import bisect
+        counts = [0] * (len(bounds) + 1)
+        for index, count in self.buckets.items():
+            value = min(self.RESOLUTION * self.GROWTH ** (index + 1), self.max)
+            counts[bisect.bisect_left(bounds, value)] += count
+        for position in range(1, len(counts)):
+            counts[position] += counts[position - 1]
+        return counts[:len(bounds)]
+    
+    def summary(self):
+        """Return mean/p50/p95/p99/max latency in seconds"""
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max if self.count else None
+        }
 
 
-def main():
-    import argparse
-    
-    parser = argparse.ArgumentParser(
-        description='DHCPv6 RPD Client Simulator - Simulate RPD device requesting DHCPv6 configuration'
-    )
-    parser.add_argument('-i', '--interface', default='eth0',
-                      help='Network interface to use (default: eth0)')
-    parser.add_argument('-r', '--relay', 
-                      help='Relay agent IPv6 address (optional, uses multicast if not specified)')
-    parser.add_argument('-m', '--mac',
-                      help='Client MAC address (optional, uses interface MAC if not specified)')
-    parser.add_argument('-t', '--timeout', type=int, default=5,
-                      help='Response timeout in seconds (default: 5)')
+def format_ms(seconds):
+    """Format a latency in seconds as milliseconds for reports"""
+    if seconds is None:
+        return "n/a"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def format_clock(timestamp):
+    """Format a Unix timestamp as local wall-clock time with milliseconds"""
+    if timestamp is None:
+        return "-"
+    return time.strftime('%H:%M:%S', time.localtime(timestamp)) + f".{int(timestamp * 1000) % 1000:03d}"
+
+
+class PendingRequest:
+    """An outstanding request waiting for the reply with its transaction ID"""
     
-    args = parser.parse_args()
+    __slots__ = ('trid', 'duid', 'context', 'sent_at', 'received_at', 'result', 'packet', 'event',
+                 'transmissions')
     
-    print("\n" + "="*80)
-    print("DHCPv6 RPD CLIENT SIMULATOR")
-    print("="*80 + "\n")
+    def __init__(self, trid, duid=None, context=None):
+        self.trid = trid
+        self.duid = duid
+        self.context = context
+        self.sent_at = None
+        self.received_at = None
+        self.result = None
+        self.packet = None
+        self.event = threading.Event()
+        self.transmissions = 0
+    
+    @property
+    def latency(self):
+        if self.received_at is None or self.sent_at is None:
+            return None
+        return self.received_at - self.sent_at
+
+
+class ReplyCorrelator:
+    """
+    Match DHCPv6 replies to outstanding requests by (transaction ID, client DUID), so
+    different clients can have the same trid in flight. A reply without a Client ID
+    goes to the oldest request with its trid. Waiters are woken as soon as their reply
+    arrives, so any number of requests can be in flight and a probe takes as long as
+    the server does, not the timeout.
+    """
+    
+    def __init__(self, on_reply=None):
+        self.pending = {}  # (trid, duid) -> PendingRequest
+        self.trids = {}    # trid -> outstanding PendingRequests, oldest first
+        self.on_reply = on_reply
+        self.stray = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+    
+    def expect(self, trid, duid=None, context=None):
+        """
+        Register a request before sending it; set .sent_at when it goes out. Raises
+        ValueError if the same client already has this trid outstanding.
+        """
+        request = PendingRequest(trid, duid, context)
+        with self._lock:
+            if (trid, duid) in self.pending:
+                raise ValueError(f"transaction ID {trid:#08x} is already outstanding for this client")
+            self.pending[(trid, duid)] = request
+            self.trids.setdefault(trid, []).append(request)
+        return request
+    
+    def _remove(self, request):
+        """Drop a request from the indexes; caller holds the lock"""
+        del self.pending[(request.trid, request.duid)]
+        requests = self.trids[request.trid]
+        requests.remove(request)
+        if not requests:
+            del self.trids[request.trid]
+        if not self.pending:
+            self._idle.notify_all()
+    
+    def cancel(self, request):
+        """Stop waiting for a request (timed out or abandoned)"""
+        with self._lock:
+            if self.pending.get((request.trid, request.duid)) is request:
+                self._remove(request)
+    
+    def feed(self, data, timestamp=None, packet=None):
+        """Offer a received DHCPv6 payload; returns the matched request or None"""
+        result = decode_dhcpv6(data)
+        if result is None or result.msg_type not in REPLY_TYPES:
+            return None
+        
+        with self._lock:
+            if result.client_duid:
+                request = self.pending.get((result.trid, result.client_duid)) or \
+                    self.pending.get((result.trid, None))
+            else:
+                request = self.trids.get(result.trid, [None])[0]
+            if request is None:
+                self.stray += 1
+                return None
+            self._remove(request)
+        
+        request.received_at = timestamp if timestamp is not None else time.time()
+        request.result = result
+        request.packet = packet if packet is not None else data
+        request.event.set()
+        if self.on_reply:
+            self.on_reply(request)
+        return request
+    
+    def on_packet(self, packet):
+        """Scapy sniffer callback"""
+        from scapy.layers.inet6 import UDP
+        if UDP in packet:
+            self.feed(bytes(packet[UDP].payload), float(packet.time), packet)
+    
+    def wait(self, request, timeout):
+        """Block until the request's reply arrives or timeout; returns True if answered"""
+        if not request.event.wait(timeout):
+            self.cancel(request)
+        return request.result is not None
+    
+    def wait_all(self, timeout):
+        """Block until no request is outstanding or timeout; returns True if all answered"""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.pending, timeout)
+
+
+class ScapyCapture:
+    """Sniffer on an interface that feeds DHCPv6 server packets to a ReplyCorrelator"""
+    
+    def __init__(self, interface, correlator, bpf_filter="udp and src port 547"):
+        self.interface = interface
+        self.correlator = correlator
+        self.bpf_filter = bpf_filter
+        self.sniffer = None
+    
+    def start(self, timeout=5):
+        """Start capturing and return once the capture socket is open"""
+        from scapy.all import AsyncSniffer
+        ready = threading.Event()
+        self.sniffer = AsyncSniffer(
+            iface=self.interface,
+            filter=self.bpf_filter,
+            prn=self.correlator.on_packet,
+            store=False,
+            started_callback=ready.set
+        )
+        self.sniffer.start()
+        ready.wait(timeout)
+    
+    def stop(self):
+        if self.sniffer is not None and self.sniffer.running:
+            self.sniffer.stop()
+
+
+class _MMsgBatch:
+    """
+    ctypes binding for Linux sendmmsg()/recvmmsg(), so a batch of datagrams costs one
+    system call. available is False on platforms without them; callers then fall back
+    to one sendto()/recvfrom() per datagram.
+    """
+    
+    BUFFER_SIZE = 2048
+    
+    def __init__(self, batch_size=64):
+        self.batch_size = batch_size
+        self.available = False
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._sendmmsg = libc.sendmmsg
+            self._recvmmsg = libc.recvmmsg
+        except (OSError, AttributeError):
+            return
+        
+        class iovec(ctypes.Structure):
+            _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+        
+        class msghdr(ctypes.Structure):
+            _fields_ = [('msg_name', ctypes.c_void_p), ('msg_namelen', ctypes.c_uint32),
+                        ('msg_iov', ctypes.POINTER(iovec)), ('msg_iovlen', ctypes.c_size_t),
+                        ('msg_control', ctypes.c_void_p), ('msg_controllen', ctypes.c_size_t),
+                        ('msg_flags', ctypes.c_int)]
+        
+        class mmsghdr(ctypes.Structure):
+            _fields_ = [('msg_hdr', msghdr), ('msg_len', ctypes.c_uint)]
+        
+        self.ctypes = ctypes
+        self.iovec = iovec
+        self.mmsghdr = mmsghdr
+        
+        # Receive side: preallocated buffers, iovecs and headers reused for every call
+        self.recv_buffers = [ctypes.create_string_buffer(self.BUFFER_SIZE) for _ in range(batch_size)]
+        self.recv_names = [ctypes.create_string_buffer(28) for _ in range(batch_size)]
+        self.recv_iov = (iovec * batch_size)()
+        self.recv_msgs = (mmsghdr * batch_size)()
+        for i in range(batch_size):
+            self.recv_iov[i].iov_base = ctypes.cast(self.recv_buffers[i], ctypes.c_void_p)
+            self.recv_iov[i].iov_len = self.BUFFER_SIZE
+            hdr = self.recv_msgs[i].msg_hdr
+            hdr.msg_iov = ctypes.pointer(self.recv_iov[i])
+            hdr.msg_iovlen = 1
+            hdr.msg_name = ctypes.cast(self.recv_names[i], ctypes.c_void_p)
+        
+        self.send_iov = (iovec * batch_size)()
+        self.send_msgs = (mmsghdr * batch_size)()
+        self.available = True
+    
+    @staticmethod
+    def sockaddr_in6(address, port, scope_id=0):
+        """Pack a struct sockaddr_in6 (Linux layout)"""
+        return struct.pack('=HHI16sI', socket.AF_INET6, socket.htons(port), 0,
+                           socket.inet_pton(socket.AF_INET6, address), scope_id)
+    
+    def send(self, fd, messages, sockaddr):
+        """Send up to batch_size messages to one destination; returns how many were sent"""
+        ctypes = self.ctypes
+        count = min(len(messages), self.batch_size)
+        name = ctypes.create_string_buffer(sockaddr, len(sockaddr))
+        keep = []
+        for i in range(count):
+            data = ctypes.create_string_buffer(messages[i], len(messages[i]))
+            keep.append(data)
+            self.send_iov[i].iov_base = ctypes.cast(data, ctypes.c_void_p)
+            self.send_iov[i].iov_len = len(messages[i])
+            hdr = self.send_msgs[i].msg_hdr
+            hdr.msg_name = ctypes.cast(name, ctypes.c_void_p)
+            hdr.msg_namelen = len(sockaddr)
+            hdr.msg_iov = ctypes.pointer(self.send_iov[i])
+            hdr.msg_iovlen = 1
+        sent = self._sendmmsg(fd, self.send_msgs, count, 0)
+        if sent < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return sent
+    
+    def recv(self, fd):
+        """Receive up to batch_size waiting datagrams without blocking"""
+        received = self._recvmmsg(fd, self.recv_msgs, self.batch_size, socket.MSG_DONTWAIT, None)
+        if received < 0:
+            err = self.ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
+        results = []
+        for i in range(received):
+            results.append(self.recv_buffers[i].raw[:self.recv_msgs[i].msg_len])
+            self.recv_msgs[i].msg_hdr.msg_namelen = 28
+        return results
+
+
+def open_dhcpv6_socket(interface, relay_address=None, local_address=None, port=None,
+                       buffer_size=4 * 1024 * 1024):
+    """
+    Open a non-blocking IPv6 UDP socket for DHCPv6: a client on port 546 multicasting
+    on the interface, or a relay agent on port 547 when relay_address is given.
+    Returns (socket, destination address tuple).
+    """
+    if port is None:
+        port = DHCPV6_SERVER_PORT if relay_address else DHCPV6_CLIENT_PORT
+    if relay_address:
+        destination = (relay_address, DHCPV6_SERVER_PORT, 0, 0)
+    else:
+        destination = (DHCPV6_MULTICAST, DHCPV6_SERVER_PORT, 0, socket.if_nametoindex(interface))
+    
+    sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        for option in (socket.SO_RCVBUF, socket.SO_SNDBUF):
+            sock.setsockopt(socket.SOL_SOCKET, option, buffer_size)
+        if not relay_address:
+            sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_MULTICAST_IF, destination[3])
+        sock.bind((local_address or "::", port))
+    except OSError:
+        sock.close()
+        raise
+    sock.setblocking(False)
+    return sock, destination
+
+
+class UDPTransport:
+    """
+    DHCPv6 over ordinary IPv6 UDP sockets instead of AF_PACKET send/sniff. Direct mode
+    is a client on port 546 sending to ff02::1:2 on the interface; relay mode acts as a
+    relay agent on port 547 sending Relay-Forward to the relay address. The socket is
+    non-blocking and datagrams are sent/received in batches (sendmmsg/recvmmsg on Linux).
+    Needs no libpcap; binding ports below 1024 needs CAP_NET_BIND_SERVICE or
+    net.ipv4.ip_unprivileged_port_start=0 (the Docker default).
+    """
+    
+    BATCH_SIZE = 64
+    
+    def __init__(self, interface, correlator, relay_address=None, local_address=None, port=None):
+        self.interface = interface
+        self.correlator = correlator
+        self.relay_address = relay_address
+        self.local_address = local_address
+        if port is None:
+            port = DHCPV6_SERVER_PORT if relay_address else DHCPV6_CLIENT_PORT
+        self.port = port
+        self.sock = None
+        self.destination = None
+        self.batch = _MMsgBatch(self.BATCH_SIZE)
+        self._running = False
+        self._thread = None
+    
+    def start(self, timeout=5):
+        """Open and bind the socket and start the receive thread"""
+        self.sock, self.destination = open_dhcpv6_socket(
+            self.interface, self.relay_address, self.local_address, self.port
+        )
+        self.sockaddr = _MMsgBatch.sockaddr_in6(self.destination[0], self.destination[1],
+                                                self.destination[3])
+        self._running = True
+        self._thread = threading.Thread(target=self._receive_loop, daemon=True)
+        self._thread.start()
+    
+    def _receive_loop(self):
+        """Feed every received datagram to the correlator until stopped"""
+        import select
+        poller = select.poll()
+        poller.register(self.sock.fileno(), select.POLLIN)
+        fd = self.sock.fileno()
+        while self._running:
+            if not poller.poll(100):
+                continue
+            while True:
+                if self.batch.available:
+                    datagrams = self.batch.recv(fd)
+                else:
+                    datagrams = []
+                    try:
+                        while len(datagrams) < self.BATCH_SIZE:
+                            datagrams.append(self.sock.recv(65535))
+                    except BlockingIOError:
+                        pass
+                if not datagrams:
+                    break
+                received_at = time.time()
+                for data in datagrams:
+                    self.correlator.feed(data, received_at)
+    
+    def send(self, messages):
+        """Send a list of DHCPv6 messages (UDP payloads), batching system calls"""
+        import select
+        offset = 0
+        while offset < len(messages):
+            try:
+                if self.batch.available:
+                    offset += self.batch.send(self.sock.fileno(), messages[offset:offset + self.BATCH_SIZE],
+                                              self.sockaddr)
+                else:
+                    self.sock.sendto(messages[offset], self.destination)
+                    offset += 1
+            except BlockingIOError:
+                # Send buffer full: wait until the socket is writable again
+                select.select([], [self.sock], [], 1)
+    
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class LoadGenerator:
+    """
+    Drive many simulated RPDs from one process and measure Solicit->Advertise latency
+    (Solicit->Reply for servers that accept Rapid Commit)
+    """
+    
+    def __init__(self, interface="eth0", count=1000, base_mac=None, relay_address=None,
+                 rate=0, timeout=5, builder="template", transport="udp", local_address=None,
+                 rapid_commit=False, port=None, trid_range=(1, 0x1000000), relays=None,
+                 exchange_log=None, profiles=None):
+        self.interface = interface
+        self.rapid_commit = rapid_commit
+        self.relays = relays
+        self.profiles = profiles
+        self.exchange_log = exchange_log
+        self.port = port
+        self.trid_range = trid_range
+        self.local_address = local_address
+        self.builder = builder
+        self.transport = transport
+        self.count = count
+        self.base_mac = base_mac or get_interface_mac(interface)
+        self.relay_address = relay_address
+        self.rate = rate
+        self.timeout = timeout
+        self.histogram = LatencyHistogram()
+        self.answered = 0
+        self.committed = 0
+        self.stray = 0
+        self.send_duration = 0.0
+    
+    def create_clients(self):
+        """Create one client per simulated RPD, each with its own MAC, DUID and trid"""
+        # Sample transaction ids without replacement so every reply maps to one RPD
+        trids = random.sample(range(*self.trid_range), self.count)
+        clients = []
+        for index in range(self.count):
+            mac = mac_for_index(self.base_mac, index)
+            relay_link = None
+            if self.relays:
+                # Spread by MAC so shards of a --workers run agree on the assignment
+                relay_link = self.relays[int(mac.replace(':', ''), 16) % len(self.relays)]
+            clients.append(DHCPv6RPDClient(
+                interface=self.interface,
+                client_mac=mac,
+                transaction_id=trids[index],
+                rapid_commit=self.rapid_commit,
+                relay_link=relay_link,
+                profile=profile_for_mac(self.profiles, mac) if self.profiles else None
+            ))
+        return clients
+    
+    def _templates(self, client, peer_address, **kwargs):
+        """One Solicit template per (emulated relay link, client profile), None for neither"""
+        return {
+            (link, profile): SolicitTemplate.for_client(client, self.relay_address, peer_address,
+                                                        relay_link=link, profile=profile, **kwargs)
+            for link in self.relays or [None]
+            for profile in self.profiles or [None]
+        }
+    
+    @staticmethod
+    def _record_solicit(client, request):
+        """Count a finished Solicit on the client's relay link and profile, if any"""
+        for group in (client.relay_link, client.profile):
+            if group is not None:
+                group.sent += 1
+                if request.result is not None:
+                    group.record(request)
+    
+    def _on_reply(self, request):
+        """Correlator callback: record the Solicit->Advertise latency"""
+        self.answered += 1
+        if request.result.rapid_commit:
+            self.committed += 1
+        self.histogram.record(request.latency)
+    
+    def run(self):
+        """Send one Solicit per simulated RPD and collect replies until timeout"""
+        clients = self.create_clients()
+        peer_address = None
+        if self.relay_address:
+            peer_address = self.local_address or clients[0].get_local_ipv6()
+        
+        correlator = ReplyCorrelator(on_reply=self._on_reply)
+        
+        receiver = None
+        if self.transport == "udp":
+            receiver = UDPTransport(self.interface, correlator, self.relay_address, peer_address,
+                                    self.port)
+            try:
+                receiver.start()
+            except OSError as e:
+                print(f"[WARNING] Cannot bind UDP port {receiver.port} ({e}), falling back to scapy capture")
+                receiver = None
+        
+        if receiver is not None:
+            # Socket transport: the kernel adds IPv6/UDP, we only build the DHCPv6 message
+            templates = self._templates(
+                clients[0], peer_address, with_headers=False,
+                relay_port=bool(self.relay_address) and receiver.port != DHCPV6_SERVER_PORT
+            )
+            if self.relays or self.profiles:
+                build = lambda client: templates[client.relay_link, client.profile].build_message_for(client)
+            else:
+                build = templates[None, None].build_message_for
+            send = receiver.send
+            batch_size = UDPTransport.BATCH_SIZE
+        else:
+            if self.builder == "template" or self.relays or self.profiles:
+                templates = self._templates(clients[0], peer_address)
+                build = lambda client: templates[client.relay_link, client.profile].build_for(client)
+            else:
+                build = lambda client: bytes(client.create_frame(self.relay_address, peer_address))
+            receiver = ScapyCapture(self.interface, correlator)
+            receiver.start()
+            from scapy.all import conf
+            sock = conf.L2socket(iface=self.interface)
+            send = lambda frames: [sock.send(frame) for frame in frames]
+            batch_size = 1
+        
+        try:
+            batch = []
+            requests = []
+            issued = []
+            start = time.time()
+            for index, client in enumerate(clients):
+                if self.rate:
+                    # Pace sends against the schedule rather than sleeping a fixed gap
+                    delay = start + index / self.rate - time.time()
+                    if delay > 0:
+                        if batch:
+                            self._flush(send, batch, requests)
+                        time.sleep(delay)
+                batch.append(build(client))
+                requests.append(correlator.expect(client.transaction_id, client.duid))
+                if self.relays or self.profiles or self.exchange_log is not None:
+                    issued.append((client, requests[-1]))
+                if len(batch) >= batch_size:
+                    self._flush(send, batch, requests)
+            if batch:
+                self._flush(send, batch, requests)
+            self.send_duration = time.time() - start
+            
+            # Drain replies until everything is answered or the timeout expires
+            correlator.wait_all(self.timeout)
+            for client, request in issued:
+                self._record_solicit(client, request)
+                if self.exchange_log is not None:
+                    # Logged after the drain so the send/receive path stays untouched
+                    request.transmissions = 1
+                    self.exchange_log.write(request, MSG_SOLICIT, client.client_mac,
+                                            self.relay_address, client.relay_link)
+        finally:
+            if self.exchange_log is not None:
+                self.exchange_log.close()
+            receiver.stop()
+            if isinstance(receiver, ScapyCapture):
+                sock.close()
+        
+        self.stray = correlator.stray
+        return self.report()
+    
+    @staticmethod
+    def _flush(send, batch, requests):
+        """Send a batch of packets, stamping their send time just before"""
+        now = time.time()
+        for request in requests:
+            request.sent_at = now
+        send(batch)
+        batch.clear()
+        requests.clear()
+    
+    def merge(self, other):
+        """Fold the counters and histograms of another shard's run into this one"""
+        self.count += other.count
+        self.histogram.merge(other.histogram)
+        self.answered += other.answered
+        self.committed += other.committed
+        self.stray += other.stray
+        # Shards run side by side, so the run took as long as the slowest one
+        self.send_duration = max(self.send_duration, other.send_duration)
+        for link, other_link in zip(self.relays or [], other.relays or []):
+            link.merge(other_link)
+        for profile, other_profile in zip(self.profiles or [], other.profiles or []):
+            profile.merge(other_profile)
+    
+    def report(self):
+        """Summarize throughput, response rate and latency percentiles"""
+        duration = self.send_duration or 1e-9
+        stats = self.histogram.summary()
+        stats.update({
+            'sent': self.count,
+            'answered': self.answered,
+            'unanswered': self.count - self.answered,
+            'rapid_commit': self.rapid_commit,
+            'committed': self.committed,
+            'stray': self.stray,
+            'send_duration': self.send_duration,
+            'solicits_per_second': self.count / duration,
+            'response_rate': self.answered / self.count if self.count else 0.0
+        })
+        if self.relays:
+            stats['relays'] = [link.summary() for link in self.relays]
+        if self.profiles:
+            stats['profiles'] = [profile.summary(duration) for profile in self.profiles]
+        return stats
+
+
+class RetransmitSchedule:
+    """
+    RFC 8415 section 15 retransmission timer for one exchange. Each call to
+    next_timeout() accounts for one transmission and returns how long to wait for a
+    reply before retransmitting, or None once MRC transmissions have been made.
+    IRT and MRT are divided by `scale`, for exchanges whose MRD comes from lease timers
+    replayed faster (LifecycleLoadGenerator time_scale).
+    """
+    
+    def __init__(self, msg_type, mrd=None, scale=1.0):
+        self.irt, self.mrt, self.mrc, self.mrd = RETRANSMISSION_PARAMETERS[msg_type]
+        self.irt /= scale
+        self.mrt /= scale
+        if mrd is not None:
+            self.mrd = mrd
+        # The first Solicit RT must be strictly greater than IRT (RFC 8415 18.2.1)
+        self.first_solicit = msg_type == MSG_SOLICIT
+        self.rt = None
+        self.count = 0
+    
+    def next_timeout(self):
+        if self.mrc and self.count >= self.mrc:
+            return None
+        if self.rt is None:
+            rand = random.uniform(0, 0.1) if self.first_solicit else random.uniform(-0.1, 0.1)
+            self.rt = self.irt + rand * self.irt
+        else:
+            self.rt = 2 * self.rt + random.uniform(-0.1, 0.1) * self.rt
+        if self.mrt and self.rt > self.mrt:
+            self.rt = self.mrt + random.uniform(-0.1, 0.1) * self.mrt
+        self.count += 1
+        return self.rt
+
+
+class _DHCPv6Protocol(asyncio.DatagramProtocol):
+    """Datagram protocol that hands every received payload to a ReplyCorrelator"""
+    
+    def __init__(self, correlator):
+        self.correlator = correlator
+        self.errors = 0
+    
+    def datagram_received(self, data, addr):
+        self.correlator.feed(data)
+    
+    def error_received(self, exc):
+        # ICMP errors (e.g. port unreachable) surface here; the exchange just times out
+        self.errors += 1
+
+
+class AsyncDHCPv6Client:
+    """
+    asyncio engine for DHCPv6 exchanges. One socket and one event loop serve any number
+    of simulated RPDs; each exchange is a coroutine with its own timer, and at most
+    `concurrency` transactions are outstanding at once. Embed it like:
+    
+        async with AsyncDHCPv6Client(interface="eth0", relay_address="2001:db8::1") as engine:
+            exchange = await engine.solicit(mac="00:11:22:33:44:55")
+            if exchange.result:
+                print(exchange.result.address, exchange.latency)
+    """
+    
+    def __init__(self, interface="eth0", relay_address=None, local_address=None, port=None,
+                 concurrency=1000, rapid_commit=False, trid_range=(1, 0x1000000)):
+        self.interface = interface
+        self.rapid_commit = rapid_commit
+        self.trid_range = trid_range
+        self.relay_address = relay_address
+        self.local_address = local_address
+        self.port = port
+        self.concurrency = concurrency
+        self.correlator = ReplyCorrelator(on_reply=self._on_reply)
+        self.transport = None
+        self.protocol = None
+        self.destination = None
+        self.template = None
+        self.last_sent_at = None
+        self._semaphore = None
+        self._relay_header = None
+        self._next_trid = random.randrange(*trid_range)
+    
+    async def start(self):
+        """Bind the socket and attach it to the running event loop"""
+        loop = asyncio.get_running_loop()
+        peer_address = None
+        if self.relay_address:
+            peer_address = self.local_address or get_local_ipv6(self.interface, quiet=True)
+        sock, self.destination = open_dhcpv6_socket(
+            self.interface, self.relay_address, peer_address, self.port
+        )
+        self.transport, self.protocol = await loop.create_datagram_endpoint(
+            lambda: _DHCPv6Protocol(self.correlator), sock=sock
+        )
+        relay_port = bool(self.relay_address) and sock.getsockname()[1] != DHCPV6_SERVER_PORT
+        self.template = SolicitTemplate(
+            relay_address=self.relay_address,
+            peer_address=peer_address,
+            interface_id=self.interface.encode(),
+            rapid_commit=self.rapid_commit,
+            relay_port=relay_port
+        )
+        if self.relay_address:
+            self._relay_header = (
+                socket.inet_pton(socket.AF_INET6, self.relay_address),
+                socket.inet_pton(socket.AF_INET6, peer_address),
+                self.interface.encode(),
+                0,
+                relay_port
+            )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+    
+    async def close(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+    
+    async def __aenter__(self):
+        return await self.start()
+    
+    async def __aexit__(self, *exc):
+        await self.close()
+    
+    @staticmethod
+    def _on_reply(request):
+        """Correlator callback (runs on the loop thread): wake the waiting coroutine"""
+        future = request.context
+        if not future.done():
+            future.set_result(request)
+    
+    def next_trid(self):
+        """Allocate a transaction ID not used by any outstanding exchange"""
+        low, high = self.trid_range
+        while True:
+            self._next_trid = self._next_trid + 1 if self._next_trid + 1 < high else low
+            if self._next_trid not in self.correlator.trids:
+                return self._next_trid
+    
+    def wrap(self, message, link=None):
+        """
+        Wrap a client message in a Relay-Forward when running as relay agent, on behalf
+        of an emulated RelayLink (link address and Interface-ID) if one is given
+        """
+        if self._relay_header is None:
+            return message
+        if link is None:
+            return relay_forward(message, *self._relay_header)
+        _, peer_address, _, hop_count, relay_port = self._relay_header
+        return relay_forward(message, link.packed_link, peer_address, link.interface_id, hop_count,
+                             relay_port)
+    
+    async def exchange(self, message, trid, duid=None, timeout=5):
+        """
+        Send an encoded message (already relay-wrapped, see wrap()) once and wait for
+        the reply with its transaction ID. Returns the PendingRequest: .result is the
+        decoded reply (None on timeout) and .latency the round trip in seconds.
+        """
+        return await self.transact(lambda elapsed: message, trid, duid, timeout=timeout, relay=False)
+    
+    async def transact(self, build, trid, duid=None, schedule=None, timeout=5, relay=True,
+                       link=None):
+        """
+        Exchange with RFC 8415 retransmission. build(elapsed) returns the client message
+        for an Elapsed Time value (1/100 s); with a RetransmitSchedule it is resent with
+        the same trid until answered or the schedule's MRC/MRD is exhausted. Without one
+        it is sent once and waited for `timeout` seconds. .latency counts from the first
+        transmission, .transmissions how often the message went out.
+        """
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            future = loop.create_future()
+            request = self.correlator.expect(trid, duid, future)
+            first_sent = None
+            while True:
+                wait = schedule.next_timeout() if schedule else (None if first_sent else timeout)
+                if wait is None:
+                    break
+                now = time.time()
+                if first_sent is None:
+                    first_sent = request.sent_at = now
+                if schedule and schedule.mrd:
+                    remaining = first_sent + schedule.mrd - now
+                    if remaining <= 0:
+                        break
+                    wait = min(wait, remaining)
+                
+                message = build(min(int((now - first_sent) * 100), 0xFFFF))
+                self.transport.sendto(self.wrap(message, link) if relay else message, self.destination)
+                request.transmissions += 1
+                self.last_sent_at = now
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), wait)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            if not future.done():
+                self.correlator.cancel(request)
+                future.cancel()
+            return request
+    
+    async def solicit(self, client=None, mac=None, timeout=5):
+        """
+        Run one Solicit->Advertise exchange for a simulated RPD, or for a new one for mac
+        with a transaction ID from next_trid()
+        """
+        if client is None:
+            client = DHCPv6RPDClient(self.interface, mac, transaction_id=self.next_trid())
+        if client.relay_link is not None or client.profile is not None:
+            message = self.wrap(build_client_message(MSG_SOLICIT, client.transaction_id, client.duid,
+                                                     rapid_commit=self.rapid_commit,
+                                                     profile=client.profile),
+                                client.relay_link)
+        else:
+            message = self.template.build_message_for(client)
+        return await self.exchange(message, client.transaction_id, client.duid, timeout)
+
+
+class AsyncLoadGenerator(LoadGenerator):
+    """Load mode on the asyncio engine: every simulated RPD is its own coroutine"""
+    
+    def __init__(self, concurrency=1000, **kwargs):
+        super().__init__(**kwargs)
+        self.concurrency = concurrency
+        self.duration = 0.0
+    
+    def run(self):
+        return asyncio.run(self._run())
+    
+    def merge(self, other):
+        super().merge(other)
+        self.duration = max(self.duration, other.duration)
+    
+    async def _exchange(self, engine, client):
+        request = await engine.solicit(client, timeout=self.timeout)
+        if self.exchange_log is not None:
+            self.exchange_log.write(request, MSG_SOLICIT, client.client_mac, self.relay_address,
+                                    client.relay_link)
+        self._record_solicit(client, request)
+        if request.result is not None:
+            self._on_reply(request)
+    
+    async def _run(self):
+        clients = self.create_clients()
+        engine = AsyncDHCPv6Client(
+            interface=self.interface,
+            relay_address=self.relay_address,
+            local_address=self.local_address,
+            port=self.port,
+            concurrency=self.concurrency,
+            rapid_commit=self.rapid_commit,
+            trid_range=self.trid_range
+        )
+        async with engine:
+            tasks = []
+            start = time.time()
+            for index, client in enumerate(clients):
+                if self.rate:
+                    delay = start + index / self.rate - time.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.ensure_future(self._exchange(engine, client)))
+            await asyncio.gather(*tasks)
+            self.send_duration = (engine.last_sent_at or start) - start
+            self.duration = time.time() - start
+            self.stray = engine.correlator.stray
+        if self.exchange_log is not None:
+            self.exchange_log.close()
+        return self.report()
+
+
+class MessageStats:
+    """Counters and latency histogram for one message type"""
+    
+    def __init__(self):
+        self.sent = 0
+        self.transmissions = 0
+        self.answered = 0
+        self.failed = 0  # Replies carrying a non-success status code
+        self.histogram = LatencyHistogram()
+    
+    def merge(self, other):
+        self.sent += other.sent
+        self.transmissions += other.transmissions
+        self.answered += other.answered
+        self.failed += other.failed
+        self.histogram.merge(other.histogram)
+    
+    def summary(self, duration):
+        stats = self.histogram.summary()
+        stats.update({
+            'sent': self.sent,
+            'retransmissions': max(0, self.transmissions - self.sent),
+            # Transmissions that never got an answer (lost requests or replies)
+            'dropped': max(0, self.transmissions - self.answered - self.failed),
+            'answered': self.answered,
+            'failed': self.failed,
+            'unanswered': self.sent - self.answered - self.failed,
+            'per_second': self.answered / duration if duration else 0.0
+        })
+        return stats
+
+
+class LeaseState:
+    """Lease bound to one simulated RPD, as learned from the last Advertise/Reply"""
+    
+    def __init__(self, result):
+        self.server_duid = result.server_duid
+        self.update(result)
+    
+    def update(self, result):
+        self.address = result.address
+        self.iaid = result.iaid
+        self.preferred_lifetime = result.preferred_lifetime or 0
+        self.valid_lifetime = result.valid_lifetime or 0
+        # RFC 8415 21.4: T1/T2 of 0 leave the choice to the client (0.5 and 0.8 of preferred)
+        self.t1 = result.t1 or self.preferred_lifetime * 0.5
+        self.t2 = result.t2 or self.preferred_lifetime * 0.8
+
+
+class LifecycleLoadGenerator(AsyncLoadGenerator):
+    """
+    Stateful lease lifecycle per simulated RPD on the asyncio engine:
+    Solicit->Advertise->Request->Reply, then Renew at T1 (Rebind at T2 if the Renew
+    is not answered, or for a share of clients chosen with rebind_ratio), repeated for
+    `renewals` cycles, optionally ending with Release or Decline. Lease timers are
+    divided by time_scale so a 24 h lease cycle replays in minutes. With retransmit,
+    every exchange follows the RFC 8415 retransmission schedule, with the Renew and
+    Rebind IRT/MRT divided by time_scale like their MRD. With rapid_commit, a
+    Solicit answered by a committed Reply skips the Request; the time from Solicit to
+    bound is kept per path so the two- and four-message exchanges can be compared.
+    """
+    
+    MESSAGE_ORDER = (MSG_SOLICIT, MSG_REQUEST, MSG_RENEW, MSG_REBIND, MSG_RELEASE, MSG_DECLINE)
+    BIND_PATHS = ('2-message', '4-message')
+    
+    def __init__(self, renewals=1, time_scale=1.0, rebind_ratio=0.0, finish=None, retransmit=False,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.retransmit = retransmit
+        self.renewals = renewals
+        self.time_scale = time_scale
+        self.rebind_ratio = rebind_ratio
+        self.finish = finish
+        self.message_stats = {msg_type: MessageStats() for msg_type in self.MESSAGE_ORDER}
+        self.bind_histograms = {path: LatencyHistogram() for path in self.BIND_PATHS}
+        self.completed = 0
+    
+    async def _transact(self, engine, client, msg_type, lease=None, mrd=None):
+        """Run one exchange; returns the decoded reply if it was answered successfully"""
+        trid = engine.next_trid()
+        if lease is None:
+            build = lambda elapsed: build_client_message(msg_type, trid, client.duid, elapsed=elapsed,
+                                                         rapid_commit=self.rapid_commit,
+                                                         profile=client.profile)
+        else:
+            build = lambda elapsed: build_client_message(
+                msg_type, trid, client.duid,
+                iaid=lease.iaid,
+                server_duid=lease.server_duid if msg_type != MSG_REBIND else None,
+                address=lease.address,
+                preferred_lifetime=lease.preferred_lifetime,
+                valid_lifetime=lease.valid_lifetime,
+                elapsed=elapsed,
+                profile=client.profile
+            )
+        schedule = None
+        if self.retransmit:
+            # Renew/Rebind run until T2/valid lifetime: scale their timers with the lease
+            scale = self.time_scale if msg_type in (MSG_RENEW, MSG_REBIND) else 1.0
+            schedule = RetransmitSchedule(msg_type, mrd, scale)
+        stats = self.message_stats[msg_type]
+        stats.sent += 1
+        link = client.relay_link
+        request = await engine.transact(build, trid, client.duid, schedule, self.timeout, link=link)
+        if self.exchange_log is not None:
+            self.exchange_log.write(request, msg_type, client.client_mac, self.relay_address, link)
+        stats.transmissions += request.transmissions
+        result = request.result
+        if msg_type == MSG_SOLICIT:
+            self._record_solicit(client, request)
+        if result is None:
+            return None
+        if result.status_code:
+            stats.failed += 1
+            return None
+        stats.answered += 1
+        stats.histogram.record(request.latency)
+        return result
+    
+    async def _sleep_until(self, deadline):
+        delay = deadline - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    async def _bind(self, engine, client, deadline=None):
+        """
+        Solicit, then Request unless the server committed the lease with a Rapid Commit
+        Reply. Returns (advertise, reply); reply is None if no lease was bound. With a
+        deadline both exchanges are retransmitted until then at most.
+        """
+        start = time.time()
+        advertise = await self._transact(engine, client, MSG_SOLICIT,
+                                         mrd=deadline - start if deadline else None)
+        if advertise is None or advertise.address is None:
+            return advertise, None
+        self.answered += 1
+        
+        if advertise.msg_type == MSG_REPLY and advertise.rapid_commit:
+            self.bind_histograms['2-message'].record(time.time() - start)
+            return advertise, advertise
+        
+        mrd = None
+        if deadline:
+            mrd = deadline - time.time()
+            if mrd <= 0:
+                return advertise, None
+        reply = await self._transact(engine, client, MSG_REQUEST, LeaseState(advertise), mrd=mrd)
+        if reply is None or reply.address is None:
+            return advertise, None
+        self.bind_histograms['4-message'].record(time.time() - start)
+        return advertise, reply
+    
+    async def _exchange(self, engine, client):
+        _, reply = await self._bind(engine, client)
+        if reply is None:
+            return
+        lease = LeaseState(reply)
+        
+        for _ in range(self.renewals):
+            bound_at = time.time()
+            reply = None
+            if random.random() >= self.rebind_ratio:
+                await self._sleep_until(bound_at + lease.t1 / self.time_scale)
+                # Renew is retransmitted until T2, Rebind until the valid lifetime ends
+                reply = await self._transact(engine, client, MSG_RENEW, lease,
+                                             mrd=(lease.t2 - lease.t1) / self.time_scale)
+            if reply is None:
+                await self._sleep_until(bound_at + lease.t2 / self.time_scale)
+                reply = await self._transact(engine, client, MSG_REBIND, lease,
+                                             mrd=(lease.valid_lifetime - lease.t2) / self.time_scale)
+            if reply is None:
+                # Lease lost: a real RPD would start over with Solicit
+                return
+            lease.update(reply)
+        
+        if self.finish == 'release':
+            await self._transact(engine, client, MSG_RELEASE, lease)
+        elif self.finish == 'decline':
+            await self._transact(engine, client, MSG_DECLINE, lease)
+        self.completed += 1
+    
+    def merge(self, other):
+        super().merge(other)
+        for msg_type, stats in other.message_stats.items():
+            self.message_stats[msg_type].merge(stats)
+        for path, histogram in other.bind_histograms.items():
+            self.bind_histograms[path].merge(histogram)
+        self.completed += other.completed
+    
+    def report(self):
+        stats = super().report()
+        stats['completed'] = self.completed
+        stats['duration'] = self.duration
+        stats['messages'] = {
+            MESSAGE_TYPES[msg_type]: self.message_stats[msg_type].summary(self.duration)
+            for msg_type in self.MESSAGE_ORDER
+            if self.message_stats[msg_type].sent
+        }
+        stats['bind'] = {}
+        for path, histogram in self.bind_histograms.items():
+            if histogram.count:
+                row = histogram.summary()
+                row['bound'] = histogram.count
+                row['per_second'] = histogram.count / self.duration if self.duration else 0.0
+                stats['bind'][path] = row
+        stats['transmissions'] = sum(row.transmissions for row in self.message_stats.values())
+        return stats
+
+
+class StormLoadGenerator(LifecycleLoadGenerator):
+    """
+    Reboot storm after a CMTS/CIN outage: all simulated RPDs restart within `window`
+    seconds and each runs Solicit/Request with RFC 8415 retransmission (and the
+    SOL_MAX_DELAY initial delay) until it is bound or `deadline` seconds have passed.
+    A Request that exhausts its MRC sends the RPD back to Solicit.
+    """
+    
+    MILESTONES = (10, 25, 50, 75, 90, 95, 99, 100)
+    
+    def __init__(self, window=10.0, deadline=300.0, **kwargs):
+        super().__init__(retransmit=True, **kwargs)
+        self.window = window
+        self.deadline = deadline
+        self.bound_times = []
+        self.restarts = 0
+        self.storm_start = None
+    
+    async def _exchange(self, engine, client):
+        await asyncio.sleep(random.uniform(0, self.window) + random.uniform(0, SOL_MAX_DELAY))
+        end = self.storm_start + self.deadline
+        while time.time() < end:
+            advertise, reply = await self._bind(engine, client, deadline=end)
+            if reply is not None:
+                self.bound_times.append(time.time() - self.storm_start)
+                return
+            if advertise is None:
+                return
+            self.restarts += 1
+    
+    async def _run(self):
+        self.storm_start = time.time()
+        return await super()._run()
+    
+    def merge(self, other):
+        super().merge(other)
+        self.bound_times.extend(other.bound_times)
+        self.restarts += other.restarts
+    
+    def report(self):
+        stats = super().report()
+        bound = sorted(self.bound_times)
+        milestones = {}
+        for pct in self.MILESTONES:
+            needed = math.ceil(self.count * pct / 100.0)
+            milestones[pct] = bound[needed - 1] if needed <= len(bound) else None
+        stats.update({
+            'window': self.window,
+            'bound': len(bound),
+            'not_bound': self.count - len(bound),
+            'restarts': self.restarts,
+            'milestones': milestones,
+            'bound_times': bound
+        })
+        return stats
+
+
+def _run_shard(generator_class, options):
+    """Worker process: run one shard and hand back the generator with its counters"""
+    generator = generator_class(**options)
+    generator.run()
+    return generator
+
+
+def run_sharded(generator_class, workers, local_addresses=None, base_port=10547, **options):
+    """
+    Split a load run across `workers` processes so it is not limited to one core.
+    Worker k owns the k-th block of MACs (counting up from the base MAC), the k-th
+    slice of the 24-bit transaction ID space and its own relay identity: a local
+    address from local_addresses if there is one per worker, otherwise source port
+    base_port + k announced with the Relay Source Port option. The workers' counters
+    and histograms are merged into one report.
+    """
+    if not options.get('relay_address'):
+        raise ValueError("--workers needs --relay: direct-mode clients all share port 546")
+    count = options['count']
+    workers = max(1, min(workers, count))
+    base_mac = options.get('base_mac') or get_interface_mac(options['interface'])
+    if not local_addresses:
+        local_addresses = [get_local_ipv6(options['interface'], quiet=True)]
+    span = 0xFFFFFF // workers
+    
+    shards = []
+    first = 0
+    for index in range(workers):
+        shard = dict(options)
+        shard['count'] = count // workers + (1 if index < count % workers else 0)
+        shard['base_mac'] = mac_for_index(base_mac, first)
+        shard['trid_range'] = (1 + index * span, 1 + (index + 1) * span)
+        shard['local_address'] = local_addresses[index % len(local_addresses)]
+        if len(local_addresses) < workers:
+            shard['port'] = base_port + index
+        if options.get('rate'):
+            shard['rate'] = options['rate'] / workers
+        if options.get('concurrency'):
+            shard['concurrency'] = max(1, math.ceil(options['concurrency'] / workers))
+        shards.append(shard)
+        first += shard['count']
+    
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        results = pool.starmap(_run_shard, [(generator_class, shard) for shard in shards])
+    merged = results[0]
+    for result in results[1:]:
+        merged.merge(result)
+    stats = merged.report()
+    stats['workers'] = workers
+    return stats
+
+
+def relay_engines(interface, relay_addresses, local_addresses=None, base_port=10547, **options):
+    """
+    One AsyncDHCPv6Client per relay address (None for direct multicast). Each relay
+    identity needs its own socket: a local address per relay if enough were given,
+    otherwise source port base_port + k announced with the Relay Source Port option
+    (as run_sharded() does per worker)
+    """
+    local_addresses = local_addresses or [None]
+    engines = []
+    for index, relay_address in enumerate(relay_addresses):
+        port = None
+        if relay_address and len(relay_addresses) > len(local_addresses):
+            port = base_port + index
+        engines.append(AsyncDHCPv6Client(
+            interface=interface,
+            relay_address=relay_address,
+            local_address=local_addresses[index % len(local_addresses)],
+            port=port,
+            **options
+        ))
+    return engines
+
+
+class ProbeTarget:
+    """
+    One path the probe daemon solicits through: a relay address (None for direct
+    multicast), optionally on behalf of an emulated RelayLink, with a fixed simulated
+    RPD and the in-memory metrics of its probes.
+    """
+    
+    def __init__(self, client, relay_address=None, link=None):
+        self.client = client
+        self.relay_address = relay_address
+        self.link = link
+        self.histogram = LatencyHistogram()
+        self.probes = 0
+        self.replies = 0
+        self.successes = 0
+        self.ccap_core = 0
+        self.last_success = None
+        self.last_ccap_core = None
+        self.last_latency = None
+        self.last_probe_at = None
+    
+    @property
+    def labels(self):
+        """Prometheus label set identifying this target"""
+        link_address = self.link.link_address if self.link else ""
+        return f'relay="{self.relay_address or DHCPV6_MULTICAST}",link="{link_address}"'
+    
+    def record(self, request):
+        """Account one finished probe exchange (answered or timed out)"""
+        self.probes += 1
+        self.last_probe_at = request.sent_at
+        result = request.result
+        if self.link is not None:
+            self.link.sent += 1
+        if result is None:
+            self.last_success = False
+            self.last_ccap_core = None
+            return
+        self.replies += 1
+        self.histogram.record(request.latency)
+        self.last_latency = request.latency
+        if self.link is not None:
+            self.link.record(request)
+        # A probe succeeds when the server offers an address; CCAP-Core options are
+        # checked separately since a lease without them leaves the RPD unable to boot
+        self.last_success = result.address is not None
+        self.last_ccap_core = any(code in result.vendor_options for code in CCAP_CORE_SUBOPTIONS)
+        self.successes += self.last_success
+        self.ccap_core += self.last_ccap_core
+
+
+class ProbeDaemon:
+    """
+    Resident synthetic probe: solicits every `interval` seconds through each relay
+    (or link of a relay table) from one asyncio loop with one bound socket per relay,
+    keeps the results in memory and serves them in the Prometheus text format on
+    http://listen:metrics_port/metrics. Replaces cron-spawned one-shot probes that each
+    pay interpreter startup and socket setup.
+    """
+    
+    def __init__(self, interface="eth0", relay_addresses=None, local_addresses=None, base_mac=None,
+                 interval=60.0, timeout=5.0, rapid_commit=False, relays=None, listen="::1",
+                 metrics_port=9547, base_port=10547, exchange_log=None):
+        self.interface = interface
+        self.exchange_log = exchange_log
+        self.relay_addresses = relay_addresses or [None]
+        self.local_addresses = local_addresses
+        self.base_mac = base_mac or get_interface_mac(interface)
+        self.interval = interval
+        self.timeout = timeout
+        self.rapid_commit = rapid_commit
+        self.relays = relays
+        self.listen = listen
+        self.metrics_port = metrics_port
+        self.base_port = base_port
+        self.targets = []
+        self.started_at = None
+        self._stop = None
+    
+    def _create_targets(self, engines):
+        targets = []
+        for engine in engines:
+            links = self.relays if engine.relay_address and self.relays else [None]
+            for link in links:
+                client = DHCPv6RPDClient(self.interface, mac_for_index(self.base_mac, len(targets)),
+                                         rapid_commit=self.rapid_commit, relay_link=link)
+                targets.append((engine, ProbeTarget(client, engine.relay_address, link)))
+        return targets
+    
+    def run(self):
+        asyncio.run(self._run())
+    
+    async def _run(self):
+        import signal
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stop.set)
+        
+        engines = relay_engines(self.interface, self.relay_addresses, self.local_addresses,
+                                self.base_port, rapid_commit=self.rapid_commit)
+        for engine in engines:
+            await engine.start()
+        targets = self._create_targets(engines)
+        self.targets = [target for _, target in targets]
+        self.started_at = time.time()
+        server = await asyncio.start_server(self._serve_http, self.listen, self.metrics_port)
+        print(f"Probing {len(self.targets)} target(s) every {self.interval:g}s, "
+              f"metrics on http://[{self.listen}]:{self.metrics_port}/metrics", flush=True)
+        
+        # Spread the targets over the interval instead of soliciting them all at once
+        tasks = [
+            asyncio.ensure_future(self._probe_loop(engine, target, index * self.interval / len(targets)))
+            for index, (engine, target) in enumerate(targets)
+        ]
+        try:
+            await self._stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+            for engine in engines:
+                await engine.close()
+            if self.exchange_log is not None:
+                self.exchange_log.close()
+        print("Probe daemon stopped", flush=True)
+    
+    async def _probe_loop(self, engine, target, offset):
+        next_at = time.time() + offset
+        while True:
+            delay = next_at - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Fixed RPD identity per target, fresh transaction ID per probe
+            target.client.transaction_id = engine.next_trid()
+            request = await engine.solicit(target.client, timeout=self.timeout)
+            target.record(request)
+            if self.exchange_log is not None:
+                self.exchange_log.write(request, MSG_SOLICIT, target.client.client_mac,
+                                        target.relay_address, target.link)
+                self.exchange_log.flush()
+            if request.result is None:
+                print(f"[WARNING] Probe via {target.labels} timed out after {self.timeout:g}s", flush=True)
+            next_at += self.interval
+            if next_at < time.time():
+                # Fell behind (timeout longer than the interval): skip the missed slots
+                next_at = time.time() + self.interval
+    
+    async def _serve_http(self, reader, writer):
+        """Minimal HTTP/1.0 handler on the probe loop: GET /metrics, anything else 404"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 10)
+            while (await asyncio.wait_for(reader.readline(), 10)).strip():
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) >= 2 and parts[0] == 'GET' and parts[1].split('?')[0] == '/metrics':
+                status, body = "200 OK", self.metrics().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"Not Found\n", "text/plain"
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    def metrics(self):
+        """Render all targets' metrics in the Prometheus text exposition format"""
+        lines = []
+        
+        def family(name, kind, help_text, value_of):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for target in self.targets:
+                value = value_of(target)
+                if value is not None:
+                    value = int(value) if isinstance(value, int) else float(value)
+                    lines.append(f"{name}{{{target.labels}}} {value!r}")
+        
+        family("dhcpv6_probe_requests_total", "counter", "Solicits sent by the probe",
+               lambda t: t.probes)
+        family("dhcpv6_probe_replies_total", "counter", "Probe Solicits answered by the server",
+               lambda t: t.replies)
+        family("dhcpv6_probe_success_total", "counter", "Probe replies offering an address",
+               lambda t: t.successes)
+        family("dhcpv6_probe_ccap_core_total", "counter",
+               "Probe replies carrying the CCAP-Core sub-options (4491 34/61)", lambda t: t.ccap_core)
+        family("dhcpv6_probe_wrong_subnet_total", "counter",
+               "Probe replies with an address outside the relay link's subnet",
+               lambda t: t.link.wrong_subnet if t.link and t.link.subnet else None)
+        family("dhcpv6_probe_success_ratio", "gauge", "Share of probes that were offered an address",
+               lambda t: t.successes / t.probes if t.probes else None)
+        family("dhcpv6_probe_last_success", "gauge", "1 if the last probe was offered an address",
+               lambda t: None if t.last_success is None else t.last_success)
+        family("dhcpv6_probe_ccap_core_present", "gauge",
+               "1 if the last reply carried the CCAP-Core sub-options",
+               lambda t: None if t.last_ccap_core is None else t.last_ccap_core)
+        family("dhcpv6_probe_last_latency_seconds", "gauge", "Latency of the last answered probe",
+               lambda t: t.last_latency)
+        family("dhcpv6_probe_last_probe_timestamp_seconds", "gauge", "Unix time of the last probe",
+               lambda t: t.last_probe_at)
+        
+        name = "dhcpv6_probe_latency_seconds"
+        lines.append(f"# HELP {name} Solicit to Advertise/Reply latency of answered probes")
+        lines.append(f"# TYPE {name} histogram")
+        for target in self.targets:
+            counts = target.histogram.cumulative(PROBE_LATENCY_BUCKETS)
+            for bound, count in zip(PROBE_LATENCY_BUCKETS, counts):
+                lines.append(f'{name}_bucket{{{target.labels},le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{target.labels},le="+Inf"}} {target.histogram.count}')
+            lines.append(f"{name}_sum{{{target.labels}}} {target.histogram.total!r}")
+            lines.append(f"{name}_count{{{target.labels}}} {target.histogram.count}")
+        
+        lines.append("# HELP dhcpv6_probe_start_time_seconds Unix time the probe daemon started")
+        lines.append("# TYPE dhcpv6_probe_start_time_seconds gauge")
+        lines.append(f"dhcpv6_probe_start_time_seconds {self.started_at:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+class FailoverProbe:
+    """
+    Measure what clients see while an HA pair fails over. A fixed simulated RPD
+    solicits every 1/rate seconds whether or not earlier probes were answered; each
+    Solicit goes to every relay address at once, like a relay configured with both
+    peers (or by multicast to both, directly). A probe is lost when no peer answers
+    within `timeout` and late when the first reply takes longer than `late` seconds.
+    Consecutive lost or late probes form an event that ends with the next on-time
+    reply; it is reported with its unanswered window, latency spike and recovery
+    time, and the peers that answered before and after it.
+    """
+    
+    def __init__(self, interface="eth0", relay_addresses=None, local_addresses=None, base_mac=None,
+                 rate=10.0, duration=0.0, timeout=5.0, late=0.1, retransmit=False, rapid_commit=False,
+                 base_port=10547, exchange_log=None):
+        self.interface = interface
+        self.relay_addresses = relay_addresses or [None]
+        self.local_addresses = local_addresses
+        self.base_mac = base_mac or get_interface_mac(interface)
+        self.rate = rate
+        self.duration = duration
+        self.timeout = timeout
+        self.late = late
+        self.retransmit = retransmit
+        self.rapid_commit = rapid_commit
+        self.base_port = base_port
+        self.exchange_log = exchange_log
+        self.histogram = LatencyHistogram()
+        self.servers = {}  # peer -> [replies, first reply, last reply]
+        self.events = []
+        self.probes = 0
+        self.answered = 0
+        self.lost = 0
+        self.delayed = 0
+        self.answered_twice = 0
+        self.elapsed = 0.0
+        self._event = None
+        self._last_good = None
+        self._stop = None
+    
+    def run(self):
+        asyncio.run(self._run())
+        return self.report()
+    
+    async def _run(self):
+        import signal
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._stop.set)
+        
+        engines = relay_engines(self.interface, self.relay_addresses, self.local_addresses,
+                                self.base_port, rapid_commit=self.rapid_commit)
+        for engine in engines:
+            await engine.start()
+        client = DHCPv6RPDClient(self.interface, self.base_mac, rapid_commit=self.rapid_commit)
+        print(f"Probing {', '.join(address or DHCPV6_MULTICAST for address in self.relay_addresses)} "
+              f"at {self.rate:g}/s as {client.client_mac} (lost after {self.timeout:g}s, "
+              f"late after {format_ms(self.late)})", flush=True)
+        
+        # Probes are accounted in send order, each once all of its peers answered or timed out
+        queue = asyncio.Queue()
+        consumer = asyncio.ensure_future(self._account_loop(queue))
+        start = time.time()
+        try:
+            while not self._stop.is_set():
+                if self.duration and time.time() - start >= self.duration:
+                    break
+                queue.put_nowait(asyncio.ensure_future(self._probe(engines, client, self.probes)))
+                self.probes += 1
+                delay = start + self.probes / self.rate - time.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            self.elapsed = time.time() - start
+            queue.put_nowait(None)
+            await consumer
+            for engine in engines:
+                await engine.close()
+            if self.exchange_log is not None:
+                self.exchange_log.close()
+    
+    async def _probe(self, engines, client, seq):
+        trid = engines[0].next_trid()
+        build = lambda elapsed: build_client_message(MSG_SOLICIT, trid, client.duid, elapsed=elapsed,
+                                                     rapid_commit=self.rapid_commit)
+        # With retransmit each probe follows the RFC 8415 Solicit timers until the timeout,
+        # so the Elapsed Time grows as it would for an RPD a peer stopped answering
+        requests = await asyncio.gather(*(
+            engine.transact(build, trid, client.duid,
+                            RetransmitSchedule(MSG_SOLICIT, self.timeout) if self.retransmit else None,
+                            self.timeout)
+            for engine in engines
+        ))
+        return seq, client, list(zip(engines, requests))
+    
+    async def _account_loop(self, queue):
+        while True:
+            task = await queue.get()
+            if task is None:
+                return
+            self._account(*await task)
+    
+    def _account(self, seq, client, exchanges):
+        answered = [(engine, request) for engine, request in exchanges if request.result is not None]
+        if len(answered) > 1:
+            self.answered_twice += 1
+        engine, request = min(answered, key=lambda pair: pair[1].received_at) if answered else exchanges[0]
+        if self.exchange_log is not None:
+            self.exchange_log.write(request, MSG_SOLICIT, client.client_mac, engine.relay_address)
+            self.exchange_log.flush()
+        
+        peer = None
+        if answered:
+            # Several relay addresses tell the peers apart; by multicast their Server IDs do
+            if len(exchanges) > 1:
+                peer = engine.relay_address
+            else:
+                peer = (request.result.server_duid or b'').hex()
+            self.answered += 1
+            self.histogram.record(request.latency)
+            server = self.servers.setdefault(peer, [0, request.received_at, None])
+            server[0] += 1
+            server[2] = request.received_at
+        
+        if answered and request.latency <= self.late:
+            if self._event is not None:
+                event = self._event
+                event['recovery'] = request.sent_at - event['started']
+                event['after'] = peer
+                self._event = None
+                print(f"{format_clock(request.sent_at)}  #{seq:<7} recovered after "
+                      f"{event['recovery']:.2f}s: {event['lost']} lost, {event['late']} late, "
+                      f"answered by {peer}", flush=True)
+            self._last_good = (request, peer)
+            return
+        
+        if self._event is None:
+            last_request, last_peer = self._last_good or (None, None)
+            self._event = {
+                'started': request.sent_at,
+                'last_reply': last_request.received_at if last_request else None,
+                'before': last_peer,
+                'after': None,
+                'lost': 0,
+                'late': 0,
+                'first_lost': None,
+                'last_lost': None,
+                'max_latency': None,
+                'recovery': None
+            }
+            self.events.append(self._event)
+        event = self._event
+        if answered:
+            self.delayed += 1
+            event['late'] += 1
+            event['max_latency'] = max(event['max_latency'] or 0.0, request.latency)
+            print(f"{format_clock(request.sent_at)}  #{seq:<7} late   {format_ms(request.latency)} "
+                  f"from {peer}", flush=True)
+        else:
+            self.lost += 1
+            event['lost'] += 1
+            event['first_lost'] = event['first_lost'] or request.sent_at
+            event['last_lost'] = request.sent_at
+            print(f"{format_clock(request.sent_at)}  #{seq:<7} lost   no reply after "
+                  f"{request.transmissions} transmission(s)", flush=True)
+    
+    def report(self):
+        period = 1.0 / self.rate
+        events = []
+        for event in self.events:
+            event = dict(event)
+            # Resolution is one probe period: the gap began after the last answered probe
+            event['unanswered'] = event['last_lost'] - event['first_lost'] + period \
+                if event['lost'] else 0.0
+            events.append(event)
+        stats = self.histogram.summary()
+        stats.update({
+            'probes': self.probes,
+            'answered': self.answered,
+            'lost': self.lost,
+            'late': self.delayed,
+            'answered_twice': self.answered_twice,
+            'peers': len(self.relay_addresses),
+            'duration': self.elapsed,
+            'rate': self.rate,
+            'timeout': self.timeout,
+            'late_threshold': self.late,
+            'servers': [
+                {'peer': peer, 'replies': replies, 'first': first, 'last': last}
+                for peer, (replies, first, last) in self.servers.items()
+            ],
+            'events': events,
+            'recovered': self._event is None
+        })
+        return stats
+
+
+class ReservationVerifier:
+    """
+    Prove that host reservations took effect: every expected RPD solicits from its MAC
+    through its relay link, at most `concurrency` at once on the asyncio engine, and
+    the Advertise is diffed against the expected address and 4491 sub-options. Only
+    Solicits are sent (no Request), so verification binds no leases unless Rapid
+    Commit is requested.
+    """
+    
+    OUTCOMES = ('ok', 'mismatch', 'no_address', 'timeout')
+    
+    def __init__(self, interface="eth0", relay_address=None, local_address=None, port=None,
+                 concurrency=200, timeout=5, retransmit=False, rapid_commit=False, exchange_log=None):
+        self.interface = interface
+        self.relay_address = relay_address
+        self.local_address = local_address
+        self.port = port
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retransmit = retransmit
+        self.rapid_commit = rapid_commit
+        self.exchange_log = exchange_log
+        self.outcomes = collections.Counter()
+        self.differences = []  # (mac, link address, field, expected, actual)
+        self.histogram = LatencyHistogram()
+        self.duration = 0.0
+        self.count = 0
+    
+    def run(self, reservations):
+        return asyncio.run(self._run(reservations))
+    
+    async def _run(self, reservations):
+        self.count = len(reservations)
+        engine = AsyncDHCPv6Client(
+            interface=self.interface,
+            relay_address=self.relay_address,
+            local_address=self.local_address,
+            port=self.port,
+            concurrency=self.concurrency,
+            rapid_commit=self.rapid_commit
+        )
+        async with engine:
+            start = time.time()
+            await asyncio.gather(*(self._verify(engine, reservation) for reservation in reservations))
+            self.duration = time.time() - start
+        if self.exchange_log is not None:
+            self.exchange_log.close()
+        return self.report()
+    
+    async def _verify(self, engine, reservation):
+        client = DHCPv6RPDClient(self.interface, reservation.mac, rapid_commit=self.rapid_commit,
+                                 relay_link=reservation.link)
+        trid = engine.next_trid()
+        build = lambda elapsed: build_client_message(MSG_SOLICIT, trid, client.duid, elapsed=elapsed,
+                                                     rapid_commit=self.rapid_commit)
+        # With retransmit the Solicit follows RFC 8415 timers until the timeout (MRD)
+        schedule = RetransmitSchedule(MSG_SOLICIT, self.timeout) if self.retransmit else None
+        request = await engine.transact(build, trid, client.duid, schedule, self.timeout,
+                                        link=reservation.link)
+        if self.exchange_log is not None:
+            self.exchange_log.write(request, MSG_SOLICIT, reservation.mac, self.relay_address,
+                                    reservation.link)
+        link_address = reservation.link.link_address if reservation.link else self.relay_address
+        
+        result = request.result
+        if result is None:
+            self.outcomes['timeout'] += 1
+            self.differences.append((reservation.mac, link_address, 'reply', 'ADVERTISE',
+                                     f'timeout after {request.transmissions} transmission(s)'))
+            return
+        self.histogram.record(request.latency)
+        if result.address is None:
+            self.outcomes['no_address'] += 1
+            status = f"{result.msg_name} status {result.status_code} {result.status_message or ''}"
+            self.differences.append((reservation.mac, link_address, 'address',
+                                     reservation.address or 'any', status.strip()))
+            return
+        
+        differences = []
+        if reservation.address and result.address != reservation.address:
+            differences.append(('address', reservation.address, result.address))
+        for code, expected in sorted(reservation.options.items()):
+            data = result.vendor_options.get(code)
+            actual = normalize_suboption(format_vendor_suboption(data)) if data is not None else None
+            if actual != expected:
+                name = CABLELABS_SUBOPTION_NAMES.get(code, f"4491 sub-option {code}")
+                differences.append((f"{name} ({code})", ','.join(expected),
+                                    ','.join(actual) if actual is not None else 'missing'))
+        self.outcomes['mismatch' if differences else 'ok'] += 1
+        for field, expected, actual in differences:
+            self.differences.append((reservation.mac, link_address, field, expected, actual))
+    
+    def report(self):
+        stats = self.histogram.summary()
+        stats.update({
+            'reservations': self.count,
+            'outcomes': {outcome: self.outcomes[outcome] for outcome in self.OUTCOMES},
+            'differences': self.differences,
+            'duration': self.duration,
+            'per_second': self.count / self.duration if self.duration else 0.0,
+            'concurrency': self.concurrency
+        })
+        return stats
+
+
+def print_storm_report(stats, rows=10, width=50):
+    """Print the time-to-X%-bound curve and retransmission/drop counters of a storm run"""
+    print("\n" + "="*80)
+    print("REBOOT STORM RESULTS")
+    print("="*80)
+    print(f"RPDs:               {stats['sent']} restarted within {stats['window']:.1f}s")
+    print(f"Bound:              {stats['bound']} ({stats['bound'] / stats['sent'] * 100:.1f}%), "
+          f"{stats['not_bound']} not bound after {stats['duration']:.1f}s")
+    print(f"Request restarts:   {stats['restarts']}")
+    if stats.get('workers'):
+        print(f"Workers:            {stats['workers']}")
+    print()
+    print("Time to X% bound:")
+    for pct, seconds in stats['milestones'].items():
+        value = f"{seconds:.2f}s" if seconds is not None else "not reached"
+        print(f"  {pct:>3}%  {value}")
+    
+    bound_times = stats['bound_times']
+    if bound_times:
+        print()
+        print("Convergence curve (share of RPDs bound over time):")
+        end = bound_times[-1]
+        index = 0
+        for row in range(1, rows + 1):
+            t = end * row / rows
+            while index < len(bound_times) and bound_times[index] <= t:
+                index += 1
+            share = index / stats['sent']
+            print(f"  {t:>8.2f}s {share * 100:>5.1f}% {'#' * int(share * width)}")
+    
+    print()
+    print_message_table(stats['messages'])
+    dropped = sum(row['dropped'] for row in stats['messages'].values())
+    retransmissions = sum(row['retransmissions'] for row in stats['messages'].values())
+    print(f"\nRetransmissions:    {retransmissions}")
+    print(f"Unanswered transmissions (drops): {dropped}")
+    print("="*80)
+
+
+def print_lifecycle_report(stats):
+    """Print per-message-type throughput and latency of a lifecycle run"""
+    print("\n" + "="*80)
+    print("LEASE LIFECYCLE RESULTS")
+    print("="*80)
+    print(f"RPDs:               {stats['sent']} ({stats['answered']} answered the Solicit, "
+          f"{stats['completed']} completed every cycle)")
+    print(f"Duration:           {stats['duration']:.2f}s")
+    if stats.get('workers'):
+        print(f"Workers:            {stats['workers']}")
+    print()
+    print_message_table(stats['messages'])
+    if stats['bind']:
+        print()
+        print_bind_table(stats['bind'])
+    print("="*80)
+
+
+def print_bind_table(bind):
+    """Print Solicit-to-bound latency per exchange path (Rapid Commit or four-message)"""
+    print(f"{'Bind path':<10} {'Bound':>7} {'Binds/s':>10} "
+          f"{'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for path, row in bind.items():
+        print(f"{path:<10} {row['bound']:>7} {row['per_second']:>10.1f} {format_ms(row['p50']):>10} "
+              f"{format_ms(row['p95']):>10} {format_ms(row['p99']):>10} {format_ms(row['max']):>10}")
+
+
+def compare_rapid_commit(concurrency=1000, **options):
+    """
+    Bind the same number of RPDs twice, first with the four-message exchange and then
+    with Rapid Commit (on the next block of MACs, so both runs allocate fresh leases),
+    and return both lifecycle reports
+    """
+    count = options['count']
+    base_mac = options.get('base_mac') or get_interface_mac(options['interface'])
+    runs = {}
+    for index, rapid_commit in enumerate((False, True)):
+        generator = LifecycleLoadGenerator(
+            renewals=0,
+            concurrency=concurrency,
+            rapid_commit=rapid_commit,
+            **dict(options, base_mac=mac_for_index(base_mac, index * count))
+        )
+        runs['2-message' if rapid_commit else '4-message'] = generator.run()
+    return runs
+
+
+def print_rapid_commit_comparison(runs):
+    """Print bind latency, throughput and server messages per bind for both exchange paths"""
+    print("\n" + "="*80)
+    print("RAPID COMMIT COMPARISON")
+    print("="*80)
+    print(f"{'Run':<10} {'Bound':>7} {'Binds/s':>10} {'Msgs/bind':>10} "
+          f"{'p50':>10} {'p95':>10} {'p99':>10}")
+    for name, stats in runs.items():
+        bound = sum(row['bound'] for row in stats['bind'].values())
+        rate = bound / stats['duration'] if stats['duration'] else 0.0
+        per_bind = stats['transmissions'] / bound if bound else 0.0
+        row = stats['bind'].get(name, {})
+        print(f"{name:<10} {bound:>7} {rate:>10.1f} {per_bind:>10.2f} "
+              f"{format_ms(row.get('p50')):>10} {format_ms(row.get('p95')):>10} "
+              f"{format_ms(row.get('p99')):>10}")
+    
+    four = runs['4-message']['bind'].get('4-message')
+    two = runs['2-message']['bind'].get('2-message')
+    if four and two:
+        print()
+        for pct in ('p50', 'p95', 'p99'):
+            saved = four[pct] - two[pct]
+            print(f"Rapid Commit saves {format_ms(saved)} at {pct} "
+                  f"({saved / four[pct] * 100:.0f}% of the four-message bind time)")
+    elif not two:
+        print("\nServer declined Rapid Commit: every RPD needed the four-message exchange")
+    print("="*80)
+
+
+def print_message_table(messages):
+    """Print one row of counters and latency percentiles per message type"""
+    print(f"{'Message':<10} {'Sent':>7} {'Retx':>6} {'Replies':>8} {'Failed':>7} {'Replies/s':>10} "
+          f"{'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for name, row in messages.items():
+        print(f"{name:<10} {row['sent']:>7} {row['retransmissions']:>6} {row['answered']:>8} "
+              f"{row['failed']:>7} {row['per_second']:>10.1f} {format_ms(row['p50']):>10} "
+              f"{format_ms(row['p95']):>10} {format_ms(row['p99']):>10} {format_ms(row['max']):>10}")
+
+
+def print_load_report(stats, title="LOAD TEST RESULTS"):
+    """Print the summary produced by a load run"""
+    print("\n" + "="*80)
+    print(title)
+    print("="*80)
+    print(f"Solicits sent:      {stats['sent']} in {stats['send_duration']:.2f}s "
+          f"({stats['solicits_per_second']:.0f} solicits/s)")
+    if stats.get('workers'):
+        print(f"Workers:            {stats['workers']}")
+    print(f"Responses:          {stats['answered']} ({stats['response_rate'] * 100:.1f}%)")
+    print(f"Unanswered:         {stats['unanswered']}")
+    if stats['rapid_commit']:
+        print(f"Rapid Commit:       {stats['committed']} committed Replies, "
+              f"{stats['answered'] - stats['committed']} Advertises (declined)")
+    if stats['stray']:
+        print(f"Unmatched replies:  {stats['stray']}")
+    print(f"Latency p50:        {format_ms(stats['p50'])}")
+    print(f"Latency p95:        {format_ms(stats['p95'])}")
+    print(f"Latency p99:        {format_ms(stats['p99'])}")
+    print(f"Latency max:        {format_ms(stats['max'])}")
+    print("="*80)
+
+
+def print_relay_report(relays, limit=20):
+    """Print per-relay-link results, worst links first (unanswered, wrong subnet, p99)"""
+    print("\n" + "="*80)
+    print("RELAY LINKS")
+    print("="*80)
+    wrong = [row for row in relays if row['wrong_subnet']]
+    silent = [row for row in relays if row['unanswered']]
+    print(f"Links:              {len(relays)}")
+    print(f"Fully answered:     {len(relays) - len(silent)}")
+    print(f"Wrong subnet:       {len(wrong)} links, {sum(row['wrong_subnet'] for row in wrong)} RPDs")
+    print()
+    ranked = sorted(relays, key=lambda row: (-row['unanswered'], -row['wrong_subnet'],
+                                             -(row['p99'] or 0)))
+    print(f"{'Link address':<26} {'Interface-ID':<16} {'Sent':>6} {'Replies':>8} {'Wrong':>6} "
+          f"{'p50':>10} {'p99':>10}")
+    for row in ranked[:limit]:
+        print(f"{row['link_address']:<26} {row['interface_id'][:16]:<16} {row['sent']:>6} "
+              f"{row['answered']:>8} {row['wrong_subnet']:>6} {format_ms(row['p50']):>10} "
+              f"{format_ms(row['p99']):>10}")
+    if len(ranked) > limit:
+        print(f"... {len(ranked) - limit} more links")
+    print("="*80)
+
+
+def print_failover_report(stats):
+    """Print the HA failover probe summary: answering peers and one row per outage event"""
+    print("\n" + "="*80)
+    print("HA FAILOVER PROBE")
+    print("="*80)
+    print(f"Probes:             {stats['probes']} at {stats['rate']:g}/s over {stats['duration']:.1f}s "
+          f"(lost after {stats['timeout']:g}s, late after {format_ms(stats['late_threshold'])})")
+    answered_pct = stats['answered'] / stats['probes'] * 100 if stats['probes'] else 0
+    print(f"Answered:           {stats['answered']} ({answered_pct:.1f}%), {stats['lost']} lost, "
+          f"{stats['late']} late")
+    if stats['peers'] > 1:
+        print(f"Answered by both:   {stats['answered_twice']}")
+    print(f"Latency:            p50 {format_ms(stats['p50'])}, p99 {format_ms(stats['p99'])}, "
+          f"max {format_ms(stats['max'])}")
+    
+    if stats['servers']:
+        print()
+        print(f"{'Peer':<40} {'Replies':>8} {'First reply':>13} {'Last reply':>13}")
+        for server in stats['servers']:
+            print(f"{server['peer'][:40]:<40} {server['replies']:>8} {format_clock(server['first']):>13} "
+                  f"{format_clock(server['last']):>13}")
+    
+    events = stats['events']
+    if events:
+        print()
+        print(f"{'Started':<13} {'Lost':>5} {'Late':>5} {'Unanswered':>11} {'Max latency':>12} "
+              f"{'Recovery':>9}  Peers")
+        for event in events:
+            recovery = f"{event['recovery']:.2f}s" if event['recovery'] is not None else "-"
+            peers = f"{event['before'] or '-'} -> {event['after'] or '(not recovered)'}"
+            print(f"{format_clock(event['started']):<13} {event['lost']:>5} {event['late']:>5} "
+                  f"{event['unanswered']:>10.2f}s {format_ms(event['max_latency']):>12} "
+                  f"{recovery:>9}  {peers}")
+        if not stats['recovered']:
+            print("\n✗ No on-time reply since the last event started")
+    else:
+        print("\n✓ Every probe was answered on time")
+    print("="*80)
+
+
+def print_verification_report(stats, limit=100):
+    """Print the reservation verification summary and the diff of mismatches/timeouts"""
+    outcomes = stats['outcomes']
+    print("\n" + "="*80)
+    print("RESERVATION VERIFICATION")
+    print("="*80)
+    print(f"Reservations:       {stats['reservations']} in {stats['duration']:.1f}s "
+          f"({stats['per_second']:.0f}/s, {stats['concurrency']} concurrent)")
+    print(f"Verified:           {outcomes['ok']}")
+    print(f"Mismatched:         {outcomes['mismatch']}")
+    print(f"No address:         {outcomes['no_address']}")
+    print(f"Timed out:          {outcomes['timeout']}")
+    print(f"Latency:            p50 {format_ms(stats['p50'])}, p99 {format_ms(stats['p99'])}")
+    
+    differences = stats['differences']
+    if differences:
+        print()
+        print(f"{'MAC':<18} {'Link address':<26} {'Field':<30} {'Expected':<26} Actual")
+        for mac, link_address, field, expected, actual in sorted(differences)[:limit]:
+            print(f"{mac:<18} {link_address or '-':<26} {field:<30} {expected:<26} {actual}")
+        if len(differences) > limit:
+            print(f"... {len(differences) - limit} more differences (see --verify-diff)")
+    else:
+        print("\n✓ Every reservation received its expected address and sub-options")
+    print("="*80)
+
+
+def write_verification_diff(stats, path):
+    """Write all verification differences as CSV for tickets and re-checks"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['mac', 'link_address', 'field', 'expected', 'actual'])
+        writer.writerows(sorted(stats['differences']))
+
+
+def print_profile_report(profiles):
+    """Print per-profile results of a population mix, so classification costs can be compared"""
+    print("\n" + "="*80)
+    print("CLIENT PROFILES")
+    print("="*80)
+    total_weight = sum(row['weight'] for row in profiles)
+    print(f"{'Profile':<16} {'Share':>6} {'Sent':>7} {'Replies':>8} {'NoAddr':>7} "
+          f"{'Replies/s':>10} {'p50':>10} {'p99':>10}")
+    for row in profiles:
+        print(f"{row['name'][:16]:<16} {row['weight'] / total_weight:>6.0%} {row['sent']:>7} "
+              f"{row['answered']:>8} {row['no_address']:>7} {row['per_second']:>10.0f} "
+              f"{format_ms(row['p50']):>10} {format_ms(row['p99']):>10}")
+    print("="*80)
+
+
+class DHCPv6Responder:
+    """
+    Minimal DHCPv6 server stand-in for testing without Kea: answers Solicit with
+    Advertise (or a committed Reply to Rapid Commit when rapid_commit is enabled),
+    Request/Renew/Rebind with Reply and acknowledges Release/Decline.
+    
+    With ha_partner it plays the standby of a hot-standby pair: it solicits the
+    partner every heartbeat_delay seconds and stays silent while the partner answers.
+    Once the partner has not answered for max_response_delay seconds it goes
+    partner-down and serves all clients, until the partner answers again.
+    """
+    
+    def __init__(self, listen="::", port=DHCPV6_SERVER_PORT, pool_prefix="2001:db8:1::",
+                 ccap_core="2001:db8:2::1", interface=None, rapid_commit=False, ha_partner=None,
+                 heartbeat_delay=1.0, max_response_delay=3.0):
+        self.listen = listen
+        self.rapid_commit = rapid_commit
+        self.interface = interface
+        self.port = port
+        self.pool_start = ipaddress.IPv6Address(pool_prefix) + 0x100
+        self.ccap_core = socket.inet_pton(socket.AF_INET6, ccap_core)
+        # Link-layer part from the PID, so two stand-ins of an HA pair have distinct DUIDs
+        self.server_duid = struct.pack('!HHI', 1, 1, int(time.time() - DUID_EPOCH)) + \
+            struct.pack('!HI', 0x0200, os.getpid())
+        self.ha_partner = ha_partner
+        self.heartbeat_delay = heartbeat_delay
+        self.max_response_delay = max_response_delay
+        self.partner_down = False
+        self.leases = {}
+        self.allocated = 0
+        self.handled = 0
+    
+    def lease_for(self, client_duid):
+        """Return the address bound to a client DUID, allocating the next free one"""
+        address = self.leases.get(client_duid)
+        if address is None:
+            address = self.pool_start + self.allocated
+            self.allocated += 1
+            self.leases[client_duid] = address
+        return address
+    
+    def build_status_reply(self, trid, client_options, status=0, message=b'Success'):
+        """Build a Reply carrying only a status code (answer to Release/Decline)"""
+        body = dhcp6_option(OPTION_CLIENTID, client_options.get(OPTION_CLIENTID, b''))
+        body += dhcp6_option(OPTION_SERVERID, self.server_duid)
+        body += dhcp6_option(OPTION_STATUS_CODE, struct.pack('!H', status) + message)
+        return bytes([MSG_REPLY]) + trid + body
+    
+    def build_reply(self, msg_type, trid, client_options, rapid_commit=False):
+        """Build an Advertise/Reply answering the given client options"""
+        client_duid = client_options.get(OPTION_CLIENTID, b'')
+        ia_na = client_options.get(OPTION_IA_NA, b'\x00\x00\x00\x01')
+        iaid = ia_na[:4]
+        
+        address = self.lease_for(client_duid)
+        iaaddr = dhcp6_option(OPTION_IAADDR, address.packed + struct.pack('!II', 3600, 7200))
+        
+        # CableLabs vendor options: CCAP-Cores (34) and CCAP-Core-Address (61)
+        vendor = struct.pack('!I', CABLELABS_VENDOR_ID)
+        vendor += dhcp6_option(34, self.ccap_core)
+        vendor += dhcp6_option(61, self.ccap_core)
+        
+        body = dhcp6_option(OPTION_CLIENTID, client_duid)
+        body += dhcp6_option(OPTION_SERVERID, self.server_duid)
+        body += dhcp6_option(OPTION_IA_NA, iaid + struct.pack('!II', 1800, 2880) + iaaddr)
+        body += dhcp6_option(OPTION_VENDOR_OPTS, vendor)
+        if rapid_commit:
+            body += dhcp6_option(OPTION_RAPID_COMMIT, b'')
+        return bytes([msg_type]) + trid + body
+    
+    def handle(self, data):
+        """Return the encoded response for a received message, or None to ignore it"""
+        if len(data) < 4:
+            return None
+        msg_type = data[0]
+        
+        if msg_type == MSG_RELAY_FORW:
+            if len(data) < 34:
+                return None
+            options = dict(iter_dhcp6_options(data[34:]))
+            inner = options.get(OPTION_RELAY_MSG)
+            if not inner:
+                return None
+            reply = self.handle(inner)
+            if reply is None:
+                return None
+            # Relay-Reply keeps hop count, link and peer address and echoes Interface-ID
+            body = data[1:34]
+            if OPTION_INTERFACE_ID in options:
+                body += dhcp6_option(OPTION_INTERFACE_ID, options[OPTION_INTERFACE_ID])
+            body += dhcp6_option(OPTION_RELAY_MSG, reply)
+            return bytes([MSG_RELAY_REPL]) + body
+        
+        options = dict(iter_dhcp6_options(data[4:]))
+        if msg_type == MSG_SOLICIT:
+            if self.rapid_commit and OPTION_RAPID_COMMIT in options:
+                return self.build_reply(MSG_REPLY, data[1:4], options, rapid_commit=True)
+            return self.build_reply(MSG_ADVERTISE, data[1:4], options)
+        if msg_type in (MSG_REQUEST, MSG_RENEW, MSG_REBIND):
+            return self.build_reply(MSG_REPLY, data[1:4], options)
+        if msg_type in (MSG_RELEASE, MSG_DECLINE):
+            self.leases.pop(options.get(OPTION_CLIENTID, b''), None)
+            return self.build_status_reply(data[1:4], options)
+        
+        return None
+    
+    @property
+    def serving(self):
+        """False while a hot-standby peer's partner is up"""
+        return self.ha_partner is None or self.partner_down
+    
+    def serve_forever(self):
+        """Answer requests until interrupted"""
+        import select
+        sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.listen, self.port))
+        if self.interface:
+            # Direct-mode clients multicast to All_DHCP_Relay_Agents_and_Servers
+            try:
+                group = socket.inet_pton(socket.AF_INET6, DHCPV6_MULTICAST)
+                mreq = group + struct.pack('@I', socket.if_nametoindex(self.interface))
+                sock.setsockopt(socket.IPPROTO_IPV6, socket.IPV6_JOIN_GROUP, mreq)
+            except OSError as e:
+                print(f"[WARNING] Cannot join {DHCPV6_MULTICAST} on {self.interface}: {e}")
+        print(f"DHCPv6 responder listening on [{self.listen}]:{self.port}", flush=True)
+        
+        heartbeat = None
+        if self.ha_partner:
+            heartbeat = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+            partner = (self.ha_partner, self.port)
+            last_contact = next_heartbeat = time.time()
+            trid = 0
+            print(f"Hot-standby for {self.ha_partner}: heartbeat every {self.heartbeat_delay:g}s, "
+                  f"partner-down after {self.max_response_delay:g}s without an answer", flush=True)
+        try:
+            while True:
+                if heartbeat is not None:
+                    now = time.time()
+                    if now >= next_heartbeat:
+                        trid = (trid + 1) & 0xFFFFFF
+                        heartbeat.sendto(build_client_message(MSG_SOLICIT, trid, self.server_duid),
+                                         partner)
+                        next_heartbeat = now + self.heartbeat_delay
+                    if not self.partner_down and now - last_contact > self.max_response_delay:
+                        self.partner_down = True
+                        print(f"{format_clock(now)}  Partner {self.ha_partner} silent for "
+                              f"{now - last_contact:.1f}s: partner-down, serving all clients", flush=True)
+                    wait = next_heartbeat - now
+                    if not self.partner_down:
+                        wait = min(wait, last_contact + self.max_response_delay - now)
+                    readable = select.select([sock, heartbeat], [], [], max(0.0, wait))[0]
+                    if heartbeat in readable:
+                        data = heartbeat.recv(65535)
+                        if len(data) >= 4 and data[0] in REPLY_TYPES and \
+                                int.from_bytes(data[1:4], 'big') == trid:
+                            last_contact = time.time()
+                            if self.partner_down:
+                                self.partner_down = False
+                                print(f"{format_clock(last_contact)}  Partner {self.ha_partner} "
+                                      f"answers again: back to hot-standby", flush=True)
+                    if sock not in readable:
+                        continue
+                
+                data, peer = sock.recvfrom(65535)
+                reply = self.handle(data) if self.serving else None
+                if reply is not None:
+                    # Answer the sender's own port so relay and client sockets both work
+                    sock.sendto(reply, peer)
+                    self.handled += 1
+        except KeyboardInterrupt:
+            print(f"\nResponder stopped after {self.handled} replies")
+        finally:
+            sock.close()
+            if heartbeat is not None:
+                heartbeat.close()
+
+
+# Link-layer header types (pcap LINKTYPE_*) the capture reader understands
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+# IPv6 extension headers skipped on the way to the UDP header
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT_HEADER = 44
+
+# How far the capture reader gets ahead before releasing the pages behind it
+CAPTURE_DISCARD_BYTES = 64 * 1024 * 1024
+
+
+def iter_capture(path):
+    """
+    Stream the packets of a pcap or pcapng file as (timestamp, linktype, data). The
+    file is memory-mapped and every packet is a memoryview into the mapping, so
+    multi-GB captures are read without copying them into memory or dissecting with scapy.
+    """
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < 24:
+            return
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Packets are views into the mapping, which is unmapped once the last one is gone
+    view = memoryview(mapping)
+    magic = bytes(view[:4])
+    packets = _iter_pcapng(view) if magic == b'\x0a\x0d\x0d\x0a' else _iter_pcap(view, magic)
+    
+    # Drop pages already read from the resident set so RSS stays flat on huge files
+    discard = hasattr(mmap, 'MADV_DONTNEED')
+    if discard:
+        mapping.madvise(mmap.MADV_SEQUENTIAL)
+    released = 0
+    for timestamp, linktype, frame, offset in packets:
+        if discard and offset - released >= CAPTURE_DISCARD_BYTES:
+            upto = offset - offset % mmap.PAGESIZE
+            mapping.madvise(mmap.MADV_DONTNEED, released, upto - released)
+            released = upto
+        yield timestamp, linktype, frame
+
+
+def _iter_pcap(view, magic):
+    """Packets of a classic pcap file (micro- or nanosecond timestamps, either byte order)"""
+    formats = {
+        b'\xd4\xc3\xb2\xa1': ('<', 1e-6), b'\xa1\xb2\xc3\xd4': ('>', 1e-6),
+        b'\x4d\x3c\xb2\xa1': ('<', 1e-9), b'\xa1\xb2\x3c\x4d': ('>', 1e-9),
+    }
+    if magic not in formats:
+        raise ValueError("Not a pcap or pcapng file")
+    order, resolution = formats[magic]
+    linktype = struct.unpack_from(order + 'I', view, 20)[0] & 0x0FFFFFFF
+    record = struct.Struct(order + 'IIII')
+    offset = 24
+    end = len(view)
+    while offset + 16 <= end:
+        seconds, fraction, captured, _ = record.unpack_from(view, offset)
+        offset += 16
+        if offset + captured > end:
+            break
+        yield seconds + fraction * resolution, linktype, view[offset:offset + captured], offset
+        offset += captured
+
+
+def _iter_pcapng(view):
+    """Packets of a pcapng file: Enhanced (and obsolete) Packet Blocks of every section"""
+    order = '<'
+    interfaces = []  # (linktype, seconds per timestamp unit) per interface of the section
+    offset = 0
+    end = len(view)
+    while offset + 12 <= end:
+        block_type = struct.unpack_from(order + 'I', view, offset)[0]
+        if block_type == 0x0A0D0D0A:
+            # Section Header: the byte-order magic decides how the section is read
+            order = '<' if bytes(view[offset + 8:offset + 12]) == b'\x4d\x3c\x2b\x1a' else '>'
+            interfaces = []
+        length = struct.unpack_from(order + 'I', view, offset + 4)[0]
+        if length < 12 or offset + length > end:
+            break
+        body = offset + 8
+        
+        if block_type == 1:
+            linktype = struct.unpack_from(order + 'H', view, body)[0]
+            interfaces.append((linktype, _pcapng_resolution(view, body + 8, offset + length - 4, order)))
+        elif block_type in (6, 2):
+            if block_type == 6:
+                interface, high, low, captured = struct.unpack_from(order + 'IIII', view, body)
+            else:
+                interface, _, high, low, captured = struct.unpack_from(order + 'HHIII', view, body)
+            data = body + 20
+            if interface < len(interfaces) and data + captured <= end:
+                linktype, resolution = interfaces[interface]
+                yield ((high << 32) | low) * resolution, linktype, view[data:data + captured], offset
+        offset += length
+
+
+def _pcapng_resolution(view, offset, end, order):
+    """Seconds per timestamp unit from an Interface Description Block's if_tsresol option"""
+    while offset + 4 <= end:
+        code, length = struct.unpack_from(order + 'HH', view, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = view[offset + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        offset += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def extract_udp6(linktype, frame):
+    """
+    Locate the IPv6/UDP headers in a captured frame. Returns (source, destination,
+    source port, destination port, UDP payload) with 16-byte packed addresses and the
+    payload as a memoryview, or None for anything that is not unfragmented UDP over IPv6.
+    """
+    offset = 0
+    if linktype == LINKTYPE_ETHERNET:
+        if len(frame) < 14:
+            return None
+        ethertype = (frame[12] << 8) | frame[13]
+        offset = 14
+        while ethertype in ETHERTYPE_VLAN and len(frame) >= offset + 4:
+            ethertype = (frame[offset + 2] << 8) | frame[offset + 3]
+            offset += 4
+        if ethertype != ETHERTYPE_IPV6:
+            return None
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if len(frame) < 16 or ((frame[14] << 8) | frame[15]) != ETHERTYPE_IPV6:
+            return None
+        offset = 16
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if len(frame) < 20 or ((frame[0] << 8) | frame[1]) != ETHERTYPE_IPV6:
+            return None
+        offset = 20
+    elif linktype == LINKTYPE_NULL:
+        # Address family in host byte order: 24, 28 or 30 for IPv6 depending on the OS
+        if len(frame) < 4 or max(frame[0], frame[3]) not in (24, 28, 30):
+            return None
+        offset = 4
+    elif linktype not in (LINKTYPE_RAW, LINKTYPE_IPV6):
+        return None
+    
+    if len(frame) < offset + 40 or frame[offset] >> 4 != 6:
+        return None
+    source = bytes(frame[offset + 8:offset + 24])
+    destination = bytes(frame[offset + 24:offset + 40])
+    next_header = frame[offset + 6]
+    offset += 40
+    while next_header in IPV6_EXTENSION_HEADERS or next_header == IPV6_FRAGMENT_HEADER:
+        if len(frame) < offset + 8:
+            return None
+        if next_header == IPV6_FRAGMENT_HEADER:
+            # Only whole datagrams can be decoded
+            if struct.unpack_from('!H', frame, offset + 2)[0] & 0xFFF9:
+                return None
+            header_length = 8
+        else:
+            header_length = (frame[offset + 1] + 1) * 8
+        next_header = frame[offset]
+        offset += header_length
+    if next_header != 17 or len(frame) < offset + 8:
+        return None
+    source_port, destination_port, length = struct.unpack_from('!HHH', frame, offset)
+    payload_end = min(len(frame), offset + length) if length >= 8 else len(frame)
+    return source, destination, source_port, destination_port, frame[offset + 8:payload_end]
+
+
+# Client messages that expect an answer, and are therefore paired with one
+CLIENT_REQUEST_TYPES = (1, 3, 4, 5, 6, 8, 9, 11)
+
+
+class TrafficStats:
+    """Transaction counters and server latency histogram for one relay, link or message type"""
+    
+    __slots__ = ('transactions', 'transmissions', 'answered', 'histogram')
+    
+    def __init__(self):
+        self.transactions = 0
+        self.transmissions = 0
+        self.answered = 0
+        self.histogram = LatencyHistogram()
+    
+    def summary(self):
+        stats = self.histogram.summary()
+        stats.update({
+            'transactions': self.transactions,
+            'transmissions': self.transmissions,
+            'answered': self.answered,
+            'unanswered': self.transactions - self.answered,
+            'retransmission_ratio': (self.transmissions - self.transactions) / self.transactions
+            if self.transactions else 0.0
+        })
+        return stats
+
+
+class CaptureAnalyzer:
+    """
+    Server latency from captured DHCPv6 traffic. Client messages are paired with the
+    Advertise/Reply carrying the same transaction ID and client DUID at the same relay
+    depth, so one capture on a relay can hold both the client side and the relayed side
+    of an exchange. A repeated trid counts as a retransmission and latency is measured
+    from the last transmission before the reply. Requests unanswered for `timeout`
+    seconds of capture time are expired, which bounds memory by traffic rate x timeout
+    regardless of the capture size. Links are also grouped per subnet: the link address
+    truncated to `subnet_prefix_len` bits.
+    """
+    
+    def __init__(self, timeout=30.0, subnet_prefix_len=64):
+        self.timeout = timeout
+        self.subnet_prefix_len = subnet_prefix_len
+        self.pending = collections.OrderedDict()  # key -> [first seen, last seen, relay, link, type]
+        self.by_relay = collections.defaultdict(TrafficStats)
+        self.by_link = collections.defaultdict(TrafficStats)
+        self.by_subnet = collections.defaultdict(TrafficStats)
+        self.by_type = collections.defaultdict(TrafficStats)
+        self._subnets = {}  # link -> subnet
+        self.packets = 0
+        self.dhcpv6_packets = 0
+        self.unmatched_replies = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+    
+    def subnet_of(self, link):
+        """The subnet a link address belongs to ('direct' for unrelayed traffic)"""
+        subnet = self._subnets.get(link)
+        if subnet is None:
+            try:
+                subnet = str(ipaddress.ip_network(f"{link}/{self.subnet_prefix_len}", strict=False))
+            except ValueError:
+                subnet = link
+            self._subnets[link] = subnet
+        return subnet
+    
+    def _groups(self, relay, link, msg_type):
+        return (self.by_relay[relay], self.by_link[link], self.by_subnet[self.subnet_of(link)],
+                self.by_type[msg_type])
+    
+    def feed(self, timestamp, source, payload):
+        """Account one DHCPv6 UDP payload seen at `timestamp` from packed address `source`"""
+        result = decode_dhcpv6(payload)
+        if result is None or result.trid is None:
+            return
+        self.dhcpv6_packets += 1
+        key = (result.trid, result.client_duid, len(result.relays))
+        
+        if result.msg_type in CLIENT_REQUEST_TYPES:
+            entry = self.pending.get(key)
+            if entry is not None and timestamp - entry[1] > self.timeout:
+                # Same trid reused long after the old exchange was given up on
+                del self.pending[key]
+                entry = None
+            if entry is None:
+                # The relay is the sender of the outermost Relay-Forward, the link the
+                # innermost relay's link address (what the server selects the subnet by)
+                if result.relays:
+                    relay = socket.inet_ntop(socket.AF_INET6, source)
+                    link = result.link_address
+                else:
+                    relay = link = "direct"
+                entry = [timestamp, timestamp, relay, link, result.msg_type]
+                self.pending[key] = entry
+                for stats in self._groups(relay, link, result.msg_type):
+                    stats.transactions += 1
+                    stats.transmissions += 1
+            else:
+                entry[1] = timestamp
+                self.pending.move_to_end(key)
+                for stats in self._groups(entry[2], entry[3], entry[4]):
+                    stats.transmissions += 1
+        elif result.msg_type in REPLY_TYPES:
+            entry = self.pending.pop(key, None)
+            if entry is None:
+                self.unmatched_replies += 1
+                return
+            latency = timestamp - entry[1]
+            for stats in self._groups(entry[2], entry[3], entry[4]):
+                stats.answered += 1
+                stats.histogram.record(latency)
+    
+    def expire(self, now):
+        """Drop requests not retransmitted or answered within the timeout (they stay unanswered)"""
+        cutoff = now - self.timeout
+        pending = self.pending
+        while pending:
+            key, entry = next(iter(pending.items()))
+            if entry[1] >= cutoff:
+                break
+            del pending[key]
+    
+    def analyze(self, path):
+        """Stream a capture file through the analyzer and return the report"""
+        for timestamp, linktype, frame in iter_capture(path):
+            self.packets += 1
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+            packet = extract_udp6(linktype, frame)
+            if packet is None:
+                continue
+            source, _, source_port, destination_port, payload = packet
+            if source_port in (DHCPV6_CLIENT_PORT, DHCPV6_SERVER_PORT) or \
+                    destination_port in (DHCPV6_CLIENT_PORT, DHCPV6_SERVER_PORT):
+                self.feed(timestamp, source, payload)
+            if self.packets % 4096 == 0:
+                self.expire(timestamp)
+        return self.report()
+    
+    def report(self):
+        return {
+            'packets': self.packets,
+            'dhcpv6_packets': self.dhcpv6_packets,
+            'unmatched_replies': self.unmatched_replies,
+            'duration': (self.last_timestamp - self.first_timestamp) if self.packets else 0.0,
+            'messages': {MESSAGE_TYPES.get(msg_type, str(msg_type)): stats.summary()
+                         for msg_type, stats in sorted(self.by_type.items())},
+            'relays': {relay: stats.summary() for relay, stats in sorted(self.by_relay.items())},
+            'links': {link: stats.summary() for link, stats in sorted(self.by_link.items())},
+            'subnets': {subnet: stats.summary() for subnet, stats in sorted(self.by_subnet.items())}
+        }
+
+
+def print_capture_report(stats, limit=50):
+    """Print latency percentiles, unanswered counts and retransmission ratios per group"""
+    print("\n" + "="*80)
+    print("CAPTURE ANALYSIS")
+    print("="*80)
+    print(f"Packets:            {stats['packets']} ({stats['dhcpv6_packets']} DHCPv6) "
+          f"over {stats['duration']:.1f}s")
+    if stats['unmatched_replies']:
+        print(f"Unmatched replies:  {stats['unmatched_replies']} (request not in the capture)")
+    for title, key in (("Message", 'messages'), ("Relay", 'relays'), ("Link", 'links'),
+                       ("Subnet", 'subnets')):
+        rows = stats[key]
+        print()
+        print(f"{title:<26} {'Trans':>7} {'Unans':>6} {'Retx%':>6} "
+              f"{'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+        ranked = sorted(rows.items(), key=lambda item: -item[1]['transactions'])
+        for name, row in ranked[:limit]:
+            print(f"{name:<26} {row['transactions']:>7} {row['unanswered']:>6} "
+                  f"{row['retransmission_ratio'] * 100:>6.1f} {format_ms(row['p50']):>10} "
+                  f"{format_ms(row['p95']):>10} {format_ms(row['p99']):>10} {format_ms(row['max']):>10}")
+        if len(ranked) > limit:
+            print(f"... {len(ranked) - limit} more")
+    print("="*80)
+
+
+def _client_message_offset(message):
+    """Offset of the client message inside any number of Relay-Forward levels, or None"""
+    offset = 0
+    while len(message) >= offset + 34 and message[offset] == MSG_RELAY_FORW:
+        option = offset + 34
+        while option + 4 <= len(message):
+            code, length = struct.unpack_from('!HH', message, option)
+            if code == OPTION_RELAY_MSG:
+                break
+            option += 4 + length
+        else:
+            return None
+        offset = option + 4
+    return offset if len(message) >= offset + 4 else None
+
+
+class CaptureReplay:
+    """
+    Resend the client side of a capture (Solicits by default) to a server, so a Kea
+    change is benchmarked with the real option mix of the RPD vendors. The capture is
+    streamed with iter_capture(). speed 1 keeps the original timing, 10 replays ten
+    times faster and 0 sends as fast as possible. Captured Relay-Forwards go out as
+    they are, with this host acting as the relay; direct client messages are wrapped in
+    a Relay-Forward from the local address. With rewrite, each transaction ID and client
+    DUID is replaced by a salted hash of the original: retransmissions of one client stay
+    consistent, every replay creates fresh bindings and no mapping table is kept.
+    """
+    
+    def __init__(self, path, interface="eth0", relay_address=None, local_address=None,
+                 speed=1.0, rewrite=False, messages=(MSG_SOLICIT,), timeout=5, port=None):
+        self.path = path
+        self.interface = interface
+        self.relay_address = relay_address
+        self.local_address = local_address
+        self.speed = speed
+        self.rewrite = rewrite
+        self.messages = messages
+        self.timeout = timeout
+        self.port = port
+        self.salt = os.urandom(8)
+        self.histogram = LatencyHistogram()
+        self.by_type = collections.defaultdict(TrafficStats)
+        self.sent = 0
+        self.transactions = 0
+        self.answered = 0
+        self.skipped = 0
+        self.stray = 0
+        self.send_duration = 0.0
+        self._relay_header = None
+    
+    def client_messages(self):
+        """Yield (capture timestamp, bytearray) for every replayable client-to-server message"""
+        for timestamp, linktype, frame in iter_capture(self.path):
+            packet = extract_udp6(linktype, frame)
+            if packet is None or packet[3] != DHCPV6_SERVER_PORT:
+                continue
+            payload = packet[4]
+            offset = _client_message_offset(payload)
+            if offset is None or payload[offset] not in self.messages:
+                self.skipped += 1
+                continue
+            yield timestamp, bytearray(payload)
+    
+    def rewrite_identity(self, message, offset):
+        """Replace trid and client DUID in place (lengths are unchanged, so relays stay valid)"""
+        for code, value in iter_dhcp6_options(memoryview(message)[offset:], 4):
+            if code == OPTION_CLIENTID and len(value) >= 4:
+                duid = bytes(value)
+                # Keep the DUID type and most of the link-layer address, vary the tail
+                value[-4:] = struct.pack('!I', zlib.crc32(self.salt + duid))
+                break
+        else:
+            duid = b''
+        trid = zlib.crc32(self.salt + bytes(message[offset + 1:offset + 4]) + duid) & 0xFFFFFF
+        message[offset + 1:offset + 4] = trid.to_bytes(3, 'big')
+    
+    def _prepare(self, message):
+        """Rewrite and relay-wrap one message; returns (bytes to send, trid, duid, type)"""
+        offset = _client_message_offset(message)
+        if self.rewrite:
+            self.rewrite_identity(message, offset)
+        client = decode_dhcpv6(memoryview(message)[offset:])
+        if offset == 0 and self._relay_header is not None:
+            message = relay_forward(bytes(message), *self._relay_header)
+        return bytes(message), client.trid, client.client_duid, client.msg_type
+    
+    def run(self):
+        """Replay the capture and wait for the last replies"""
+        peer_address = self.local_address or get_local_ipv6(self.interface, quiet=True)
+        if self.relay_address:
+            self._relay_header = (
+                socket.inet_pton(socket.AF_INET6, self.relay_address),
+                socket.inet_pton(socket.AF_INET6, peer_address),
+                self.interface.encode()
+            )
+        correlator = ReplyCorrelator(on_reply=self._on_reply)
+        transport = UDPTransport(self.interface, correlator, self.relay_address, peer_address,
+                                 self.port)
+        transport.start()
+        outstanding = collections.deque()
+        try:
+            batch = []
+            requests = []
+            start = time.time()
+            first = None
+            for timestamp, message in self.client_messages():
+                if first is None:
+                    first = timestamp
+                if self.speed:
+                    delay = start + (timestamp - first) / self.speed - time.time()
+                    if delay > 0:
+                        if batch:
+                            LoadGenerator._flush(transport.send, batch, requests)
+                        time.sleep(delay)
+                data, trid, duid, msg_type = self._prepare(message)
+                stats = self.by_type[msg_type]
+                stats.transmissions += 1
+                self.sent += 1
+                batch.append(data)
+                if (trid, duid) not in correlator.pending:
+                    # A retransmission (same trid and client) keeps waiting on the original request
+                    request = correlator.expect(trid, duid, msg_type)
+                    stats.transactions += 1
+                    self.transactions += 1
+                    requests.append(request)
+                    outstanding.append(request)
+                if len(batch) >= UDPTransport.BATCH_SIZE:
+                    LoadGenerator._flush(transport.send, batch, requests)
+                # Give up on requests older than the timeout so memory stays bounded
+                while outstanding and outstanding[0].sent_at and \
+                        outstanding[0].sent_at < time.time() - self.timeout:
+                    correlator.cancel(outstanding.popleft())
+            if batch:
+                LoadGenerator._flush(transport.send, batch, requests)
+            self.send_duration = time.time() - start
+            correlator.wait_all(self.timeout)
+        finally:
+            transport.stop()
+        self.stray = correlator.stray
+        return self.report()
+    
+    def _on_reply(self, request):
+        self.answered += 1
+        self.histogram.record(request.latency)
+        stats = self.by_type[request.context]
+        stats.answered += 1
+        stats.histogram.record(request.latency)
+    
+    def report(self):
+        duration = self.send_duration or 1e-9
+        stats = self.histogram.summary()
+        stats.update({
+            'sent': self.sent,
+            'transactions': self.transactions,
+            'answered': self.answered,
+            'unanswered': self.transactions - self.answered,
+            'skipped': self.skipped,
+            'stray': self.stray,
+            'send_duration': self.send_duration,
+            'per_second': self.sent / duration,
+            'response_rate': self.answered / self.transactions if self.transactions else 0.0,
+            'messages': {MESSAGE_TYPES.get(msg_type, str(msg_type)): row.summary()
+                         for msg_type, row in sorted(self.by_type.items())}
+        })
+        return stats
+
+
+def print_replay_report(stats):
+    """Print the summary of a capture replay"""
+    print("\n" + "="*80)
+    print("CAPTURE REPLAY RESULTS")
+    print("="*80)
+    print(f"Messages replayed:  {stats['sent']} in {stats['send_duration']:.2f}s "
+          f"({stats['per_second']:.0f}/s), {stats['skipped']} other DHCPv6 packets skipped")
+    print(f"Transactions:       {stats['transactions']} "
+          f"({stats['sent'] - stats['transactions']} captured retransmissions)")
+    print(f"Responses:          {stats['answered']} ({stats['response_rate'] * 100:.1f}%)")
+    print(f"Unanswered:         {stats['unanswered']}")
+    if stats['stray']:
+        print(f"Unmatched replies:  {stats['stray']}")
+    print()
+    print(f"{'Message':<12} {'Sent':>7} {'Trans':>7} {'Replies':>8} "
+          f"{'p50':>10} {'p95':>10} {'p99':>10} {'max':>10}")
+    for name, row in stats['messages'].items():
+        print(f"{name:<12} {row['transmissions']:>7} {row['transactions']:>7} {row['answered']:>8} "
+              f"{format_ms(row['p50']):>10} "
+              f"{format_ms(row['p95']):>10} {format_ms(row['p99']):>10} {format_ms(row['max']):>10}")
+    print("="*80)
+
+
+def benchmark_builders(interface="eth0", count=2000, base_mac=None, relay_address=None,
+                       rapid_commit=False):
+    """Compare packets/s of the scapy and byte-template builders and check identical output"""
+    base_mac = base_mac or get_interface_mac(interface)
+    clients = [
+        DHCPv6RPDClient(interface, mac_for_index(base_mac, index), transaction_id=index + 1,
+                        rapid_commit=rapid_commit)
+        for index in range(count)
+    ]
+    peer_address = clients[0].get_local_ipv6(quiet=True) if relay_address else None
+    template = SolicitTemplate.for_client(clients[0], relay_address, peer_address)
+    
+    start = time.perf_counter()
+    scapy_frames = [bytes(client.create_frame(relay_address, peer_address)) for client in clients]
+    scapy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    template_frames = [template.build_for(client) for client in clients]
+    template_time = time.perf_counter() - start
+    
+    mismatches = sum(1 for a, b in zip(scapy_frames, template_frames) if a != b)
+    
+    print("="*80)
+    print("PACKET BUILDER BENCHMARK")
+    print("="*80)
+    print(f"Mode:               {'Relay Forward via ' + relay_address if relay_address else 'Direct Multicast'}")
+    print(f"Packets:            {count} per builder")
+    print(f"scapy layers:       {count / scapy_time:>10.0f} packets/s")
+    print(f"byte template:      {count / template_time:>10.0f} packets/s "
+          f"({scapy_time / template_time:.1f}x)")
+    if mismatches:
+        print(f"✗ {mismatches} of {count} frames differ from the scapy output")
+    else:
+        print(f"✓ All {count} frames byte-identical to the scapy output")
+    print("="*80)
+    return mismatches == 0
+
+
+# Probe path timed in a fresh interpreter by benchmark_startup(): import the tool and
+# build the first Solicit exactly as send_solicit() does on the UDP transport
+_STARTUP_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {directory!r})
+import dhcpv6_rpd_client as tool
+imported = time.perf_counter()
+client = tool.DHCPv6RPDClient({interface!r}, {mac!r})
+peer = tool.get_local_ipv6({interface!r}, quiet=True) if {relay!r} else None
+template = tool.SolicitTemplate.for_client(client, {relay!r}, peer, with_headers=False)
+template.build_message_for(client)
+built = time.perf_counter()
+print(json.dumps({{"import": imported - start, "build": built - imported,
+                  "scapy": sorted(name for name in sys.modules if name.startswith("scapy"))}}))
+'''
+
+
+def benchmark_startup(interface="eth0", runs=5, base_mac=None, relay_address=None):
+    """
+    Time the probe's startup in fresh interpreters (as Nagios/cron run it) against the
+    cost of importing scapy, and check that the default probe path never loads scapy
+    """
+    import subprocess
+    
+    def timed(code):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, '-c', code], check=True,
+                                stdout=subprocess.PIPE, text=True).stdout
+        return time.perf_counter() - start, output
+    
+    def median(values):
+        return sorted(values)[len(values) // 2]
+    
+    code = _STARTUP_PROBE.format(directory=os.path.dirname(os.path.abspath(__file__)),
+                                 interface=interface, mac=base_mac, relay=relay_address)
+    totals, imports, builds = [], [], []
+    scapy_modules = set()
+    for _ in range(runs):
+        total, output = timed(code)
+        probe = json.loads(output)
+        totals.append(total)
+        imports.append(probe['import'])
+        builds.append(probe['build'])
+        scapy_modules.update(probe['scapy'])
+    scapy_times = [timed('import scapy.all')[0] for _ in range(runs)]
+    
+    print("="*80)
+    print("STARTUP BENCHMARK")
+    print("="*80)
+    print(f"Mode:               {'Relay Forward via ' + relay_address if relay_address else 'Direct Multicast'}")
+    print(f"Runs:               {runs} fresh interpreters each (median)")
+    print(f"Probe startup:      {format_ms(median(totals)):>10}  interpreter to first Solicit built")
+    print(f"  module import:    {format_ms(median(imports)):>10}")
+    print(f"  first Solicit:    {format_ms(median(builds)):>10}")
+    print(f"scapy.all import:   {format_ms(median(scapy_times)):>10}  interpreter plus 'import scapy.all'")
+    if scapy_modules:
+        print(f"✗ The probe path loaded scapy ({len(scapy_modules)} modules, e.g. {min(scapy_modules)})")
+    else:
+        print("✓ scapy is not loaded on the probe path")
+    print("="*80)
+    return not scapy_modules
+
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description='DHCPv6 RPD Client Simulator - Simulate RPD device requesting DHCPv6 configuration'
+    )
+    parser.add_argument('-i', '--interface', default='eth0',
+                      help='Network interface to use (default: eth0)')
+    parser.add_argument('-r', '--relay', 
+                      help='Relay agent IPv6 address (optional, uses multicast if not specified); '
+                           'comma-separated list with --probe-daemon and --failover')
+    parser.add_argument('-m', '--mac',
+                      help='Client MAC address (optional, uses interface MAC if not specified)')
+    parser.add_argument('-t', '--timeout', type=float, default=5,
+                      help='Response timeout in seconds (default: 5)')
+    parser.add_argument('-l', '--local-address',
+                      help='Local IPv6 address to relay from (default: first global address on the '
+                           'interface); a comma-separated list gives each --workers process its own')
+    parser.add_argument('--rapid-commit', action='store_true',
+                      help='Include Rapid Commit in the Solicit and accept a committed Reply '
+                           '(with --responder: commit Solicits that carry it)')
+    parser.add_argument('--jsonl', metavar='FILE', nargs='?', const='-',
+                      help='Write one JSON record per exchange (timestamps, latency, address, 4491 '
+                           'sub-options) to FILE, or to stdout with human-readable output moved to stderr')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                      help='Print nothing; report only through the exit status and --jsonl')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                      help='Also print one line per exchange in load and daemon modes')
+    parser.add_argument('--transport', choices=['udp', 'scapy'], default='udp',
+                      help='udp: IPv6 UDP sockets on port 546 (547 with --relay); '
+                           'scapy: L2 send + libpcap capture (default: udp, falls back to scapy '
+                           'if the port cannot be bound)')
+    
+    modes = parser.add_argument_group('load testing')
+    modes.add_argument('--load', type=int, metavar='N',
+                      help='Load mode: simulate N RPDs, each with its own MAC, DUID and transaction ID '
+                           '(MACs count up from --mac)')
+    modes.add_argument('--rate', type=float, default=0,
+                      help='Target Solicits per second in load mode (default: as fast as possible) '
+                           'and with --failover (default: 10)')
+    modes.add_argument('--engine', choices=['threaded', 'asyncio'], default='threaded',
+                      help='Load mode engine: threaded sender + receiver thread, or asyncio with '
+                           'one coroutine per RPD (default: threaded)')
+    modes.add_argument('--relay-table', metavar='FILE',
+                      help='Load mode: CSV/JSON of relay links (link_address, interface_id, subnet) '
+                           'to spread the RPDs across; Relay-Forwards still go to --relay')
+    modes.add_argument('--profiles', metavar='FILE',
+                      help='Load mode: weighted client population profiles (JSON) with their own '
+                           'user class, vendor class, vendor sub-options, ORO and options, reported '
+                           'per profile')
+    modes.add_argument('--workers', type=int, default=1, metavar='N',
+                      help='Load mode: shard the RPDs across N processes with disjoint MAC, trid and '
+                           'relay address or port ranges, and merge their results (needs --relay)')
+    modes.add_argument('--worker-port', type=int, default=10547,
+                      help='First relay source port when workers (or daemon relays) outnumber --local-address entries '
+                           '(default: 10547)')
+    modes.add_argument('--concurrency', type=int,
+                      help='Maximum outstanding transactions on the asyncio engine '
+                           '(default: 1000, all RPDs in storm mode, 200 with --verify)')
+    modes.add_argument('--lifecycle', action='store_true',
+                      help='Load mode: run the full lease lifecycle (Solicit/Advertise/Request/Reply, '
+                           'Renew at T1, Rebind at T2) per RPD on the asyncio engine')
+    modes.add_argument('--renewals', type=int, default=1,
+                      help='Renew/Rebind cycles per RPD in lifecycle mode (default: 1)')
+    modes.add_argument('--time-scale', type=float, default=1.0,
+                      help='Divide lease timers by this factor in lifecycle mode, e.g. 1440 replays '
+                           'a 24 h lease in one minute (default: 1)')
+    modes.add_argument('--rebind-ratio', type=float, default=0.0,
+                      help='Share of renewal cycles that skip Renew and Rebind at T2 (default: 0)')
+    modes.add_argument('--finish', choices=['release', 'decline'],
+                      help='End each lifecycle with a Release or Decline')
+    modes.add_argument('--retransmit', action='store_true',
+                      help='Retransmit lifecycle, --verify and --failover messages on the RFC 8415 '
+                           'schedule')
+    modes.add_argument('--storm', action='store_true',
+                      help='Load mode: reboot storm, all RPDs restart within --window and retransmit '
+                           'per RFC 8415 until bound')
+    modes.add_argument('--window', type=float, default=10.0,
+                      help='Seconds over which storm RPDs restart (default: 10)')
+    modes.add_argument('--deadline', type=float, default=300.0,
+                      help='Seconds after which the storm run stops (default: 300)')
+    modes.add_argument('--compare-rapid-commit', action='store_true',
+                      help='Load mode: bind N RPDs with the four-message exchange, then N more with '
+                           'Rapid Commit, and report the difference')
+    modes.add_argument('--builder', choices=['template', 'scapy'], default='template',
+                      help='Packet builder for load mode with --transport scapy (default: template)')
+    modes.add_argument('--bench-builder', type=int, metavar='N', nargs='?', const=2000,
+                      help='Benchmark the scapy and byte-template builders over N packets '
+                           '(default: 2000) and verify identical output')
+    modes.add_argument('--bench-decoder', type=int, metavar='N', nargs='?', const=20000,
+                      help='Benchmark the struct response decoder against scapy dissection '
+                           'over N replies (default: 20000)')
+    modes.add_argument('--bench-startup', type=int, metavar='N', nargs='?', const=5,
+                      help='Time the probe from interpreter start to the first Solicit over N fresh '
+                           'processes (default: 5) against the scapy import, and fail if the '
+                           'probe path loads scapy')
+    modes.add_argument('--analyze', metavar='PCAP',
+                      help='Analyze a pcap/pcapng capture of DHCPv6 traffic: server latency, unanswered '
+                           'requests and retransmissions per relay, link and subnet')
+    modes.add_argument('--analyze-timeout', type=float, default=30.0,
+                      help='Seconds of capture time after which a request counts as unanswered '
+                           '(default: 30)')
+    modes.add_argument('--subnet-prefix-len', type=int, default=64,
+                      help='Prefix length that groups link addresses into subnets with --analyze '
+                           '(default: 64)')
+    modes.add_argument('--replay', metavar='PCAP',
+                      help='Resend the client messages of a pcap/pcapng capture to --relay')
+    modes.add_argument('--speed', type=float, default=1.0,
+                      help='Replay speed: 1 = original timing, 10 = ten times faster, 0 = as fast '
+                           'as possible (default: 1)')
+    modes.add_argument('--rewrite', action='store_true',
+                      help='Replace transaction IDs and client DUIDs so every replay creates fresh bindings')
+    modes.add_argument('--replay-messages', default='solicit',
+                      help='Comma-separated client message types to replay, or "all" (default: solicit)')
+    modes.add_argument('--verify', metavar='FILE',
+                      help='Verify host reservations: solicit from every MAC in a CSV/JSON export '
+                           '(mac, relay, address, opt_<code>) through --relay and diff the Advertise')
+    modes.add_argument('--verify-diff', metavar='FILE',
+                      help='Write all verification differences to FILE as CSV')
+    modes.add_argument('--probe-daemon', action='store_true',
+                      help='Run as a resident probe: solicit through each --relay (and --relay-table '
+                           'link) every --interval seconds and serve Prometheus metrics')
+    modes.add_argument('--interval', type=float, default=60.0,
+                      help='Seconds between probes of each target in daemon mode (default: 60)')
+    modes.add_argument('--metrics-listen', default='::1',
+                      help='Address the daemon serves /metrics on (default: ::1)')
+    modes.add_argument('--metrics-port', type=int, default=9547,
+                      help='Port the daemon serves /metrics on (default: 9547)')
+    modes.add_argument('--failover', action='store_true',
+                      help='Probe an HA pair at a fixed --rate, sending every Solicit to each --relay '
+                           'address, and report lost/late replies, unanswered windows and recovery times')
+    modes.add_argument('--duration', type=float, default=0,
+                      help='Seconds to probe with --failover (default: until interrupted)')
+    modes.add_argument('--late', type=float, default=0.1,
+                      help='Seconds after which a --failover reply counts as late (default: 0.1)')
+    modes.add_argument('--responder', action='store_true',
+                      help='Run a local DHCPv6 responder stand-in instead of the client')
+    modes.add_argument('--listen', default='::',
+                      help='Address the responder binds to (default: ::)')
+    modes.add_argument('--port', type=int, default=DHCPV6_SERVER_PORT,
+                      help=f'UDP port the responder binds to (default: {DHCPV6_SERVER_PORT})')
+    modes.add_argument('--pool-prefix', default='2001:db8:1::',
+                      help='Prefix the responder hands out addresses from (default: 2001:db8:1::)')
+    modes.add_argument('--ha-standby', metavar='PARTNER',
+                      help='Run the responder as hot-standby peer of the responder at PARTNER: serve '
+                           'only once PARTNER has not answered heartbeats for --max-response-delay')
+    modes.add_argument('--heartbeat-delay', type=float, default=1.0,
+                      help='Seconds between the standby responder\'s heartbeats (default: 1)')
+    modes.add_argument('--max-response-delay', type=float, default=3.0,
+                      help='Seconds without a heartbeat answer before the standby responder serves '
+                           '(default: 3)')
+    
+    args = parser.parse_args()
+    local_addresses = args.local_address.split(',') if args.local_address else None
+    local_address = local_addresses[0] if local_addresses else None
+    
+    verbosity = 0 if args.quiet else 1 + args.verbose
+    exchange_log = None
+    if args.jsonl:
+        exchange_log = ExchangeLog(args.jsonl)
+    elif verbosity >= 2:
+        exchange_log = ExchangeLog(fmt='text')
+    if not verbosity:
+        sys.stdout = open(os.devnull, 'w')
+    elif args.jsonl == '-':
+        # stdout carries the records; everything meant for a human goes to stderr
+        sys.stdout = sys.stderr
+    
+    print("\n" + "="*80)
+    print("DHCPv6 RPD CLIENT SIMULATOR")
+    print("="*80 + "\n")
     
     try:
+        if args.responder:
+            DHCPv6Responder(
+                listen=args.listen,
+                port=args.port,
+                pool_prefix=args.pool_prefix,
+                interface=args.interface,
+                rapid_commit=args.rapid_commit,
+                ha_partner=args.ha_standby,
+                heartbeat_delay=args.heartbeat_delay,
+                max_response_delay=args.max_response_delay
+            ).serve_forever()
+            sys.exit(0)
+        
+        if args.verify:
+            if not args.relay:
+                parser.error("--verify needs --relay")
+            reservations = load_reservations(args.verify, args.interface)
+            print(f"Verifying {len(reservations)} reservations from {args.verify} via {args.relay}")
+            stats = ReservationVerifier(
+                interface=args.interface,
+                relay_address=args.relay,
+                local_address=local_address,
+                concurrency=args.concurrency or 200,
+                timeout=args.timeout,
+                retransmit=args.retransmit,
+                rapid_commit=args.rapid_commit,
+                exchange_log=exchange_log
+            ).run(reservations)
+            print_verification_report(stats)
+            if args.verify_diff:
+                write_verification_diff(stats, args.verify_diff)
+            sys.exit(0 if stats['outcomes']['ok'] == stats['reservations'] else 1)
+        
+        if args.probe_daemon:
+            relay_addresses = list(dict.fromkeys(args.relay.split(','))) if args.relay else None
+            relays = None
+            if args.relay_table:
+                if not args.relay:
+                    parser.error("--relay-table needs --relay")
+                relays = load_relay_table(args.relay_table)
+            ProbeDaemon(
+                interface=args.interface,
+                relay_addresses=relay_addresses,
+                local_addresses=local_addresses,
+                base_mac=args.mac,
+                interval=args.interval,
+                timeout=args.timeout,
+                rapid_commit=args.rapid_commit,
+                relays=relays,
+                listen=args.metrics_listen,
+                metrics_port=args.metrics_port,
+                base_port=args.worker_port,
+                exchange_log=exchange_log
+            ).run()
+            sys.exit(0)
+        
+        if args.failover:
+            stats = FailoverProbe(
+                interface=args.interface,
+                relay_addresses=list(dict.fromkeys(args.relay.split(','))) if args.relay else None,
+                local_addresses=local_addresses,
+                base_mac=args.mac,
+                rate=args.rate or 10.0,
+                duration=args.duration,
+                timeout=args.timeout,
+                late=args.late,
+                retransmit=args.retransmit,
+                rapid_commit=args.rapid_commit,
+                base_port=args.worker_port,
+                exchange_log=exchange_log
+            ).run()
+            print_failover_report(stats)
+            sys.exit(0 if stats['answered'] and stats['recovered'] else 1)
+        
+        if args.analyze:
+            stats = CaptureAnalyzer(timeout=args.analyze_timeout,
+                                    subnet_prefix_len=args.subnet_prefix_len).analyze(args.analyze)
+            print_capture_report(stats)
+            sys.exit(0 if stats['dhcpv6_packets'] else 1)
+        
+        if args.replay:
+            if not args.relay:
+                parser.error("--replay needs --relay (the server or relay to send to)")
+            if args.replay_messages == 'all':
+                messages = CLIENT_REQUEST_TYPES
+            else:
+                names = {name.lower(): code for code, name in MESSAGE_TYPES.items()}
+                requested = [name.strip().lower() for name in args.replay_messages.split(',')]
+                unknown = [name for name in requested if name not in names]
+                if unknown:
+                    parser.error(f"Unknown message type(s) for --replay-messages: {', '.join(unknown)}")
+                messages = tuple(names[name] for name in requested)
+            stats = CaptureReplay(
+                args.replay,
+                interface=args.interface,
+                relay_address=args.relay,
+                local_address=local_address,
+                speed=args.speed,
+                rewrite=args.rewrite,
+                messages=messages,
+                timeout=args.timeout
+            ).run()
+            print_replay_report(stats)
+            sys.exit(0 if stats['answered'] else 1)
+        
+        if args.bench_builder:
+            identical = benchmark_builders(
+                interface=args.interface,
+                count=args.bench_builder,
+                base_mac=args.mac,
+                relay_address=args.relay,
+                rapid_commit=args.rapid_commit
+            )
+            sys.exit(0 if identical else 1)
+        
+        if args.bench_decoder:
+            benchmark_decoder(args.bench_decoder)
+            sys.exit(0)
+        
+        if args.bench_startup:
+            lean = benchmark_startup(
+                interface=args.interface,
+                runs=args.bench_startup,
+                base_mac=args.mac,
+                relay_address=args.relay
+            )
+            sys.exit(0 if lean else 1)
+        
+        if args.load:
+            print(f"Simulating {args.load} RPDs on {args.interface} "
+                  f"({'relay ' + args.relay if args.relay else 'direct multicast'})")
+            options = dict(
+                interface=args.interface,
+                count=args.load,
+                base_mac=args.mac,
+                relay_address=args.relay,
+                rate=args.rate,
+                timeout=args.timeout,
+                local_address=local_address,
+                exchange_log=exchange_log
+            )
+            if args.compare_rapid_commit:
+                runs = compare_rapid_commit(concurrency=args.concurrency or 1000, **options)
+                print_rapid_commit_comparison(runs)
+                sys.exit(0 if all(run['bind'] for run in runs.values()) else 1)
+            options['rapid_commit'] = args.rapid_commit
+            if args.relay_table:
+                if not args.relay:
+                    parser.error("--relay-table needs --relay")
+                options['relays'] = load_relay_table(args.relay_table)
+                print(f"Emulating {len(options['relays'])} relay links from {args.relay_table}")
+            if args.profiles:
+                options['profiles'] = load_profiles(args.profiles)
+                print(f"Client population: {', '.join(profile.name for profile in options['profiles'])}")
+            if args.storm:
+                generator_class, print_report = StormLoadGenerator, print_storm_report
+                options.update(
+                    window=args.window,
+                    deadline=args.deadline,
+                    concurrency=args.concurrency or args.load
+                )
+            elif args.lifecycle:
+                generator_class, print_report = LifecycleLoadGenerator, print_lifecycle_report
+                options.update(
+                    renewals=args.renewals,
+                    time_scale=args.time_scale,
+                    rebind_ratio=args.rebind_ratio,
+                    finish=args.finish,
+                    retransmit=args.retransmit,
+                    concurrency=args.concurrency or 1000
+                )
+            elif args.engine == 'asyncio':
+                generator_class, print_report = AsyncLoadGenerator, print_load_report
+                options['concurrency'] = args.concurrency or 1000
+            else:
+                generator_class, print_report = LoadGenerator, print_load_report
+                options.update(builder=args.builder, transport=args.transport)
+            
+            if args.workers > 1:
+                stats = run_sharded(generator_class, args.workers, local_addresses, args.worker_port,
+                                    **options)
+            else:
+                stats = generator_class(**options).run()
+            print_report(stats)
+            if stats.get('relays'):
+                print_relay_report(stats['relays'])
+            if stats.get('profiles'):
+                print_profile_report(stats['profiles'])
+            sys.exit(0 if stats['bound' if args.storm else 'answered'] else 1)
+        
         client = DHCPv6RPDClient(
             interface=args.interface,
-            client_mac=args.mac
+            client_mac=args.mac,
+            rapid_commit=args.rapid_commit
         )
         
         response = client.send_solicit(
             relay_address=args.relay,
-            timeout=args.timeout
+            timeout=args.timeout,
+            transport=args.transport,
+            local_address=local_address,
+            verbosity=verbosity,
+            exchange_log=exchange_log
         )
+        if exchange_log is not None:
+            exchange_log.close()
         
         if response:
             print("\n✓ Successfully received DHCPv6 response")
@@ -452,11 +4522,13 @@ def main():
             sys.exit(1)
             
     except PermissionError:
-        print("\n✗ ERROR: This script requires root/administrator privileges")
-        print("   Run with: sudo python3 dhcpv6_rpd_client.py")
+        # Errors are reported even with --quiet
+        errors = sys.stdout if verbosity else sys.stderr
+        print("\n✗ ERROR: This script requires root/administrator privileges", file=errors)
+        print("   Run with: sudo python3 dhcpv6_rpd_client.py", file=errors)
         sys.exit(1)
     except Exception as e:
-        print(f"\n✗ ERROR: {e}")
+        print(f"\n✗ ERROR: {e}", file=sys.stdout if verbosity else sys.stderr)
         import traceback
         traceback.print_exc()
         sys.exit(1)
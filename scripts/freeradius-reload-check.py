@@ -6,13 +6,24 @@ Reads database credentials from FreeRADIUS SQL module configuration
 
 Install: sudo cp freeradius-reload-check.py /opt/scripts/
 Run: python3 /opt/scripts/freeradius-reload-check.py (via cron every 5 minutes)
+ or: python3 /opt/scripts/freeradius-reload-check.py --daemon (resident, polls every 0.5 s)
 """
 
 import sys
 import os
+import json
+import hashlib
+import hmac
+import ipaddress
+import random
+import shlex
 import signal
 import logging
 import re
+import socket
+import struct
+import threading
+import time
 from datetime import datetime
 
 # Auto-install MySQL connector if not available
@@ -47,8 +58,84 @@ FREERADIUS_SQL_CONFIGS = [
 
 LOG_FILE = '/var/log/freeradius-reload.log'
 FREERADIUS_PID_FILE = '/var/run/radiusd/radiusd.pid'  # or /var/run/freeradius/freeradius.pid
+
+# Daemon mode (--daemon): flag poll interval and reconnect backoff, in seconds
+DAEMON_POLL_INTERVAL = 0.5
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 60
+RELOAD_RETRY_INTERVAL = 30  # after a failed HUP, while the flag stays set
+RELOAD_DEBOUNCE = 1.0       # reload once no new change generation was seen for this long
+MIN_HUP_INTERVAL = 10       # minimum time between two HUPs
+RELOAD_MAX_DELAY = 60       # reload anyway after this long, even while changes keep coming
+SYSTEMD_UNIT_FILE = '/etc/systemd/system/freeradius-reload-check.service'
+
+# Fan-out mode (--servers): parallel database connections and per-server timeout in seconds
+FANOUT_PARALLEL = 8
+FANOUT_SERVER_TIMEOUT = 10
+
+# Readiness probe after each HUP: RADIUS Status-Server (RFC 5997) requests until the server
+# answers. Needs status_server = yes (radiusd.conf) and a client entry for this host with
+# STATUS_SERVER_SECRET (the default localhost client in clients.conf)
+STATUS_SERVER = '127.0.0.1'
+STATUS_SERVER_PORT = 1812
+STATUS_SERVER_SECRET = 'testing123'
+READY_TIMEOUT = 10            # seconds to wait for an answer after the HUP, 0 disables the probe
+STATUS_PROBE_INTERVAL = 0.1   # seconds between Status-Server requests
+HISTORY_DAYS = 30             # default period of --reload-history
+
+# radpostauth pruning (--prune-radpostauth): rows per DELETE and pause between DELETEs bound
+# the lock time of each batch and let replicas keep up
+PRUNE_BATCH_ROWS = 5000
+PRUNE_BATCH_SLEEP = 0.5
+PRUNE_PROGRESS_INTERVAL = 5   # seconds between progress lines
+PRUNE_STATE_FILE = '/var/lib/freeradius-reload-check/prune-radpostauth.json'  # resume point
 # =========================================
 
+# Primary key lookups of the single flag row, cheap enough to run several times a second.
+# change_generation is bumped by every NAS change (RadiusDatabaseSync), applied_generation
+# records the generation the last reload covered (radius_add_reload_generation.sql)
+RELOAD_STATE_QUERY = ("SELECT needs_reload, change_generation, applied_generation "
+                      "FROM radius_reload_flag WHERE id = 1")
+RELOAD_FLAG_QUERY = "SELECT needs_reload FROM radius_reload_flag WHERE id = 1"
+MYSQL_ER_BAD_FIELD = 1054  # Unknown column
+
+# Order-independent checksum of the client set FreeRADIUS loads from nas (the columns of
+# its default client_query): row count plus the sum modulo 2^64 of a 64-bit hash per row.
+# A sum rather than XOR, because nasname is not unique in every schema
+# (setup-radius-mysql.sh) and duplicate rows would cancel out in an XOR. Row ids are left
+# out, so re-inserting identical clients keeps the fingerprint. Only run when a reload is pending.
+NAS_FINGERPRINT_QUERY = """
+    SELECT COUNT(*), COALESCE(SUM(CAST(CONV(LEFT(SHA1(CONCAT_WS(CHAR(31),
+        nasname, IFNULL(shortname, ''), secret, IFNULL(type, ''), IFNULL(server, '')
+    )), 16), 16, 10) AS UNSIGNED)) % 18446744073709551616, 0)
+    FROM nas
+"""
+APPLIED_FINGERPRINT_QUERY = "SELECT applied_fingerprint FROM radius_reload_flag WHERE id = 1"
+
+# One row per reload (radius_add_reload_history.sql); a missing table only costs a warning
+RELOAD_HISTORY_INSERT = ("INSERT INTO radius_reload_history (generation, outcome, ready_ms, fingerprint) "
+                         "VALUES (%s, %s, %s, %s)")
+RELOAD_HISTORY_QUERY = ("SELECT reloaded_at, generation, outcome, ready_ms FROM radius_reload_history "
+                        "WHERE reloaded_at >= NOW() - INTERVAL %s DAY ORDER BY id")
+MYSQL_ER_NO_SUCH_TABLE = 1146
+
+# radpostauth pruning walks primary key ranges in ascending order. The end of each batch is
+# found on the primary key index; the DELETE then only touches rows inside that range.
+# Orphaned NAS addresses are worked out per batch in Python: a nas client may be a CIDR
+# range, which an equality join on nasname would miss
+PRUNE_BOUNDS_QUERY = "SELECT MIN(id), MAX(id), NOW() - INTERVAL %s SECOND FROM radpostauth"
+PRUNE_BATCH_END_QUERY = ("SELECT id FROM radpostauth WHERE id BETWEEN %s AND %s "
+                         "ORDER BY id LIMIT 1 OFFSET %s")
+PRUNE_NAS_COLUMN_QUERY = "SELECT nasipaddress FROM radpostauth LIMIT 0"
+PRUNE_BATCH_ADDRESSES_QUERY = "SELECT DISTINCT nasipaddress FROM radpostauth WHERE id BETWEEN %s AND %s"
+NAS_CLIENTS_QUERY = "SELECT nasname FROM nas"
+
+# RADIUS packet codes and attributes used by the Status-Server probe
+RADIUS_ACCESS_ACCEPT = 2
+RADIUS_ACCOUNTING_RESPONSE = 5
+RADIUS_STATUS_SERVER = 12
+RADIUS_MESSAGE_AUTHENTICATOR = 80
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -160,6 +247,241 @@ def send_hup_signal(pid):
         logging.error(f"Error sending HUP signal: {e}")
         return False
 
+def status_server_request(identifier, secret):
+    """
+    Build a Status-Server request. Returns (request authenticator, packet); RFC 5997
+    requires a Message-Authenticator, the HMAC-MD5 of the packet with the attribute zeroed.
+    """
+    authenticator = os.urandom(16)
+    header = struct.pack('!BBH', RADIUS_STATUS_SERVER, identifier, 20 + 18)
+    attribute = struct.pack('!BB', RADIUS_MESSAGE_AUTHENTICATOR, 18)
+    mac = hmac.new(secret, header + authenticator + attribute + bytes(16), hashlib.md5).digest()
+    return authenticator, header + authenticator + attribute + mac
+
+def message_authenticator_ok(packet, secret):
+    """Check the Message-Authenticator of a request; False if it has none"""
+    offset = 20
+    while offset + 2 <= len(packet):
+        attr_type, attr_length = packet[offset], packet[offset + 1]
+        if attr_length < 2:
+            return False
+        if attr_type == RADIUS_MESSAGE_AUTHENTICATOR and attr_length == 18:
+            zeroed = packet[:offset + 2] + bytes(16) + packet[offset + 18:]
+            expected = hmac.new(secret, zeroed, hashlib.md5).digest()
+            return hmac.compare_digest(expected, packet[offset + 2:offset + 18])
+        offset += attr_length
+    return False
+
+def status_server_reply_ok(reply, pending, secret):
+    """
+    Check a reply against the outstanding requests ({identifier: request authenticator}):
+    Access-Accept or Accounting-Response with a matching response authenticator
+    """
+    if len(reply) < 20:
+        return False
+    code, identifier, length = struct.unpack('!BBH', reply[:4])
+    if code not in (RADIUS_ACCESS_ACCEPT, RADIUS_ACCOUNTING_RESPONSE) or \
+            identifier not in pending or not 20 <= length <= len(reply):
+        return False
+    expected = hashlib.md5(reply[:4] + pending[identifier] + reply[20:length] + secret).digest()
+    return hmac.compare_digest(expected, reply[4:20])
+
+def wait_until_ready(host=None, port=None, secret=None, timeout=None):
+    """
+    Send Status-Server requests every STATUS_PROBE_INTERVAL until the server answers.
+    Requests are not retransmitted but kept outstanding, so a late answer to an earlier
+    one also counts. Returns the monotonic time of the first valid answer, None on timeout.
+    """
+    host = host or STATUS_SERVER
+    port = port or STATUS_SERVER_PORT
+    secret = (secret if secret is not None else STATUS_SERVER_SECRET).encode()
+    timeout = READY_TIMEOUT if timeout is None else timeout
+    
+    family, socktype, proto, _, address = socket.getaddrinfo(host, port, type=socket.SOCK_DGRAM)[0]
+    sock = socket.socket(family, socktype, proto)
+    try:
+        sock.connect(address)
+        deadline = time.monotonic() + timeout
+        next_probe = 0
+        identifier = random.randrange(256)
+        pending = {}
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return None
+            if now >= next_probe:
+                identifier = (identifier + 1) % 256
+                pending[identifier], packet = status_server_request(identifier, secret)
+                try:
+                    sock.send(packet)
+                except OSError:
+                    pass  # ICMP unreachable from an earlier request while the server restarts
+                next_probe = now + STATUS_PROBE_INTERVAL
+            
+            sock.settimeout(max(0.001, min(next_probe, deadline) - now))
+            try:
+                reply = sock.recv(4096)
+            except (socket.timeout, ConnectionRefusedError):
+                continue
+            if status_server_reply_ok(reply, pending, secret):
+                return time.monotonic()
+    finally:
+        sock.close()
+
+def connect_database(db_config, **options):
+    """Open a pymysql connection to the radius database described by db_config"""
+    return mysql_connector.connect(
+        host=db_config['host'],
+        port=db_config['port'],
+        user=db_config['user'],
+        password=db_config['password'],
+        database=db_config['database'],
+        **options
+    )
+
+def read_reload_state(cursor, legacy=False):
+    """
+    Read the reload flag row as {'pending', 'generation', 'applied'}, or None without a row.
+    A reload is pending while change_generation is ahead of applied_generation (or the
+    boolean flag is set). Without the generation columns (legacy, or detected here)
+    only needs_reload is read and generation/applied are None.
+    """
+    if not legacy:
+        try:
+            cursor.execute(RELOAD_STATE_QUERY)
+            row = cursor.fetchone()
+            if not row:
+                return None
+            needs_reload, generation, applied = row
+            return {'pending': bool(needs_reload) or generation > applied,
+                    'generation': generation, 'applied': applied}
+        except mysql_connector.MySQLError as e:
+            if not e.args or e.args[0] != MYSQL_ER_BAD_FIELD:
+                raise
+            logging.warning("radius_reload_flag has no change_generation column - run "
+                            "radius_add_reload_generation.sql; using the needs_reload flag only")
+    
+    cursor.execute(RELOAD_FLAG_QUERY)
+    row = cursor.fetchone()
+    if not row:
+        return None
+    return {'pending': bool(row[0]), 'generation': None, 'applied': None}
+
+def nas_fingerprint(cursor):
+    """Return the fingerprint of the nas client set ('<rows>:<64-bit hex>')"""
+    cursor.execute(NAS_FINGERPRINT_QUERY)
+    count, checksum = cursor.fetchone()
+    return f"{int(count)}:{int(checksum):016x}"
+
+def read_applied_fingerprint(cursor):
+    """
+    Return the nas fingerprint the last reload applied ('' before the first one),
+    or None if radius_reload_flag has no applied_fingerprint column
+    """
+    try:
+        cursor.execute(APPLIED_FINGERPRINT_QUERY)
+    except mysql_connector.MySQLError as e:
+        if not e.args or e.args[0] != MYSQL_ER_BAD_FIELD:
+            raise
+        logging.warning("radius_reload_flag has no applied_fingerprint column - run "
+                        "radius_add_reload_fingerprint.sql; reloading without fingerprint check")
+        return None
+    row = cursor.fetchone()
+    return (row[0] or '') if row else ''
+
+def clear_reload_flag(conn, cursor, generation=None, fingerprint=None, reloaded=True):
+    """
+    Clear the reload flag after a reload (or a skipped one). With the change generation
+    read before the HUP, only that generation is marked applied: a change committed
+    meanwhile keeps the flag set for the next reload. The nas fingerprint the reload
+    loaded is stored next to it.
+    """
+    if generation is None:
+        assignments, params = ["needs_reload = FALSE"], []
+    else:
+        assignments = ["applied_generation = GREATEST(applied_generation, %s)",
+                       "needs_reload = (change_generation > %s)"]
+        params = [generation, generation]
+    if fingerprint is not None:
+        assignments.append("applied_fingerprint = %s")
+        params.append(fingerprint)
+    if reloaded:
+        assignments.append("last_reload = NOW()")
+    cursor.execute(f"UPDATE radius_reload_flag SET {', '.join(assignments)} WHERE id = 1", params)
+    conn.commit()
+
+def record_reload(conn, cursor, generation, outcome, ready_ms=None, fingerprint=None):
+    """Add a row to radius_reload_history; without the table only a warning is logged"""
+    try:
+        cursor.execute(RELOAD_HISTORY_INSERT,
+                       (generation, outcome, None if ready_ms is None else round(ready_ms), fingerprint))
+        conn.commit()
+    except mysql_connector.MySQLError as e:
+        if not e.args or e.args[0] != MYSQL_ER_NO_SUCH_TABLE:
+            raise
+        logging.warning("No radius_reload_history table - run radius_add_reload_history.sql "
+                        "to keep reload timings")
+
+def reload_and_clear_flag(conn, cursor, hup=None, server_name=None, generation=None, status_host=None,
+                          ready_timeout=None, status_port=None, status_secret=None):
+    """
+    Reload FreeRADIUS and clear the reload flag. Returns 'reloaded', 'unready' when the
+    HUP was sent but the server did not answer Status-Server within ready_timeout
+    seconds (default READY_TIMEOUT), 'skipped' when the nas client set has the
+    fingerprint of the last reload (no HUP needed), or False on failure. hup()
+    replaces the local HUP (e.g. a remote hook) and returns True once sent;
+    status_host, status_port and status_secret replace the STATUS_SERVER* settings
+    of the probe. Every outcome is added to radius_reload_history.
+    """
+    prefix = f"[{server_name}] " if server_name else ""
+    applied_fingerprint = read_applied_fingerprint(cursor)
+    fingerprint = nas_fingerprint(cursor) if applied_fingerprint is not None else None
+    if fingerprint is not None and fingerprint == applied_fingerprint:
+        clear_reload_flag(conn, cursor, generation, reloaded=False)
+        logging.info(f"{prefix}nas clients unchanged since the last reload (fingerprint "
+                     f"{fingerprint}) - skipping HUP, flag cleared")
+        record_reload(conn, cursor, generation, 'skipped', fingerprint=fingerprint)
+        return 'skipped'
+    
+    if hup is None:
+        pid = get_freeradius_pid()
+        if not pid:
+            logging.error(f"{prefix}Cannot reload: FreeRADIUS PID not found")
+            record_reload(conn, cursor, generation, 'failed', fingerprint=fingerprint)
+            return False
+        
+        logging.info(f"{prefix}Sending HUP signal to PID {pid}...")
+        hup = lambda: send_hup_signal(pid)
+    hup_at = time.monotonic()
+    if not hup():
+        logging.error(f"{prefix}✗ Failed to send HUP signal to FreeRADIUS")
+        record_reload(conn, cursor, generation, 'failed', fingerprint=fingerprint)
+        return False
+    
+    # The HUP was delivered: clear the flag whether or not the server comes back, a second
+    # HUP would not help. The reload runs asynchronously, so ready_ms is a lower bound
+    ready_ms = None
+    ready_timeout = READY_TIMEOUT if ready_timeout is None else ready_timeout
+    if ready_timeout > 0:
+        ready_at = wait_until_ready(status_host, status_port, status_secret, ready_timeout)
+        if ready_at is None:
+            clear_reload_flag(conn, cursor, generation, fingerprint)
+            logging.error(f"{prefix}✗ FreeRADIUS did not answer Status-Server on "
+                          f"{status_host or STATUS_SERVER}:{status_port or STATUS_SERVER_PORT} within "
+                          f"{ready_timeout:g}s after the HUP - flag cleared, check the server")
+            record_reload(conn, cursor, generation, 'unready', fingerprint=fingerprint)
+            return 'unready'
+        ready_ms = (ready_at - hup_at) * 1000
+    
+    clear_reload_flag(conn, cursor, generation, fingerprint)
+    ready = f", ready after {ready_ms:.0f} ms" if ready_ms is not None else ""
+    if generation is None:
+        logging.info(f"{prefix}✓ FreeRADIUS reloaded successfully{ready}, flag cleared")
+    else:
+        logging.info(f"{prefix}✓ FreeRADIUS reloaded successfully{ready}, generation {generation} applied")
+    record_reload(conn, cursor, generation, 'sent' if ready_ms is None else 'ready', ready_ms, fingerprint)
+    return 'reloaded'
+
 def check_and_reload():
     """Check database flag and reload FreeRADIUS if needed"""
     logging.info("=" * 60)
@@ -179,55 +501,28 @@ def check_and_reload():
         
         # Connect to local radius database
         logging.info(f"Connecting to database {db_config['database']} at {db_config['host']}:{db_config['port']}")
-        conn = mysql_connector.connect(
-            host=db_config['host'],
-            port=db_config['port'],
-            user=db_config['user'],
-            password=db_config['password'],
-            database=db_config['database']
-        )
+        conn = connect_database(db_config)
         cursor = conn.cursor()
         logging.info("Database connection established successfully")
         
         # Check if reload is needed
         logging.info("Checking reload flag in database...")
-        cursor.execute("SELECT needs_reload FROM radius_reload_flag WHERE id = 1")
-        result = cursor.fetchone()
+        state = read_reload_state(cursor)
         
-        if not result:
+        if not state:
             logging.error("No reload flag found in database - table may not be created")
             return
         
-        needs_reload = result[0]
-        logging.info(f"Reload flag value: {needs_reload}")
+        if state['generation'] is None:
+            logging.info(f"Reload flag value: {state['pending']}")
+        else:
+            logging.info(f"Reload pending: {state['pending']} (change generation "
+                         f"{state['generation']}, applied {state['applied']})")
         
-        if needs_reload:
+        if state['pending']:
             logging.info("✓ Reload flag is SET - proceeding with FreeRADIUS reload")
-            
-            # Get FreeRADIUS PID
-            logging.info("Looking for FreeRADIUS process...")
-            pid = get_freeradius_pid()
-            if not pid:
-                logging.error("Cannot reload: FreeRADIUS PID not found")
-                return
-            
-            logging.info(f"Found FreeRADIUS process with PID: {pid}")
-            
-            # Send HUP signal
-            logging.info(f"Sending HUP signal to PID {pid}...")
-            if send_hup_signal(pid):
-                # Clear the flag and update last_reload timestamp
-                logging.info("Clearing reload flag in database...")
-                cursor.execute("""
-                    UPDATE radius_reload_flag 
-                    SET needs_reload = FALSE, last_reload = NOW() 
-                    WHERE id = 1
-                """)
-                conn.commit()
-                logging.info("✓ FreeRADIUS reloaded successfully, flag cleared")
+            if reload_and_clear_flag(conn, cursor, generation=state['generation']):
                 logging.info("=" * 60)
-            else:
-                logging.error("✗ Failed to send HUP signal to FreeRADIUS")
         else:
             logging.info("No reload needed - flag is not set")
             logging.info("=" * 60)
@@ -242,6 +537,668 @@ def check_and_reload():
         if conn:
             conn.close()
 
+def run_daemon(interval=DAEMON_POLL_INTERVAL, debounce=RELOAD_DEBOUNCE, min_hup_interval=MIN_HUP_INTERVAL):
+    """
+    Resident replacement for the cron poll: parse the SQL config once, keep one
+    autocommit connection open and check the flag every `interval` seconds.
+    A lost connection is reopened with exponential backoff; any other error is
+    logged with its traceback and the poll retried after the same kind of backoff.
+    SIGTERM/SIGINT stop the loop between polls. Only reloads, connection changes
+    and errors are logged.
+    
+    Changes are coalesced: the HUP waits until the change generation has not moved
+    for `debounce` seconds (at most RELOAD_MAX_DELAY after the first change), and
+    two HUPs are at least `min_hup_interval` seconds apart. A bulk import therefore
+    costs one reload.
+    """
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logging.info(f"Received {signal.Signals(signum).name}, stopping reload daemon")
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    db_config = parse_freeradius_sql_config()
+    if not db_config['password']:
+        logging.error("No database password found in FreeRADIUS config - cannot proceed")
+        return False
+    
+    logging.info(f"Reload daemon started, checking {db_config['database']} at "
+                 f"{db_config['host']}:{db_config['port']} every {interval:g}s "
+                 f"(debounce {debounce:g}s, at most one HUP per {min_hup_interval:g}s)")
+    conn = None
+    backoff = RECONNECT_BACKOFF_MIN
+    error_backoff = RECONNECT_BACKOFF_MIN
+    retry_at = 0
+    legacy = False
+    pending = None     # first seen / last changed (monotonic) and generation of pending changes
+    last_hup_at = None
+    
+    while not stop.is_set():
+        try:
+            if conn is None:
+                try:
+                    # Autocommit: otherwise every poll would read the snapshot of one
+                    # long-running REPEATABLE READ transaction and never see the flag change
+                    conn = connect_database(db_config, autocommit=True, connect_timeout=5,
+                                            read_timeout=10, write_timeout=10)
+                    logging.info("Database connection established")
+                    backoff = RECONNECT_BACKOFF_MIN
+                    legacy = False
+                except mysql_connector.MySQLError as e:
+                    logging.error(f"Database connection failed: {e} - retrying in {backoff}s")
+                    stop.wait(backoff)
+                    backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+                    continue
+            
+            try:
+                with conn.cursor() as cursor:
+                    state = read_reload_state(cursor, legacy)
+                    now = time.monotonic()
+                    if not state:
+                        logging.error("No reload flag found in database - table may not be created")
+                        stop.wait(RELOAD_RETRY_INTERVAL)
+                        continue
+                    legacy = state['generation'] is None
+                    if not state['pending']:
+                        pending = None
+                    else:
+                        if pending is None:
+                            pending = {'since': now, 'changed': now, 'generation': state['generation']}
+                        elif state['generation'] != pending['generation']:
+                            pending['changed'] = now
+                            pending['generation'] = state['generation']
+                        
+                        settled = now - pending['changed'] >= debounce or \
+                            now - pending['since'] >= RELOAD_MAX_DELAY
+                        spaced = last_hup_at is None or now - last_hup_at >= min_hup_interval
+                        if settled and spaced and now >= retry_at:
+                            if legacy:
+                                logging.info("✓ Reload flag is SET - proceeding with FreeRADIUS reload")
+                            else:
+                                logging.info(f"✓ Reload pending for generation {state['generation']} "
+                                             f"({state['generation'] - state['applied']} changes coalesced, "
+                                             f"first {now - pending['since']:.1f}s ago) - reloading FreeRADIUS")
+                            outcome = reload_and_clear_flag(conn, cursor, generation=state['generation'])
+                            if outcome:
+                                if outcome in ('reloaded', 'unready'):
+                                    last_hup_at = now
+                                pending = None
+                            else:
+                                logging.warning(f"Flag left set, retrying reload in {RELOAD_RETRY_INTERVAL}s")
+                                retry_at = now + RELOAD_RETRY_INTERVAL
+            except mysql_connector.MySQLError as e:
+                logging.error(f"Database error: {e} - reconnecting")
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+                continue
+        except Exception:
+            # Anything else (a bug, an unexpected driver error) must not end the daemon
+            logging.exception(f"Unexpected error in reload daemon - retrying in {error_backoff}s")
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                conn = None
+            stop.wait(error_backoff)
+            error_backoff = min(error_backoff * 2, RECONNECT_BACKOFF_MAX)
+            continue
+        error_backoff = RECONNECT_BACKOFF_MIN
+        
+        stop.wait(interval)
+    
+    if conn is not None:
+        conn.close()
+    logging.info("Reload daemon stopped")
+    return True
+
+def load_server_list(path):
+    """
+    Load the RADIUS servers to fan out to from a JSON file: a list, or {"servers": [...]},
+    of entries in RadiusServerConfig::getServersForSync() format (name, enabled, host,
+    port, database, username, password). Optional status_host, status_port and
+    status_secret give the Status-Server probed after the HUP; without status_host the
+    probe is skipped. Returns connection configs for connect_database().
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('servers', [])
+    
+    servers = []
+    for index, entry in enumerate(data):
+        if 'host' not in entry:
+            raise ValueError(f"{path}: server entry {index + 1} has no host")
+        servers.append({
+            'name': entry.get('name') or entry['host'],
+            'enabled': bool(entry.get('enabled', True)),
+            'host': entry['host'],
+            'port': int(entry.get('port') or 3306),
+            'database': entry.get('database') or 'radius',
+            'user': entry.get('username') or entry.get('user') or 'radius',
+            'password': entry.get('password') or '',
+            'status_host': entry.get('status_host') or None,
+            'status_port': int(entry.get('status_port') or STATUS_SERVER_PORT),
+            'status_secret': entry.get('status_secret')
+        })
+    return servers
+
+def run_hup_command(command, server, timeout=FANOUT_SERVER_TIMEOUT):
+    """Run the HUP hook for a server ({name}, {host} substituted, shell-quoted); True on exit 0"""
+    import subprocess
+    
+    command = command.format(name=shlex.quote(server['name']), host=shlex.quote(server['host']))
+    try:
+        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        logging.error(f"[{server['name']}] HUP hook timed out after {timeout:g}s: {command}")
+        return False
+    if result.returncode != 0:
+        logging.error(f"[{server['name']}] HUP hook exited {result.returncode}: "
+                      f"{result.stderr.strip() or command}")
+        return False
+    logging.info(f"[{server['name']}] HUP hook succeeded: {command}")
+    return True
+
+def check_server(server, timeout=FANOUT_SERVER_TIMEOUT, hup_command=None):
+    """
+    Check one server's reload flag and, if set, reload it with hup_command (without
+    one the server is only reported as pending). Every database operation, the HUP
+    hook and the readiness probe after it are bounded by `timeout` (the probe by
+    READY_TIMEOUT if shorter), so a slow server only delays its own result. Only
+    servers with a status_host are probed.
+    Returns the server's report row with timings in milliseconds.
+    """
+    result = {
+        'name': server['name'],
+        'host': server['host'],
+        'status': 'error',
+        'flag': None,
+        'connect_ms': None,
+        'query_ms': None,
+        'hup_ms': None,
+        'total_ms': None,
+        'error': None
+    }
+    started = time.monotonic()
+    conn = None
+    try:
+        conn = connect_database(server, connect_timeout=timeout, read_timeout=timeout,
+                                write_timeout=timeout)
+        result['connect_ms'] = (time.monotonic() - started) * 1000
+        
+        with conn.cursor() as cursor:
+            query_started = time.monotonic()
+            state = read_reload_state(cursor)
+            result['query_ms'] = (time.monotonic() - query_started) * 1000
+            
+            if not state:
+                result['error'] = "No reload flag found in database - table may not be created"
+            elif not state['pending']:
+                result['flag'] = False
+                result['status'] = 'clean'
+            elif not hup_command:
+                # Without a hook there is no way to HUP this server: leave its flag for
+                # a run (or the server's own reload check) that can
+                result['flag'] = True
+                result['status'] = 'pending'
+                logging.warning(f"[{server['name']}] Reload pending - no --hup-command to reload it, "
+                                f"flag left set")
+            else:
+                result['flag'] = True
+                hup = lambda: run_hup_command(hup_command, server, timeout)
+                # The database host need not run FreeRADIUS, nor accept our Status-Server
+                ready_timeout = min(READY_TIMEOUT, timeout) if server.get('status_host') else 0
+                hup_started = time.monotonic()
+                outcome = reload_and_clear_flag(conn, cursor, hup, server['name'], state['generation'],
+                                                server.get('status_host'), ready_timeout,
+                                                server.get('status_port'), server.get('status_secret'))
+                result['hup_ms'] = (time.monotonic() - hup_started) * 1000
+                result['status'] = outcome or 'failed'
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        if conn:
+            try:
+                conn.close()
+            except Exception:
+                pass
+    
+    result['total_ms'] = (time.monotonic() - started) * 1000
+    if result['error']:
+        logging.error(f"[{server['name']}] Reload check failed: {result['error']}")
+    return result
+
+def run_fanout(servers, parallel=FANOUT_PARALLEL, timeout=FANOUT_SERVER_TIMEOUT, hup_command=None):
+    """
+    Check and reload all enabled servers concurrently, with at most `parallel` database
+    connections open at once. Returns one report row per server, in list order.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    # Keyed by list position: names and hosts need not be unique
+    enabled = [(index, server) for index, server in enumerate(servers) if server['enabled']]
+    logging.info(f"Checking {len(enabled)} RADIUS servers ({parallel} in parallel, "
+                 f"{timeout:g}s timeout per server)")
+    
+    results = {}
+    if enabled:
+        with ThreadPoolExecutor(max_workers=min(parallel, len(enabled))) as pool:
+            futures = {index: pool.submit(check_server, server, timeout, hup_command)
+                       for index, server in enabled}
+            results = {index: future.result() for index, future in futures.items()}
+    
+    report = []
+    for index, server in enumerate(servers):
+        if index in results:
+            report.append(results[index])
+        else:
+            report.append({'name': server['name'], 'host': server['host'], 'status': 'disabled',
+                           'flag': None, 'connect_ms': None, 'query_ms': None, 'hup_ms': None,
+                           'total_ms': None, 'error': None})
+    return report
+
+def print_fanout_report(report, elapsed):
+    """Print the per-server fan-out results with timings"""
+    def ms(value):
+        return f"{value:.1f} ms" if value is not None else "-"
+    
+    print("=" * 100)
+    print(f"{'Server':<24} {'Host':<22} {'Status':<9} {'Flag':<5} {'Connect':>10} {'Query':>9} "
+          f"{'HUP':>10} {'Total':>10}")
+    print("-" * 100)
+    for row in report:
+        flag = '-' if row['flag'] is None else ('set' if row['flag'] else 'clear')
+        print(f"{row['name'][:24]:<24} {row['host'][:22]:<22} {row['status']:<9} {flag:<5} "
+              f"{ms(row['connect_ms']):>10} {ms(row['query_ms']):>9} {ms(row['hup_ms']):>10} "
+              f"{ms(row['total_ms']):>10}")
+        if row['error']:
+            print(f"{'':<24} ✗ {row['error']}")
+    print("-" * 100)
+    
+    counts = {}
+    for row in report:
+        counts[row['status']] = counts.get(row['status'], 0) + 1
+    summary = ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{len(report)} servers in {elapsed:.2f}s: {summary}")
+    print("=" * 100)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a sorted list"""
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+def print_reload_history(days=HISTORY_DAYS):
+    """Print reload outcomes and HUP-to-ready percentiles from the local radius_reload_history"""
+    db_config = parse_freeradius_sql_config()
+    if not db_config['password']:
+        logging.error("No database password found in FreeRADIUS config - cannot proceed")
+        return False
+    
+    conn = connect_database(db_config)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(RELOAD_HISTORY_QUERY, (days,))
+            rows = cursor.fetchall()
+    except mysql_connector.MySQLError as e:
+        if not e.args or e.args[0] != MYSQL_ER_NO_SUCH_TABLE:
+            raise
+        print("✗ No radius_reload_history table - run radius_add_reload_history.sql")
+        return False
+    finally:
+        conn.close()
+    
+    counts = {}
+    for row in rows:
+        counts[row[2]] = counts.get(row[2], 0) + 1
+    summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+    ready = sorted(row[3] for row in rows if row[3] is not None)
+    
+    print("=" * 60)
+    print(f"Reload history, last {days:g} days ({db_config['database']} at {db_config['host']})")
+    print("-" * 60)
+    print(f"Reloads: {len(rows)}" + (f" ({summary})" if rows else ""))
+    if ready:
+        print(f"HUP to ready ({len(ready)} samples): " +
+              "  ".join(f"p{pct} {percentile(ready, pct)} ms" for pct in (50, 90, 99)) +
+              f"  max {ready[-1]} ms")
+    else:
+        print("HUP to ready: no samples")
+    if rows:
+        print("-" * 60)
+        print(f"{'Reloaded at':<24} {'Generation':>10}  {'Outcome':<8} {'Ready':>9}")
+        for reloaded_at, generation, outcome, ready_ms in rows[-10:]:
+            print(f"{str(reloaded_at)[:23]:<24} {'-' if generation is None else generation:>10}  "
+                  f"{outcome:<8} {'-' if ready_ms is None else f'{ready_ms} ms':>9}")
+    print("=" * 60)
+    return True
+
+def run_status_responder(port=STATUS_SERVER_PORT, secret=STATUS_SERVER_SECRET, reload_delay=0.5,
+                         pid_file=None):
+    """
+    Local stand-in for FreeRADIUS to test the readiness probe: answers Status-Server
+    requests with a valid Message-Authenticator on STATUS_SERVER:port with Access-Accept,
+    and stays silent for `reload_delay` seconds after each SIGHUP, like a reloading server.
+    Writes its PID to pid_file for --pid-file.
+    """
+    stop = threading.Event()
+    reloading_until = [0.0]
+    
+    def request_stop(signum, frame):
+        stop.set()
+    
+    def reload(signum, frame):
+        reloading_until[0] = time.monotonic() + reload_delay
+        logging.info(f"Status responder: SIGHUP, not answering for {reload_delay:g}s")
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGHUP, reload)
+    
+    secret = secret.encode()
+    family, socktype, proto, _, address = socket.getaddrinfo(STATUS_SERVER, port, type=socket.SOCK_DGRAM)[0]
+    sock = socket.socket(family, socktype, proto)
+    sock.bind(address)
+    sock.settimeout(0.2)
+    if pid_file:
+        with open(pid_file, 'w') as f:
+            f.write(f"{os.getpid()}\n")
+    logging.info(f"Status responder listening on {STATUS_SERVER}:{port} (PID {os.getpid()})")
+    
+    try:
+        while not stop.is_set():
+            try:
+                packet, peer = sock.recvfrom(4096)
+            except socket.timeout:
+                continue
+            if len(packet) < 20 or packet[0] != RADIUS_STATUS_SERVER or \
+                    time.monotonic() < reloading_until[0] or not message_authenticator_ok(packet, secret):
+                continue
+            header = struct.pack('!BBH', RADIUS_ACCESS_ACCEPT, packet[1], 20)
+            authenticator = hashlib.md5(header + packet[4:20] + secret).digest()
+            sock.sendto(header + authenticator, peer)
+    finally:
+        sock.close()
+        if pid_file and os.path.exists(pid_file):
+            os.remove(pid_file)
+    logging.info("Status responder stopped")
+    return True
+
+def load_prune_state():
+    """Return the saved prune positions ({server key: state}), {} if none"""
+    try:
+        with open(PRUNE_STATE_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_prune_state(states):
+    """Write the prune positions atomically, so a kill never leaves a torn file"""
+    if not states:
+        if os.path.exists(PRUNE_STATE_FILE):
+            os.remove(PRUNE_STATE_FILE)
+        return
+    os.makedirs(os.path.dirname(PRUNE_STATE_FILE), exist_ok=True)
+    temp_file = PRUNE_STATE_FILE + '.tmp'
+    with open(temp_file, 'w') as f:
+        json.dump(states, f, indent=2)
+    os.replace(temp_file, PRUNE_STATE_FILE)
+
+def load_nas_clients(cursor):
+    """
+    Return the nas clients as (addresses, networks, hostnames): literal IP addresses,
+    CIDR ranges and names that FreeRADIUS resolves itself
+    """
+    addresses, networks, hostnames = set(), [], []
+    cursor.execute(NAS_CLIENTS_QUERY)
+    for (nasname,) in cursor.fetchall():
+        nasname = (nasname or '').strip()
+        if not nasname:
+            continue
+        try:
+            if '/' in nasname:
+                networks.append(ipaddress.ip_network(nasname, strict=False))
+            else:
+                addresses.add(ipaddress.ip_address(nasname))
+        except ValueError:
+            hostnames.append(nasname)
+    return addresses, networks, hostnames
+
+def orphaned_addresses(values, addresses, networks):
+    """
+    Return the radpostauth NAS addresses no nas client address or range covers. Values
+    that are not an IP address ('', unspecified, garbage) are never orphaned.
+    """
+    orphans = []
+    for value in values:
+        try:
+            address = ipaddress.ip_address((value or '').strip())
+        except ValueError:
+            continue
+        if address.is_unspecified or address in addresses or \
+                any(address in network for network in networks):
+            continue
+        orphans.append(value)
+    return orphans
+
+def check_nas_clients(cursor, prefix=""):
+    """Log the nas clients --orphaned works from; False if hostname clients make it unsafe"""
+    addresses, networks, hostnames = load_nas_clients(cursor)
+    if hostnames:
+        logging.error(f"{prefix}✗ nas has {len(hostnames)} hostname clients ({', '.join(hostnames[:5])}) - "
+                      f"their auth rows cannot be told from orphaned ones, use --older-than only")
+        return False
+    logging.info(f"{prefix}Orphaned rows: NAS address outside {len(addresses)} nas client addresses "
+                 f"and {len(networks)} ranges")
+    return True
+
+def prune_radpostauth(db_config, server_name=None, older_than=None, orphaned=False,
+                      batch_rows=PRUNE_BATCH_ROWS, batch_sleep=PRUNE_BATCH_SLEEP, stop=None):
+    """
+    Delete radpostauth rows older than `older_than` days or (`orphaned`) logged by a NAS
+    that no nas client address or CIDR range covers any more. --orphaned is refused
+    without a radpostauth.nasipaddress column or while nas has hostname clients, whose
+    addresses cannot be told from the database. Each DELETE covers a primary key range of at most
+    `batch_rows` rows and runs in its own transaction, with `batch_sleep` seconds between
+    batches. The id range and age cutoff are fixed at the start and the position is
+    saved to PRUNE_STATE_FILE after every batch, so a run with the same criteria resumes
+    where an interrupted one stopped. Returns True once the whole range is done.
+    """
+    prefix = f"[{server_name}] " if server_name else ""
+    key = server_name or f"{db_config['host']}:{db_config['port']}/{db_config['database']}"
+    criteria = {'older_than': older_than, 'orphaned': orphaned}
+    stop = stop or threading.Event()
+    states = load_prune_state()
+    state = states.get(key)
+    
+    conn = connect_database(db_config, autocommit=True, connect_timeout=10, read_timeout=60,
+                            write_timeout=60)
+    try:
+        with conn.cursor() as cursor:
+            if orphaned:
+                try:
+                    cursor.execute(PRUNE_NAS_COLUMN_QUERY)
+                except mysql_connector.MySQLError as e:
+                    if not e.args or e.args[0] != MYSQL_ER_BAD_FIELD:
+                        raise
+                    logging.error(f"{prefix}✗ radpostauth has no nasipaddress column - cannot prune "
+                                  f"orphaned rows (see RADIUS_SETUP.md), use --older-than only")
+                    return False
+                cursor.fetchall()
+                if not check_nas_clients(cursor, prefix):
+                    return False
+            
+            if state and state['criteria'] == criteria:
+                logging.info(f"{prefix}Resuming radpostauth prune at id {state['next_id']} of "
+                             f"{state['last_id']} ({state['deleted']} rows deleted so far)")
+            else:
+                if state:
+                    logging.info(f"{prefix}Prune criteria changed, discarding the saved position")
+                cursor.execute(PRUNE_BOUNDS_QUERY, (round((older_than or 0) * 86400),))
+                first_id, last_id, cutoff = cursor.fetchone()
+                if first_id is None:
+                    logging.info(f"{prefix}radpostauth is empty, nothing to prune")
+                    states.pop(key, None)
+                    save_prune_state(states)
+                    return True
+                state = {'criteria': criteria, 'cutoff': str(cutoff) if older_than is not None else None,
+                         'first_id': first_id, 'last_id': last_id, 'next_id': first_id, 'deleted': 0}
+                reasons = []
+                if older_than is not None:
+                    reasons.append(f"authdate before {state['cutoff']}")
+                if orphaned:
+                    reasons.append("NAS no longer in nas")
+                logging.info(f"{prefix}Pruning radpostauth ids {first_id}-{last_id} ({' or '.join(reasons)}), "
+                             f"{batch_rows} rows per batch, {batch_sleep:g}s between batches")
+            
+            started = reported = time.monotonic()
+            deleted = 0
+            slowest = 0
+            pruned_nas = set()
+            while state['next_id'] <= state['last_id'] and not stop.is_set():
+                cursor.execute(PRUNE_BATCH_END_QUERY, (state['next_id'], state['last_id'], batch_rows - 1))
+                row = cursor.fetchone()
+                batch_end = row[0] if row else state['last_id']
+                
+                conditions, params = [], []
+                if older_than is not None:
+                    conditions.append("authdate < %s")
+                    params.append(state['cutoff'])
+                if orphaned:
+                    # Re-read nas every batch, so a client added meanwhile keeps its rows
+                    addresses, networks, hostnames = load_nas_clients(cursor)
+                    if hostnames:
+                        logging.error(f"{prefix}✗ nas gained hostname clients ({', '.join(hostnames[:5])}) "
+                                      f"- stopping the orphaned prune")
+                        break
+                    cursor.execute(PRUNE_BATCH_ADDRESSES_QUERY, (state['next_id'], batch_end))
+                    orphans = orphaned_addresses([row[0] for row in cursor.fetchall()], addresses, networks)
+                    if orphans:
+                        conditions.append(f"nasipaddress IN ({', '.join(['%s'] * len(orphans))})")
+                        params.extend(orphans)
+                        pruned_nas.update(orphans)
+                
+                if conditions:
+                    batch_started = time.monotonic()
+                    cursor.execute(f"DELETE FROM radpostauth WHERE id BETWEEN %s AND %s "
+                                   f"AND ({' OR '.join(conditions)})", [state['next_id'], batch_end] + params)
+                    slowest = max(slowest, time.monotonic() - batch_started)
+                    deleted += cursor.rowcount
+                    state['deleted'] += cursor.rowcount
+                state['next_id'] = batch_end + 1
+                states[key] = state
+                save_prune_state(states)
+                
+                now = time.monotonic()
+                if now - reported >= PRUNE_PROGRESS_INTERVAL:
+                    done = (batch_end - state['first_id'] + 1) / (state['last_id'] - state['first_id'] + 1)
+                    logging.info(f"{prefix}Pruned {state['deleted']} rows, at id {batch_end} of "
+                                 f"{state['last_id']} ({done:.0%}), {deleted / (now - started):.0f} rows/s")
+                    reported = now
+                if state['next_id'] <= state['last_id']:
+                    stop.wait(batch_sleep)
+            
+            elapsed = time.monotonic() - started
+            rate = deleted / elapsed if elapsed > 0 else 0
+            if state['next_id'] <= state['last_id']:
+                logging.warning(f"{prefix}Prune stopped at id {state['next_id']} of {state['last_id']} after "
+                                f"{deleted} rows ({rate:.0f} rows/s) - run again with the same options to resume")
+                return False
+            
+            states.pop(key, None)
+            save_prune_state(states)
+            logging.info(f"{prefix}✓ Pruned {state['deleted']} radpostauth rows, {deleted} in this run "
+                         f"({elapsed:.1f}s, {rate:.0f} rows/s, slowest batch {slowest * 1000:.0f} ms)")
+            if pruned_nas:
+                listed = sorted(pruned_nas)
+                more = f" and {len(listed) - 10} more" if len(listed) > 10 else ""
+                logging.info(f"{prefix}Orphaned NAS addresses pruned in this run: {', '.join(listed[:10])}{more}")
+            return True
+    finally:
+        conn.close()
+
+def run_prune(servers, older_than=None, orphaned=False, batch_rows=PRUNE_BATCH_ROWS,
+              batch_sleep=PRUNE_BATCH_SLEEP):
+    """
+    Prune radpostauth on each enabled server in turn. SIGTERM/SIGINT stop after the
+    current batch. Returns True if every server was pruned completely.
+    """
+    stop = threading.Event()
+    
+    def request_stop(signum, frame):
+        logging.info(f"Received {signal.Signals(signum).name}, stopping after the current batch")
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    
+    complete = True
+    for server in servers:
+        if not server['enabled']:
+            continue
+        if stop.is_set():
+            complete = False
+            break
+        try:
+            if not prune_radpostauth(server, server.get('name'), older_than, orphaned, batch_rows,
+                                     batch_sleep, stop):
+                complete = False
+        except mysql_connector.MySQLError as e:
+            prefix = f"[{server['name']}] " if server.get('name') else ""
+            logging.error(f"{prefix}✗ radpostauth prune failed: {e} - run again to resume")
+            complete = False
+    return complete
+
+def install_systemd_service(interval=DAEMON_POLL_INTERVAL, debounce=RELOAD_DEBOUNCE,
+                            min_hup_interval=MIN_HUP_INTERVAL):
+    """Install and start a systemd unit running the daemon, replacing the cron job"""
+    import subprocess
+    
+    script_path = os.path.abspath(__file__)
+    unit = f"""[Unit]
+Description=FreeRADIUS auto-reload daemon (radius_reload_flag watcher)
+After=network-online.target mysql.service mariadb.service freeradius.service
+
+[Service]
+ExecStart=/usr/bin/python3 {script_path} --daemon --interval {interval:g} --debounce {debounce:g} --min-hup-interval {min_hup_interval:g}
+Restart=always
+RestartSec=5
+StandardOutput=null
+
+[Install]
+WantedBy=multi-user.target
+"""
+    
+    try:
+        with open(SYSTEMD_UNIT_FILE, 'w') as f:
+            f.write(unit)
+        print(f"✓ Wrote {SYSTEMD_UNIT_FILE}")
+        
+        service = os.path.basename(SYSTEMD_UNIT_FILE)
+        subprocess.run(['systemctl', 'daemon-reload'], check=True)
+        subprocess.run(['systemctl', 'enable', '--now', service], check=True)
+        print(f"✓ Service {service} enabled and started")
+        
+        # The daemon replaces the cron poll; drop our cron line if present
+        result = subprocess.run(['crontab', '-l'], capture_output=True, text=True)
+        if result.returncode == 0 and script_path in result.stdout:
+            remaining = [line for line in result.stdout.splitlines() if script_path not in line]
+            process = subprocess.Popen(['crontab', '-'], stdin=subprocess.PIPE, text=True)
+            process.communicate(input='\n'.join(remaining) + '\n')
+            if process.returncode == 0:
+                print(f"✓ Removed cron job for {script_path}")
+        return True
+        
+    except Exception as e:
+        print(f"✗ Error installing systemd service: {e}")
+        return False
+
 def install_cron_job():
     """Install cron job if not already present"""
     import subprocess
@@ -284,12 +1241,114 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='FreeRADIUS Auto-Reload Script')
     parser.add_argument('--install-cron', action='store_true', 
                        help='Install cron job to run this script every 5 minutes')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Stay resident with one database connection and check the flag every --interval seconds')
+    parser.add_argument('--interval', type=float, default=DAEMON_POLL_INTERVAL,
+                       help=f'Seconds between flag checks in daemon mode (default: {DAEMON_POLL_INTERVAL:g})')
+    parser.add_argument('--debounce', type=float, default=RELOAD_DEBOUNCE,
+                       help=f'Daemon mode: reload once no new change was seen for this many seconds '
+                            f'(default: {RELOAD_DEBOUNCE:g})')
+    parser.add_argument('--min-hup-interval', type=float, default=MIN_HUP_INTERVAL,
+                       help=f'Daemon mode: minimum seconds between two HUPs (default: {MIN_HUP_INTERVAL:g})')
+    parser.add_argument('--install-service', action='store_true',
+                       help='Install a systemd service running --daemon and remove the cron job')
+    parser.add_argument('--servers', metavar='FILE',
+                       help='Check and reload all RADIUS servers in a JSON server list concurrently '
+                            '(RadiusServerConfig::getServersForSync() format)')
+    parser.add_argument('--parallel', type=int, default=FANOUT_PARALLEL,
+                       help=f'Maximum parallel database connections with --servers (default: {FANOUT_PARALLEL})')
+    parser.add_argument('--server-timeout', type=float, default=FANOUT_SERVER_TIMEOUT,
+                       help=f'Per-server connect/query/HUP timeout in seconds with --servers '
+                            f'(default: {FANOUT_SERVER_TIMEOUT})')
+    parser.add_argument('--hup-command', metavar='CMD',
+                       help='Shell command that reloads one server with --servers, {host} and {name} '
+                            'substituted, e.g. "ssh root@{host} systemctl reload freeradius" '
+                            '(default: only report servers with the flag set as pending)')
+    parser.add_argument('--pid-file', metavar='FILE',
+                       help=f'FreeRADIUS PID file to HUP (default: {FREERADIUS_PID_FILE}), '
+                            'or the PID file to write with --status-responder')
+    parser.add_argument('--status-server', default=STATUS_SERVER, metavar='HOST',
+                       help=f'Server probed with Status-Server after a local HUP (default: {STATUS_SERVER}); '
+                            'with --servers each server\'s status_host is probed')
+    parser.add_argument('--status-port', type=int, default=STATUS_SERVER_PORT,
+                       help=f'Status-Server port (default: {STATUS_SERVER_PORT}), also for servers '
+                            'without status_port')
+    parser.add_argument('--status-secret', default=STATUS_SERVER_SECRET,
+                       help='RADIUS client secret for Status-Server (default: the localhost client secret), '
+                            'also for servers without status_secret')
+    parser.add_argument('--ready-timeout', type=float, default=READY_TIMEOUT,
+                       help=f'Seconds to wait for a Status-Server answer after the HUP, 0 disables '
+                            f'the probe (default: {READY_TIMEOUT})')
+    parser.add_argument('--reload-history', type=float, nargs='?', const=HISTORY_DAYS, metavar='DAYS',
+                       help=f'Print reload outcomes and HUP-to-ready percentiles of the last DAYS days '
+                            f'(default: {HISTORY_DAYS})')
+    parser.add_argument('--status-responder', action='store_true',
+                       help='Run a local Status-Server stand-in for FreeRADIUS to test the readiness '
+                            'probe; it stops answering for --reload-delay seconds after SIGHUP')
+    parser.add_argument('--reload-delay', type=float, default=0.5,
+                       help='Seconds the --status-responder stays silent after SIGHUP (default: 0.5)')
+    parser.add_argument('--prune-radpostauth', action='store_true',
+                       help='Delete old and/or orphaned radpostauth rows in small primary key batches '
+                            '(local database, or every server with --servers); resumes an interrupted run')
+    parser.add_argument('--older-than', type=float, metavar='DAYS',
+                       help='Prune radpostauth rows with an authdate older than DAYS days')
+    parser.add_argument('--orphaned', action='store_true',
+                       help='Prune radpostauth rows of NAS clients that are no longer in nas')
+    parser.add_argument('--batch-rows', type=int, default=PRUNE_BATCH_ROWS,
+                       help=f'Rows per DELETE batch when pruning (default: {PRUNE_BATCH_ROWS})')
+    parser.add_argument('--batch-sleep', type=float, default=PRUNE_BATCH_SLEEP,
+                       help=f'Seconds to sleep between DELETE batches (default: {PRUNE_BATCH_SLEEP:g})')
     args = parser.parse_args()
     
+    if args.prune_radpostauth and args.older_than is None and not args.orphaned:
+        parser.error('--prune-radpostauth needs --older-than DAYS and/or --orphaned')
+    if args.batch_rows < 1:
+        parser.error('--batch-rows must be at least 1')
+    
+    STATUS_SERVER = args.status_server
+    STATUS_SERVER_PORT = args.status_port
+    STATUS_SERVER_SECRET = args.status_secret
+    READY_TIMEOUT = args.ready_timeout
+    if args.pid_file:
+        FREERADIUS_PID_FILE = args.pid_file
+    
+    if args.status_responder:
+        sys.exit(0 if run_status_responder(args.status_port, args.status_secret, args.reload_delay,
+                                           args.pid_file) else 1)
+    
+    if args.reload_history is not None:
+        sys.exit(0 if print_reload_history(args.reload_history) else 1)
+    
     if args.install_cron:
         install_cron_job()
         sys.exit(0)
     
+    if args.install_service:
+        sys.exit(0 if install_systemd_service(args.interval, args.debounce, args.min_hup_interval) else 1)
+    
+    if args.daemon:
+        sys.exit(0 if run_daemon(args.interval, args.debounce, args.min_hup_interval) else 1)
+    
+    if args.prune_radpostauth:
+        if args.servers:
+            servers = load_server_list(args.servers)
+        else:
+            db_config = parse_freeradius_sql_config()
+            if not db_config['password']:
+                logging.error("No database password found in FreeRADIUS config - cannot proceed")
+                sys.exit(1)
+            servers = [dict(db_config, name=None, enabled=True)]
+        sys.exit(0 if run_prune(servers, args.older_than, args.orphaned, args.batch_rows,
+                                args.batch_sleep) else 1)
+    
+    if args.servers:
+        started = time.monotonic()
+        report = run_fanout(load_server_list(args.servers), args.parallel, args.server_timeout,
+                            args.hup_command)
+        print_fanout_report(report, time.monotonic() - started)
+        sys.exit(0 if all(row['status'] in ('clean', 'reloaded', 'skipped', 'pending', 'disabled')
+                          for row in report) else 1)
+    
     try:
         check_and_reload()
     except Exception as e:
@@ -186,14 +186,25 @@ class RadiusDatabaseSync
     /**
      * Set reload flag on each RADIUS server's local database
      * This triggers the Python script on each server to send HUP signal to FreeRADIUS
+     * Every change also bumps change_generation, so a change committed while the
+     * script is reloading is not lost when it clears the flag
      */
     private function setReloadFlagOnRadiusServers()
     {
         foreach ($this->servers as $server) {
             try {
                 $conn = $this->getConnection($server);
-                $stmt = $conn->prepare("UPDATE radius_reload_flag SET needs_reload = TRUE WHERE id = 1");
-                $stmt->execute();
+                try {
+                    $stmt = $conn->prepare("UPDATE radius_reload_flag SET needs_reload = TRUE, change_generation = change_generation + 1 WHERE id = 1");
+                    $stmt->execute();
+                } catch (PDOException $e) {
+                    // Table without the generation columns (radius_add_reload_generation.sql not applied)
+                    if ($e->getCode() !== '42S22') {
+                        throw $e;
+                    }
+                    $stmt = $conn->prepare("UPDATE radius_reload_flag SET needs_reload = TRUE WHERE id = 1");
+                    $stmt->execute();
+                }
                 error_log("[{$server['name']}] Set reload flag in local radius database");
             } catch (PDOException $e) {
                 error_log("[{$server['name']}] Failed to set reload flag: " . $e->getMessage());
@@ -0,0 +1,123 @@
+"""LoadGenerator and FailoverProbe against DHCPv6Responder stand-ins on loopback"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('scapy.layers.dhcp6')
+
+SCRIPTS = os.path.join(os.path.dirname(__file__), '..', 'scripts')
+sys.path.insert(0, SCRIPTS)
+
+import dhcpv6_rpd_client as rpd  # noqa: E402
+
+BASE_MAC = '02:00:00:00:00:01'
+# The HA pair needs two addresses that both take port 547, e.g.
+#   ip -6 addr add fd00:1::2/128 dev lo; ip -6 addr add fd00:1::3/128 dev lo
+ACTIVE = 'fd00:1::2'
+STANDBY = 'fd00:1::3'
+
+
+def bindable(address):
+    sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    try:
+        sock.bind((address, 0))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def start_responder(listen, *args, timeout=10):
+    """Run the responder CLI and wait until it listens; skip when it cannot bind"""
+    process = subprocess.Popen(
+        [sys.executable, '-u', os.path.join(SCRIPTS, 'dhcpv6_rpd_client.py'), '--responder',
+         '-i', 'lo', '--listen', listen] + list(args),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+    )
+    # The responder either prints that it listens or exits; the timer covers a hang
+    watchdog = threading.Timer(timeout, process.kill)
+    watchdog.start()
+    output = []
+    try:
+        for line in process.stdout:
+            output.append(line)
+            if 'responder listening' in line:
+                return process
+    finally:
+        watchdog.cancel()
+    stop_responder(process)
+    pytest.skip(f"responder on [{listen}]:547 did not start: {''.join(output)[-200:]}")
+
+
+def stop_responder(process):
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    process.stdout.close()
+
+
+@pytest.fixture
+def responder():
+    process = start_responder('::1')
+    yield process
+    stop_responder(process)
+
+
+@pytest.mark.parametrize('rapid_commit', [False, True])
+def test_load_generator_all_answered(responder, rapid_commit):
+    generator = rpd.LoadGenerator(interface='lo', count=200, base_mac=BASE_MAC, relay_address='::1',
+                                  local_address='::1', port=10547, timeout=3,
+                                  rapid_commit=rapid_commit)
+    stats = generator.run()
+    assert stats['sent'] == 200
+    assert stats['answered'] == 200
+    assert stats['unanswered'] == 0
+    assert stats['stray'] == 0
+    # The responder commits Rapid Commit Solicits only when started with --rapid-commit
+    assert stats['committed'] == 0
+
+
+@pytest.mark.skipif(not (bindable(ACTIVE) and bindable(STANDBY)),
+                    reason=f"{ACTIVE} and {STANDBY} are not configured locally")
+def test_failover_probe_ha_standby_takes_over():
+    active = start_responder(ACTIVE)
+    standby = None
+    try:
+        standby = start_responder(STANDBY, '--ha-standby', ACTIVE, '--heartbeat-delay', '0.1',
+                                  '--max-response-delay', '0.5')
+        # Let the standby see the active peer answer before probing
+        time.sleep(0.3)
+        probe = rpd.FailoverProbe(interface='lo', relay_addresses=[ACTIVE, STANDBY],
+                                  base_mac=BASE_MAC, rate=20, duration=3.0, timeout=0.3, late=0.3)
+
+        # Stop the active peer a second into the probe; the standby takes over
+        threading.Timer(1.0, stop_responder, (active,)).start()
+        stats = probe.run()
+    finally:
+        stop_responder(active)
+        if standby is not None:
+            stop_responder(standby)
+
+    assert stats['answered'] + stats['lost'] == stats['probes']
+    assert stats['answered'] > 0
+    assert stats['lost'] > 0
+    assert len(stats['events']) == 1
+    assert stats['recovered']
+    event = stats['events'][0]
+    assert event['before'] == ACTIVE
+    assert event['after'] == STANDBY
+    assert {server['peer'] for server in stats['servers']} == {ACTIVE, STANDBY}
+    # A hot-standby peer stays silent while its partner answers
+    assert stats['answered_twice'] == 0
@@ -0,0 +1,86 @@
+"""SolicitTemplate must build the same bytes as the scapy create_frame() path"""
+
+import os
+import socket
+import sys
+
+import pytest
+
+pytest.importorskip('scapy.layers.dhcp6')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import dhcpv6_rpd_client as rpd  # noqa: E402
+
+MACS = ['00:11:22:33:44:55', '02:00:00:00:00:01', 'fe:dc:ba:98:76:54']
+TRIDS = [0, 1, 0x123456, 0xFFFFFF]
+RELAY = 'fd00:1::1'
+OTHER_RELAY = 'fd00:2::1'
+PEER = 'fd00:1::100'
+OTHER_PEER = 'fd00:2::100'
+
+
+def make_client(mac, trid, rapid_commit=False):
+    return rpd.DHCPv6RPDClient('lo', mac, transaction_id=trid, rapid_commit=rapid_commit)
+
+
+def template_for(relay_address, peer_address, rapid_commit=False):
+    return rpd.SolicitTemplate.for_client(make_client(MACS[0], 1, rapid_commit),
+                                          relay_address, peer_address)
+
+
+def scapy_frame(client, relay_address=None, peer_address=None):
+    return bytes(client.create_frame(relay_address, peer_address))
+
+
+@pytest.mark.parametrize('rapid_commit', [False, True])
+@pytest.mark.parametrize('relay_address,peer_address', [(None, None), (RELAY, PEER)])
+def test_template_matches_scapy(relay_address, peer_address, rapid_commit):
+    template = template_for(relay_address, peer_address, rapid_commit)
+    for mac in MACS:
+        for trid in TRIDS:
+            client = make_client(mac, trid, rapid_commit)
+            assert template.build_for(client) == scapy_frame(client, relay_address, peer_address)
+
+
+@pytest.mark.parametrize('relay_address,peer_address', [(None, None), (RELAY, PEER)])
+def test_message_is_udp_payload(relay_address, peer_address):
+    template = template_for(relay_address, peer_address)
+    client = make_client(MACS[0], 0xABCDEF)
+    packet = client.create_solicit(relay_address, peer_address)
+    from scapy.layers.inet6 import UDP
+    assert template.build_message_for(client) == bytes(packet[UDP].payload)
+
+
+def test_one_template_serves_many_clients():
+    # Patching must overwrite every per-client field, not only those that differ
+    template = template_for(RELAY, PEER)
+    for mac in reversed(MACS):
+        for trid in reversed(TRIDS):
+            client = make_client(mac, trid)
+            assert template.build_for(client) == scapy_frame(client, RELAY, PEER)
+
+
+def test_relay_and_peer_address_patching():
+    template = template_for(RELAY, PEER)
+    client = make_client(MACS[1], 42)
+    mac_bytes = bytes.fromhex(client.client_mac.replace(':', ''))
+    frame = template.build_frame(
+        client.transaction_id, mac_bytes, client.duid_time,
+        relay_address=socket.inet_pton(socket.AF_INET6, OTHER_RELAY),
+        peer_address=socket.inet_pton(socket.AF_INET6, OTHER_PEER)
+    )
+    assert frame == scapy_frame(client, OTHER_RELAY, OTHER_PEER)
+
+
+@pytest.mark.parametrize('relay_address,peer_address', [(None, None), (RELAY, PEER)])
+def test_iaid_patching(relay_address, peer_address):
+    template = template_for(relay_address, peer_address)
+    client = make_client(MACS[2], 7)
+    mac_bytes = bytes.fromhex(client.client_mac.replace(':', ''))
+    patched = template.build_frame(client.transaction_id, mac_bytes, client.duid_time, iaid=0xCAFEF00D)
+    # Restoring the IAID create_solicit() uses gives the scapy frame again
+    restored = template.build_frame(client.transaction_id, mac_bytes, client.duid_time, iaid=0x12345678)
+    assert restored == scapy_frame(client, relay_address, peer_address)
+    assert patched != restored
+    assert (0xCAFEF00D).to_bytes(4, 'big') in patched